@@ -0,0 +1,52 @@
+"""
+Exception handlers shared by the application.
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Bodies of these types are logged and echoed back on validation errors
+TEXT_CONTENT_TYPES = ("application/json", "application/x-www-form-urlencoded", "text/")
+MAX_LOGGED_BODY_CHARS = 2048
+
+
+async def _loggable_body(request: Request) -> Optional[str]:
+    """
+    Get a bounded, printable copy of a text request body.
+
+    Binary and multipart bodies (attachments, upload chunks) are never
+    read here: they may be large and are not useful in a log line.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if not content_type.startswith(TEXT_CONTENT_TYPES):
+        return None
+    body = await request.body()
+    text = body[:MAX_LOGGED_BODY_CHARS * 4].decode("utf-8", errors="replace")
+    if len(text) > MAX_LOGGED_BODY_CHARS or len(body) > MAX_LOGGED_BODY_CHARS * 4:
+        text = text[:MAX_LOGGED_BODY_CHARS] + f"... ({len(body)} bytes)"
+    return text
+
+
+def _printable(data: bytes) -> str:
+    text = data[:MAX_LOGGED_BODY_CHARS].decode("utf-8", errors="replace")
+    return text if len(data) <= MAX_LOGGED_BODY_CHARS else f"{text}... ({len(data)} bytes)"
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """Handle request validation errors with detailed logging."""
+    body = await _loggable_body(request)
+    # Errors can carry the raw (possibly binary) input, e.g. an unparsed body
+    errors = jsonable_encoder(exc.errors(), custom_encoder={bytes: _printable})
+    logger.error(f"Validation error for {request.url}: {errors}")
+    content = {"detail": errors}
+    if body is not None:
+        logger.error(f"Request body: {body}")
+        content["body"] = body
+    return JSONResponse(status_code=422, content=content)
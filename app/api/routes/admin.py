@@ -0,0 +1,97 @@
+"""
+Admin-only profiling endpoints.
+"""
+
+import logging
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.models.admin import ProfileRequest, ProfileInfo
+from app.services.profiler import profiler
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/admin/profiles")
+
+
+@router.post("", response_model=ProfileInfo, status_code=202)
+async def start_profile(body: ProfileRequest):
+    """
+    Start profiling this worker for ``seconds``.
+
+    Args:
+        body: Profile kind and window
+
+    Returns:
+        The running profile; poll it and download the result when done
+
+    Raises:
+        HTTPException: 409 if a profile is already running
+    """
+    try:
+        result = profiler.start(body.kind, body.seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return ProfileInfo(**result.describe())
+
+
+@router.get("", response_model=List[ProfileInfo])
+async def list_profiles():
+    """
+    List recent profiles on this worker, newest first.
+
+    Returns:
+        Profile status entries
+    """
+    return [ProfileInfo(**result.describe()) for result in reversed(profiler.results.values())]
+
+
+@router.get("/{profile_id}", response_model=ProfileInfo)
+async def get_profile(profile_id: str):
+    """
+    Get a profile's status.
+
+    Args:
+        profile_id: Profile id
+
+    Returns:
+        Profile status
+
+    Raises:
+        HTTPException: 404 if the profile is unknown on this worker
+    """
+    result = profiler.results.get(profile_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return ProfileInfo(**result.describe())
+
+
+@router.get("/{profile_id}/download")
+async def download_profile(profile_id: str):
+    """
+    Download a finished profile.
+
+    ``cpu`` and ``stalls`` results are collapsed stacks for flamegraph.pl or
+    speedscope, ``pstats`` loads with ``pstats.Stats(path)`` or snakeviz, and
+    ``memory`` is a plain-text allocation diff.
+
+    Args:
+        profile_id: Profile id
+
+    Returns:
+        The profile file
+
+    Raises:
+        HTTPException: 404 if unknown, 409 if still running or failed
+    """
+    result = profiler.results.get(profile_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if result.status != "done":
+        raise HTTPException(status_code=409, detail=f"Profile is {result.status}")
+    return Response(
+        content=result.data,
+        media_type=result.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{result.id}-{result.filename}"'}
+    )
@@ -4,49 +4,147 @@ Email-related API endpoints.
 
 import logging
 import base64
-from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Form, UploadFile, File
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from typing import Dict, Optional, List
+from fastapi import APIRouter, HTTPException, Form, UploadFile, File, Request, Depends
 
 from app.models.email import EmailRequest, EmailResponse, AIBodyRequest, AIBodyResponse
 from app.services.email_service import EmailService
 from app.services.ai_service import AIService
+from app.services.prompt_templates import PromptRegistry
+from app.services.event_store import event_store
+from app.services.attachment_optimizer import attachment_optimizer
+from app.services.attachment_scanner import attachment_scanner
+from app.services.html_pipeline import html_pipeline
+from app.services.uploads import upload_store
 from app.core.config import settings
-from app.core.exceptions import EmailServiceError, AIServiceError
+from app.core.security import limiter, require_quota
+from app.core.lifecycle import inflight
+from app.core.reload import settings_reloader
+from app.core.tracing import span, record_span
+from app.core.exceptions import (
+    EmailServiceError, AIServiceError, PromptError, RecipientSuppressedError, DomainThrottledError,
+    UploadError
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 # Service instances
 email_service = EmailService()
 ai_service = AIService()
 
 
+# Rebuilt on settings reload; requests already holding the old instance finish with it
+def _set_email_service(service: EmailService) -> None:
+    global email_service
+    email_service = service
+
+
+def _set_ai_service(service: AIService) -> None:
+    global ai_service
+    ai_service = service
+
+
+settings_reloader.register(
+    "email_service",
+    ("BREVO_API_KEY", "BREVO_FROM_EMAIL", "BREVO_FROM_NAME", "BREVO_API_URL"),
+    EmailService,
+    _set_email_service
+)
+settings_reloader.register(
+    "ai_service",
+    ("GEMINI_API_KEY", "GEMINI_MODEL", "GEMINI_TRANSPORT", "GEMINI_API_URL", "PROMPT_TEMPLATE_VERSION",
+     "PROMPT_TEMPLATES_FILE", "AI_MAX_INPUT_TOKENS", "AI_MAX_OUTPUT_TOKENS"),
+    lambda: AIService(prompts=PromptRegistry.from_settings()),
+    _set_ai_service
+)
+
+
+async def _prepare_attachment(filename: str, content_type: Optional[str], content: bytes) -> Dict[str, str]:
+    """
+    Validate, scan, optimize and base64-encode one attachment.
+
+    Args:
+        filename: Attachment filename
+        content_type: Declared MIME type
+        content: Raw file content
+
+    Returns:
+        Attachment dict for EmailService.send_email
+
+    Raises:
+        HTTPException: If the attachment is too large, of a disallowed type or rejected by the scanner
+    """
+    # Validate size
+    if len(content) > email_service.MAX_ATTACHMENT_SIZE:
+        logger.warning(f"File {filename} exceeds max size ({email_service.MAX_ATTACHMENT_SIZE} bytes)")
+        raise HTTPException(
+            status_code=413,
+            detail=f"File {filename} is too large. Max size: {email_service.MAX_ATTACHMENT_SIZE / 1024 / 1024:.0f} MB"
+        )
+    
+    # Validate MIME type
+    if content_type not in email_service.ALLOWED_MIME_TYPES:
+        logger.warning(f"File type {content_type} not allowed")
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type '{content_type}' is not allowed. Allowed types: {', '.join(email_service.ALLOWED_MIME_TYPES)}"
+        )
+    
+    # Check the content itself, not just the declared type
+    with span("attachment.scan", filename=filename, bytes=len(content)):
+        verdict = await attachment_scanner.scan(filename, content_type, content)
+    if not verdict.clean:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File {filename} was rejected: {verdict.reason}"
+        )
+    
+    # Shrink the attachment before it is encoded and uploaded
+    with span("attachment.optimize", filename=filename, bytes=len(content)):
+        filename, content_type, content = await attachment_optimizer.optimize(filename, content_type, content)
+    
+    # Base64 encode content
+    content_b64 = base64.b64encode(content).decode('utf-8')
+    logger.info(f"Base64 encoded {filename}, length: {len(content_b64)}")
+    
+    return {
+        'filename': filename,
+        'content_type': content_type or 'application/octet-stream',
+        'content': content_b64
+    }
+
+
 @router.post("/send-email", response_model=EmailResponse)
+@limiter.limit(lambda: settings.RATE_LIMIT_EMAIL)
 async def send_email(
+    request: Request,
     to: str = Form(...),
     subject: str = Form(...),
-    body_text: str = Form(...),
+    body_text: str = Form(default=""),
     body_html: Optional[str] = Form(default=None),
     cc: Optional[str] = Form(default=None),
     bcc: Optional[str] = Form(default=None),
-    files: List[UploadFile] = File(default=[])
+    files: List[UploadFile] = File(default=[]),
+    attachment_ids: Optional[str] = Form(default=None),
+    in_flight=Depends(inflight.track("send_email")),
+    tenant=Depends(require_quota("send"))
 ):
     """
     Send an email with HTML, CC, BCC, and attachments.
     
     Args:
+        request: Incoming request (used for rate limiting)
         to: Recipient email address
         subject: Email subject
-        body_text: Plain text email body
+        body_text: Plain text email body (generated from body_html when empty)
         body_html: Optional HTML email body
         cc: Optional comma-separated CC recipients
         bcc: Optional comma-separated BCC recipients
         files: Optional list of file attachments
+        attachment_ids: Optional comma-separated ids of finalized resumable uploads
+        in_flight: In-flight tracking (503 while the server is draining)
+        tenant: Authenticated tenant (None when API keys are disabled)
         
     Returns:
         Success response with message
@@ -54,10 +152,18 @@ async def send_email(
     Raises:
         HTTPException: If email sending fails
     """
+    # Multipart parsing, auth and quota checks all happen before the handler runs
+    record_span("request.parse", files=len(files))
+    # Keep the instance built from this request's settings snapshot even if a reload swaps it
+    service = email_service
+    
     try:
         logger.info(f"Sending email to {to} with subject: {subject}")
         logger.info(f"Received {len(files)} file(s)")
         
+        if not body_text.strip() and not (body_html and body_html.strip()):
+            raise HTTPException(status_code=400, detail="Either body_text or body_html is required")
+        
         for idx, f in enumerate(files):
             logger.info(f"File {idx}: filename={f.filename}, content_type={f.content_type}, size={f.size if hasattr(f, 'size') else 'unknown'}")
         
@@ -80,34 +186,11 @@ async def send_email(
                         logger.info(f"Processing attachment: {file.filename}, size: {file.size}, type: {file.content_type}")
                         
                         # Read file content
-                        content = await file.read()
+                        with span("attachment.read", filename=file.filename):
+                            content = await file.read()
                         logger.info(f"Read {len(content)} bytes from {file.filename}")
                         
-                        # Validate size
-                        if len(content) > email_service.MAX_ATTACHMENT_SIZE:
-                            logger.warning(f"File {file.filename} exceeds max size ({email_service.MAX_ATTACHMENT_SIZE} bytes)")
-                            raise HTTPException(
-                                status_code=413,
-                                detail=f"File {file.filename} is too large. Max size: {email_service.MAX_ATTACHMENT_SIZE / 1024 / 1024:.0f} MB"
-                            )
-                        
-                        # Validate MIME type
-                        if file.content_type not in email_service.ALLOWED_MIME_TYPES:
-                            logger.warning(f"File type {file.content_type} not allowed")
-                            raise HTTPException(
-                                status_code=400,
-                                detail=f"File type '{file.content_type}' is not allowed. Allowed types: {', '.join(email_service.ALLOWED_MIME_TYPES)}"
-                            )
-                        
-                        # Base64 encode content
-                        content_b64 = base64.b64encode(content).decode('utf-8')
-                        logger.info(f"Base64 encoded {file.filename}, length: {len(content_b64)}")
-                        
-                        attachments.append({
-                            'filename': file.filename,
-                            'content_type': file.content_type or 'application/octet-stream',
-                            'content': content_b64
-                        })
+                        attachments.append(await _prepare_attachment(file.filename, file.content_type, content))
                         logger.info(f"Added attachment: {file.filename}")
                         
                     except HTTPException:
@@ -119,6 +202,14 @@ async def send_email(
                             detail=f"Error processing file {file.filename}: {str(e)}"
                         )
         
+        # Attachments uploaded earlier through /uploads
+        upload_ids = [i.strip() for i in attachment_ids.split(',') if i.strip()] if attachment_ids else []
+        if upload_ids:
+            with span("attachment.read", uploads=len(upload_ids)):
+                uploaded = await upload_store.read(upload_ids, tenant.id if tenant else None)
+            for filename, content_type, content in uploaded:
+                attachments.append(await _prepare_attachment(filename, content_type, content))
+        
         logger.info(f"Total attachments processed: {len(attachments)}")
         
         # Log attachment details before sending
@@ -126,21 +217,58 @@ async def send_email(
             for i, att in enumerate(attachments):
                 logger.info(f"Attachment {i}: {att['filename']} ({att['content_type']}) - {len(att['content'])} chars base64")
         
+        # Sanitize, inline CSS and minify the HTML body; derive the text part if missing
+        if body_html and body_html.strip():
+            with span("html.process", bytes=len(body_html)):
+                body_html, generated_text = await html_pipeline.process(body_html)
+            if not body_text.strip():
+                body_text = generated_text
+        
         # Send email
-        result = await email_service.send_email(
-            to_email=to,
-            subject=subject,
-            body_text=body_text,
-            body_html=body_html,
-            cc_emails=cc_emails,
-            bcc_emails=bcc_emails,
-            attachments=attachments if attachments else None
-        )
+        with span("email.send"):
+            result = await service.send_email(
+                to_email=to,
+                subject=subject,
+                body_text=body_text,
+                body_html=body_html,
+                cc_emails=cc_emails,
+                bcc_emails=bcc_emails,
+                attachments=attachments if attachments else None
+            )
         
         logger.info(f"Email sent successfully to {to}")
         
-        return EmailResponse(message=result["message"])
+        if result.get("message_id"):
+            event_store.record_sent(result["message_id"], result["recipients"], tenant=tenant.id if tenant else None)
         
+        if upload_ids:
+            await upload_store.delete(upload_ids, tenant.id if tenant else None)
+        
+        return EmailResponse(
+            message=result["message"],
+            message_id=result.get("message_id"),
+            suppressed=result.get("suppressed", [])
+        )
+        
+    except RecipientSuppressedError as e:
+        logger.warning(f"Email not sent: {e.message}")
+        raise HTTPException(
+            status_code=422,
+            detail={"message": e.message, "suppressed": e.suppressed}
+        )
+    
+    except UploadError as e:
+        logger.warning(f"Uploaded attachment rejected: {e.message}")
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    
+    except DomainThrottledError as e:
+        logger.warning(f"Email not sent: {e.message}")
+        raise HTTPException(
+            status_code=429,
+            detail=e.message,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
     except EmailServiceError as e:
         logger.error(f"Email service error: {e.message}")
         raise HTTPException(status_code=502, detail=e.message)
@@ -155,14 +283,21 @@ async def send_email(
 
 
 @router.post("/generate-body", response_model=AIBodyResponse)
+@limiter.limit(lambda: settings.RATE_LIMIT_AI)
 async def generate_email_body(
-    request: AIBodyRequest
+    request: Request,
+    body: AIBodyRequest,
+    in_flight=Depends(inflight.track("generate_email_body")),
+    tenant=Depends(require_quota("ai"))
 ):
     """
     Generate email body using AI based on subject.
     
     Args:
-        request: AI body generation request
+        request: Incoming request (used for rate limiting)
+        body: AI body generation request
+        in_flight: In-flight tracking (503 while the server is draining)
+        tenant: Authenticated tenant (None when API keys are disabled)
         
     Returns:
         Generated email body
@@ -170,26 +305,39 @@ async def generate_email_body(
     Raises:
         HTTPException: If AI generation fails
     """
+    record_span("request.parse")
+    service = ai_service
+    
     try:
-        logger.info(f"Received request: {request}")
-        logger.info(f"Subject received: '{request.subject}'")
+        logger.info(f"Received request: {body}")
+        logger.info(f"Subject received: '{body.subject}'")
         
         # Validate subject
-        if not await ai_service.validate_subject(request.subject):
+        if not await service.validate_subject(body.subject):
             raise HTTPException(
                 status_code=400,
                 detail="Subject line is required and must be at least 2 characters long"
             )
         
-        logger.info(f"Generating email body for subject: {request.subject}")
+        logger.info(f"Generating email body for subject: {body.subject}")
         
         # Generate email body
-        generated_body = await ai_service.generate_email_body(request.subject)
+        generated_body = await service.generate_email_body(
+            body.subject,
+            tone=body.tone,
+            length=body.length,
+            language=body.language,
+            tenant_id=tenant.id if tenant else None
+        )
         
         logger.info("Email body generated successfully")
         
         return AIBodyResponse(body=generated_body)
         
+    except PromptError as e:
+        logger.warning(f"Rejected AI prompt: {e.message}")
+        raise HTTPException(status_code=400, detail=e.message)
+    
     except AIServiceError as e:
         logger.error(f"AI service error: {e.message}")
         raise HTTPException(status_code=503, detail=e.message)
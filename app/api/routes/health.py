@@ -3,10 +3,14 @@ Health check endpoints.
 """
 
 import logging
+from typing import Dict
+
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.core.lifecycle import inflight
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -18,6 +22,17 @@ class HealthResponse(BaseModel):
     status: str
     app_name: str
     version: str
+    draining: bool = False
+    in_flight: int = 0
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness check response model."""
+    
+    status: str
+    draining: bool
+    in_flight: int
+    in_flight_by_kind: Dict[str, int]
 
 
 @router.get("/", response_model=HealthResponse)
@@ -33,5 +48,27 @@ async def health_check():
     return HealthResponse(
         status="API is running",
         app_name=settings.APP_NAME,
-        version=settings.APP_VERSION
+        version=settings.APP_VERSION,
+        draining=inflight.draining,
+        in_flight=inflight.in_flight
+    )
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    """
+    Readiness check for load balancers and orchestrators.
+    
+    Returns:
+        In-flight count and drain state; 503 once the server is draining
+    """
+    stats = inflight.stats()
+    response = ReadinessResponse(
+        status="draining" if inflight.draining else "ready",
+        draining=stats["draining"],
+        in_flight=stats["in_flight"],
+        in_flight_by_kind=stats["in_flight_by_kind"]
     )
+    if inflight.draining:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
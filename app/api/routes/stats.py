@@ -0,0 +1,110 @@
+"""
+Operational statistics endpoints.
+"""
+
+import logging
+from typing import Dict, Any
+
+from fastapi import APIRouter
+
+from app.core.http import http_pool
+from app.core.reload import settings_reloader
+from app.services.attachment_optimizer import attachment_optimizer
+from app.services.attachment_scanner import attachment_scanner
+from app.services.html_pipeline import html_pipeline
+from app.services.domain_scheduler import domain_scheduler
+from app.services.semantic_cache import semantic_cache
+from app.services.uploads import upload_store
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/stats")
+
+
+@router.get("/attachments")
+async def attachment_stats() -> Dict[str, Any]:
+    """
+    Attachment optimization statistics.
+
+    Returns:
+        Bytes saved, processing time and cache hits per MIME type
+    """
+    return attachment_optimizer.stats()
+
+
+@router.get("/scanner")
+async def scanner_stats() -> Dict[str, Any]:
+    """
+    Attachment scanning statistics.
+
+    Returns:
+        Scan, rejection, timeout and cache counters
+    """
+    return attachment_scanner.stats()
+
+
+@router.get("/html")
+async def html_stats() -> Dict[str, Any]:
+    """
+    HTML body processing statistics.
+
+    Returns:
+        HTML pipeline cache counters
+    """
+    return html_pipeline.stats()
+
+
+@router.get("/domains")
+async def domain_stats() -> Dict[str, Any]:
+    """
+    Per-recipient-domain send statistics.
+
+    Returns:
+        Queue depth, in-flight sends and send rate per domain
+    """
+    return domain_scheduler.stats()
+
+
+@router.get("/ai-cache")
+async def ai_cache_stats() -> Dict[str, Any]:
+    """
+    Near-duplicate AI body cache statistics.
+
+    Returns:
+        Hit rate, lookup latency and entry count, or ``enabled: false``
+    """
+    if semantic_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **semantic_cache.stats()}
+
+
+@router.get("/http")
+async def http_stats() -> Dict[str, Any]:
+    """
+    Outbound HTTP client pool statistics.
+
+    Returns:
+        Open and idle connections, DNS cache counters and per-host usage
+    """
+    return http_pool.stats()
+
+
+@router.get("/uploads")
+async def upload_stats() -> Dict[str, Any]:
+    """
+    Resumable upload statistics for this worker.
+
+    Returns:
+        Active and finalized uploads, spooled bytes and expired uploads
+    """
+    return upload_store.stats()
+
+
+@router.get("/settings")
+async def settings_stats() -> Dict[str, Any]:
+    """
+    Settings reload statistics.
+
+    Returns:
+        Current settings version, reload counts and the keys changed by the last reload
+    """
+    return settings_reloader.stats()
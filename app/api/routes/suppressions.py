@@ -0,0 +1,93 @@
+"""
+Suppression list management endpoints.
+"""
+
+import csv
+import io
+import logging
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+
+from app.models.email import SuppressionRequest, SuppressionResponse, SuppressionStatus
+from app.services.suppression import suppression_list
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/suppressions/{email}", response_model=SuppressionStatus)
+async def check_suppression(email: str):
+    """
+    Check whether an address is suppressed.
+
+    Args:
+        email: Email address to check
+
+    Returns:
+        Suppression status of the address
+    """
+    return SuppressionStatus(email=email, suppressed=suppression_list.contains(email))
+
+
+@router.post("/suppressions", response_model=SuppressionResponse)
+async def add_suppressions(request: SuppressionRequest):
+    """
+    Add addresses to the suppression list.
+
+    Args:
+        request: Addresses and the reason they are suppressed
+
+    Returns:
+        Number of newly suppressed addresses
+    """
+    added = await suppression_list.add(request.emails, reason=request.reason)
+    return SuppressionResponse(changed=added, total=len(suppression_list))
+
+
+@router.delete("/suppressions/{email}", response_model=SuppressionResponse)
+async def remove_suppression(email: str):
+    """
+    Remove an address from the suppression list.
+
+    Args:
+        email: Email address to remove
+
+    Returns:
+        Number of removed addresses
+
+    Raises:
+        HTTPException: If the address is not suppressed
+    """
+    removed = await suppression_list.remove([email])
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"{email} is not suppressed")
+    return SuppressionResponse(changed=removed, total=len(suppression_list))
+
+
+@router.post("/suppressions/import", response_model=SuppressionResponse)
+async def import_suppressions(
+    file: UploadFile = File(...),
+    reason: str = Form(default="import")
+):
+    """
+    Bulk import suppressed addresses from a text or CSV file.
+
+    The first column of each row is taken as the address; rows without an
+    ``@`` (such as a header row) are ignored.
+
+    Args:
+        file: Text file with one address per line, or a CSV file
+        reason: Why the addresses are suppressed
+
+    Returns:
+        Number of newly suppressed addresses
+    """
+    content = (await file.read()).decode("utf-8", errors="replace")
+    emails = [
+        row[0] for row in csv.reader(io.StringIO(content))
+        if row and "@" in row[0]
+    ]
+
+    logger.info(f"Importing {len(emails)} suppressed address(es) from {file.filename}")
+    added = await suppression_list.add(emails, reason=reason)
+    return SuppressionResponse(changed=added, total=len(suppression_list))
@@ -0,0 +1,258 @@
+"""
+Resumable attachment upload endpoints (tus-style).
+
+Create an upload with ``POST /uploads``, send the bytes with one or more
+``PATCH /uploads/{id}`` requests carrying ``Upload-Offset``, check
+progress with ``HEAD /uploads/{id}`` after a dropped connection, then
+``POST /uploads/{id}/finalize`` and pass the id to ``/send-email`` in
+``attachment_ids``.
+"""
+
+import base64
+import binascii
+import logging
+from typing import Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response, Depends, Header
+from starlette.requests import ClientDisconnect
+
+from app.models.uploads import UploadInfo, FinalizeRequest
+from app.services.email_service import EmailService
+from app.services.uploads import upload_store
+from app.core.config import settings
+from app.core.security import limiter, require_api_key, get_rate_limit_key
+from app.core.lifecycle import inflight
+from app.core.exceptions import UploadError
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/uploads")
+
+TUS_VERSION = "1.0.0"
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+def _owner(tenant) -> Optional[str]:
+    return tenant.id if tenant is not None else None
+
+
+def _parse_metadata(header: str) -> Dict[str, str]:
+    """Parse a tus ``Upload-Metadata`` header (comma-separated ``key base64value`` pairs)."""
+    metadata = {}
+    for pair in header.split(","):
+        pair = pair.strip()
+        if not pair:
+            continue
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode("utf-8") if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail=f"Invalid Upload-Metadata value for '{key}'")
+    return metadata
+
+
+def _parse_checksum(header: Optional[str]) -> Optional[bytes]:
+    """Parse ``Upload-Checksum: sha256 <base64 digest>``."""
+    if not header:
+        return None
+    algorithm, _, value = header.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise HTTPException(status_code=400, detail="Only sha256 is supported for Upload-Checksum")
+    try:
+        return base64.b64decode(value, validate=True)
+    except binascii.Error:
+        raise HTTPException(status_code=400, detail="Invalid Upload-Checksum digest")
+
+
+def _upload_error(e: UploadError) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=e.message, headers={"Tus-Resumable": TUS_VERSION})
+
+
+@router.post("", response_model=UploadInfo, status_code=201)
+@limiter.limit(lambda: settings.RATE_LIMIT_UPLOAD)
+async def create_upload(
+    request: Request,
+    response: Response,
+    upload_length: int = Header(..., alias="Upload-Length"),
+    upload_metadata: str = Header(default="", alias="Upload-Metadata"),
+    tenant=Depends(require_api_key)
+):
+    """
+    Start a resumable upload.
+
+    Args:
+        request: Incoming request (used for rate limiting and the upload cap)
+        response: Response (Location and tus headers are set on it)
+        upload_length: Total file size in bytes
+        upload_metadata: tus metadata; ``filename`` is required, ``filetype`` is the MIME type
+        tenant: Authenticated tenant (None when API keys are disabled)
+
+    Returns:
+        The new upload
+
+    Raises:
+        HTTPException: If the metadata, type or size is rejected, 429 if the
+            client holds too many uploads, 507 if upload storage is full
+    """
+    metadata = _parse_metadata(upload_metadata)
+    filename = metadata.get("filename", "").strip()
+    content_type = metadata.get("filetype", "").strip() or "application/octet-stream"
+    if not filename:
+        raise HTTPException(status_code=400, detail="Upload-Metadata must include a filename")
+    if content_type not in EmailService.ALLOWED_MIME_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type '{content_type}' is not allowed. Allowed types: {', '.join(EmailService.ALLOWED_MIME_TYPES)}"
+        )
+
+    try:
+        upload = await upload_store.create(
+            filename, content_type, upload_length, _owner(tenant), client=get_rate_limit_key(request)
+        )
+    except UploadError as e:
+        raise _upload_error(e)
+
+    response.headers["Location"] = f"/uploads/{upload.id}"
+    response.headers["Upload-Offset"] = "0"
+    response.headers["Tus-Resumable"] = TUS_VERSION
+    return UploadInfo(**upload.describe())
+
+
+@router.patch("/{upload_id}", status_code=204)
+@limiter.limit(lambda: settings.RATE_LIMIT_UPLOAD)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    content_type: str = Header(default="", alias="Content-Type"),
+    upload_checksum: Optional[str] = Header(default=None, alias="Upload-Checksum"),
+    in_flight=Depends(inflight.track("upload_chunk")),
+    tenant=Depends(require_api_key)
+):
+    """
+    Append a chunk at ``Upload-Offset``.
+
+    The body is streamed straight to the spool file. If the connection
+    drops, the bytes that arrived are kept; ask ``HEAD`` for the offset
+    and resume from there.
+
+    Args:
+        upload_id: Upload id
+        request: Incoming request (body is the chunk; used for rate limiting)
+        upload_offset: Offset this chunk starts at
+        content_type: Must be application/offset+octet-stream
+        upload_checksum: Optional ``sha256 <base64 digest>`` of this chunk
+        in_flight: In-flight tracking (503 while the server is draining)
+        tenant: Authenticated tenant (None when API keys are disabled)
+
+    Returns:
+        204 with the new ``Upload-Offset``
+
+    Raises:
+        HTTPException: 409 offset mismatch, 413 past Upload-Length,
+            415 wrong content type, 460 checksum mismatch
+    """
+    if content_type.split(";")[0].strip().lower() != CHUNK_CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be {CHUNK_CONTENT_TYPE}")
+    checksum = _parse_checksum(upload_checksum)
+
+    try:
+        upload = await upload_store.append(
+            upload_id, _owner(tenant), upload_offset, request.stream(), checksum=checksum
+        )
+    except UploadError as e:
+        raise _upload_error(e)
+    except ClientDisconnect:
+        logger.info(f"Client disconnected during upload {upload_id} chunk at offset {upload_offset}")
+        raise HTTPException(status_code=400, detail="Client disconnected")
+
+    return Response(status_code=204, headers={
+        "Upload-Offset": str(upload.offset),
+        "Tus-Resumable": TUS_VERSION,
+    })
+
+
+@router.head("/{upload_id}")
+async def upload_offset(upload_id: str, tenant=Depends(require_api_key)):
+    """
+    Report how many bytes of an upload have been received.
+
+    Args:
+        upload_id: Upload id
+        tenant: Authenticated tenant (None when API keys are disabled)
+
+    Returns:
+        Empty response with ``Upload-Offset`` and ``Upload-Length``
+    """
+    try:
+        upload = upload_store.status(upload_id, _owner(tenant))
+    except UploadError as e:
+        raise _upload_error(e)
+    return Response(status_code=200, headers={
+        "Upload-Offset": str(upload.offset),
+        "Upload-Length": str(upload.length),
+        "Tus-Resumable": TUS_VERSION,
+        "Cache-Control": "no-store",
+    })
+
+
+@router.get("/{upload_id}", response_model=UploadInfo)
+async def get_upload(upload_id: str, tenant=Depends(require_api_key)):
+    """
+    Get an upload's status.
+
+    Args:
+        upload_id: Upload id
+        tenant: Authenticated tenant (None when API keys are disabled)
+
+    Returns:
+        Upload status
+    """
+    try:
+        upload = upload_store.status(upload_id, _owner(tenant))
+    except UploadError as e:
+        raise _upload_error(e)
+    return UploadInfo(**upload.describe())
+
+
+@router.post("/{upload_id}/finalize", response_model=UploadInfo)
+async def finalize_upload(
+    upload_id: str,
+    body: Optional[FinalizeRequest] = None,
+    tenant=Depends(require_api_key)
+):
+    """
+    Finalize a fully received upload so it can be attached to an email.
+
+    Args:
+        upload_id: Upload id
+        body: Optional expected SHA-256 of the whole file
+        tenant: Authenticated tenant (None when API keys are disabled)
+
+    Returns:
+        The finalized upload, including its SHA-256
+
+    Raises:
+        HTTPException: 409 if bytes are missing, 460 on digest mismatch
+    """
+    try:
+        upload = await upload_store.finalize(upload_id, _owner(tenant), sha256=body.sha256 if body else None)
+    except UploadError as e:
+        raise _upload_error(e)
+    return UploadInfo(**upload.describe())
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def delete_upload(upload_id: str, tenant=Depends(require_api_key)):
+    """
+    Abort an upload and delete its data.
+
+    Args:
+        upload_id: Upload id
+        tenant: Authenticated tenant (None when API keys are disabled)
+    """
+    try:
+        upload_store.status(upload_id, _owner(tenant))
+    except UploadError as e:
+        raise _upload_error(e)
+    await upload_store.delete([upload_id], _owner(tenant))
+    return Response(status_code=204, headers={"Tus-Resumable": TUS_VERSION})
@@ -0,0 +1,127 @@
+"""
+Delivery webhook and message status endpoints.
+"""
+
+import logging
+import secrets
+from typing import Optional, List
+
+from fastapi import APIRouter, HTTPException, Request, Query, Depends
+
+from app.models.events import WebhookAck, DeliveryEvent, MessageEventsResponse
+from app.services.event_store import event_store, normalize_message_id
+from app.services.suppression import suppression_list
+from app.core.config import settings
+from app.core.security import require_api_key
+from app.core.exceptions import EventStoreError
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Brevo events after which an address must not be mailed again
+SUPPRESSING_EVENTS = {"hard_bounce", "unsubscribed", "spam", "invalid_email", "blocked"}
+
+
+@router.post("/webhooks/brevo", response_model=WebhookAck)
+async def brevo_webhook(request: Request, token: Optional[str] = Query(default=None)):
+    """
+    Ingest Brevo transactional webhook events.
+
+    Accepts a single event object or a batch (JSON array). Events are only
+    queued in memory here; they are written to disk by the event store's
+    background flush.
+
+    Args:
+        request: Incoming request with the JSON payload
+        token: Shared secret; must match BREVO_WEBHOOK_TOKEN
+
+    Returns:
+        Number of accepted events
+
+    Raises:
+        HTTPException: 404 if no BREVO_WEBHOOK_TOKEN is configured, 401 if
+            the token is wrong, or if the payload is invalid or the buffer is full
+    """
+    # Events suppress addresses, so unauthenticated webhooks are never accepted
+    if not settings.BREVO_WEBHOOK_TOKEN:
+        logger.warning("Rejecting Brevo webhook: BREVO_WEBHOOK_TOKEN is not configured")
+        raise HTTPException(status_code=404, detail="Not found")
+    if not secrets.compare_digest(token or "", settings.BREVO_WEBHOOK_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook payload must be JSON")
+
+    events = payload if isinstance(payload, list) else [payload]
+    events = [event for event in events if isinstance(event, dict)]
+
+    try:
+        accepted = event_store.append(events)
+    except EventStoreError as e:
+        # Brevo retries on non-2xx responses, so shedding load here is safe
+        logger.warning(f"Rejecting webhook batch: {e.message}")
+        raise HTTPException(status_code=503, detail=e.message)
+
+    to_suppress = {}
+    for event in events:
+        if event.get("event") in SUPPRESSING_EVENTS and event.get("email"):
+            to_suppress.setdefault(event["event"], []).append(event["email"])
+    for reason, emails in to_suppress.items():
+        await suppression_list.add(emails, reason=reason)
+
+    return WebhookAck(accepted=accepted)
+
+
+@router.get("/messages/{message_id}", response_model=MessageEventsResponse)
+async def get_message(message_id: str, tenant=Depends(require_api_key)):
+    """
+    Get the delivery history of a sent message.
+
+    Args:
+        message_id: Message id returned by /send-email
+        tenant: Authenticated tenant (None when API keys are disabled)
+
+    Returns:
+        Latest status per recipient and all events for the message
+
+    Raises:
+        HTTPException: If no events are stored for the message, or it was
+            sent by another tenant
+    """
+    events = await event_store.get_message_events(message_id, tenant=tenant.id if tenant else None)
+    if not events:
+        raise HTTPException(status_code=404, detail="No events found for this message")
+
+    status = {}
+    for event in events:
+        if event["email"]:
+            status[event["email"]] = event["event"]
+
+    return MessageEventsResponse(
+        message_id=normalize_message_id(message_id),
+        status=status,
+        events=[DeliveryEvent(**event) for event in events]
+    )
+
+
+@router.get("/messages", response_model=List[DeliveryEvent])
+async def get_recipient_events(
+    recipient: str = Query(..., description="Recipient email address"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    tenant=Depends(require_api_key)
+):
+    """
+    Get the most recent delivery events for a recipient.
+
+    Args:
+        recipient: Recipient email address
+        limit: Maximum number of events to return
+        tenant: Authenticated tenant (None when API keys are disabled)
+
+    Returns:
+        Events for the recipient from messages the tenant sent, newest first
+    """
+    events = await event_store.get_recipient_events(recipient, limit=limit, tenant=tenant.id if tenant else None)
+    return [DeliveryEvent(**event) for event in events]
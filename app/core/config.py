@@ -1,49 +1,408 @@
 """
 Application configuration settings.
+
+Settings are read into snapshots that are never modified. ``settings``
+is a proxy that resolves attribute access to the snapshot pinned for the
+current request (see ``app.core.reload``), or to the latest snapshot
+outside a request, so a hot reload never changes values underneath a
+request in progress.
 """
 
 import os
-from typing import List
-from dotenv import load_dotenv
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from dotenv import dotenv_values, find_dotenv, load_dotenv
+
+from app.core.exceptions import ConfigurationError
+
+# Process environment before .env is applied; it takes precedence over the
+# file on every reload, as it does at startup
+_PROCESS_ENV = dict(os.environ)
+ENV_FILE = os.getenv("ENV_FILE") or find_dotenv() or ".env"
 
 # Load environment variables from .env file
-load_dotenv()
+load_dotenv(ENV_FILE)
+
+_TRUE = ("true", "1", "yes", "on")
+_FALSE = ("false", "0", "no", "off")
+
+# Validation rules applied to every snapshot
+_POSITIVE = (
+    "DEFAULT_DAILY_SEND_QUOTA", "DEFAULT_MONTHLY_SEND_QUOTA", "DEFAULT_DAILY_AI_QUOTA",
+    "DEFAULT_MONTHLY_AI_QUOTA", "QUOTA_FLUSH_INTERVAL", "ATTACHMENT_MAX_IMAGE_DIMENSION",
+    "ATTACHMENT_OPTIMIZATION_TIMEOUT", "ATTACHMENT_WORKERS", "ATTACHMENT_SCAN_TIMEOUT",
+    "ATTACHMENT_SCAN_WORKERS", "ATTACHMENT_MAX_ARCHIVE_MEMBERS", "ATTACHMENT_MAX_UNCOMPRESSED_BYTES",
+    "ATTACHMENT_MAX_COMPRESSION_RATIO", "DOMAIN_DEFAULT_RATE", "DOMAIN_DEFAULT_BURST",
+    "DOMAIN_DEFAULT_CONCURRENCY", "TRACE_EXPORT_INTERVAL", "UPLOAD_MAX_BYTES", "UPLOAD_EXPIRY",
+    "UPLOAD_MAX_ACTIVE", "UPLOAD_MAX_SPOOL_BYTES",
+    "PROFILE_MAX_SECONDS", "PROFILE_SAMPLE_INTERVAL_MS", "LOOP_STALL_THRESHOLD_MS",
+    "HTTP_MAX_CONNECTIONS", "HTTP_PER_HOST_LIMIT", "HTTP_CONNECT_TIMEOUT", "HTTP_TIMEOUT",
+    "AI_MAX_INPUT_TOKENS", "AI_MAX_OUTPUT_TOKENS", "AI_SEMANTIC_CACHE_SIZE",
+    "AI_SEMANTIC_CACHE_DIMENSIONS", "HTML_CACHE_MAX_ENTRIES", "EVENT_FLUSH_INTERVAL",
+    "EVENT_FLUSH_BATCH_SIZE", "EVENT_BUFFER_MAX", "PORT",
+)
+_NON_NEGATIVE = (
+    "ATTACHMENT_MIN_TEXT_BYTES", "ATTACHMENT_CACHE_MAX_BYTES", "ATTACHMENT_MAX_ARCHIVE_DEPTH",
+    "DOMAIN_MAX_WAIT", "DRAIN_TIMEOUT", "SLOW_REQUEST_THRESHOLD_MS", "HTTP_MAX_KEEPALIVE",
+    "HTTP_KEEPALIVE_EXPIRY", "HTTP_DNS_CACHE_TTL", "HTML_CACHE_MAX_BYTES", "SETTINGS_RELOAD_INTERVAL",
+)
+_FRACTIONS = ("TRACE_SAMPLE_RATE", "AI_SEMANTIC_CACHE_THRESHOLD")
+_CHOICES = {
+    "GEMINI_TRANSPORT": ("sdk", "rest"),
+    "TRACE_EXPORTER": ("", "file", "otlp"),
+}
+_RATE_LIMITS = ("RATE_LIMIT_EMAIL", "RATE_LIMIT_AI", "RATE_LIMIT_UPLOAD")
+
+
+def _raw(env: Mapping[str, str], name: str) -> Optional[str]:
+    value = env.get(name)
+    return value.strip() if value is not None and value.strip() else None
+
+
+# The typed readers record a bad value in ``errors`` and fall back to the
+# default, so Settings._validate reports every problem at once
+
+
+def _bool(env: Mapping[str, str], errors: List[str], name: str, default: bool) -> bool:
+    value = _raw(env, name)
+    if value is None:
+        return default
+    if value.lower() in _TRUE:
+        return True
+    if value.lower() in _FALSE:
+        return False
+    errors.append(f"{name} must be true or false, got {value!r}")
+    return default
+
+
+def _int(env: Mapping[str, str], errors: List[str], name: str, default: int) -> int:
+    value = _raw(env, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        errors.append(f"{name} must be an integer, got {value!r}")
+        return default
+
+
+def _float(env: Mapping[str, str], errors: List[str], name: str, default: float) -> float:
+    value = _raw(env, name)
+    if value is None:
+        return float(default)
+    try:
+        return float(value)
+    except ValueError:
+        errors.append(f"{name} must be a number, got {value!r}")
+        return float(default)
+
+
+def parse_domain_limits(spec: str, default_concurrency: int) -> Dict[str, Tuple[float, int, int]]:
+    """
+    Parse per-domain overrides of the form ``gmail.com=5:10:2,yahoo.com=2:4:1``
+    (rate per second : burst : concurrency).
+
+    Args:
+        spec: Override string from settings
+        default_concurrency: Concurrency for entries that leave it out
+
+    Returns:
+        Mapping of domain to (rate, burst, concurrency)
+
+    Raises:
+        ConfigurationError: If an entry is malformed or out of range
+    """
+    limits = {}
+    for item in spec.split(","):
+        entry = item.strip()
+        domain, sep, values = entry.partition("=")
+        if not sep:
+            continue
+        rate, burst, concurrency = (values.split(":") + ["", ""])[:3]
+        try:
+            parsed = (
+                float(rate),
+                int(burst or max(1, float(rate))),
+                int(concurrency or default_concurrency)
+            )
+        except ValueError:
+            raise ConfigurationError(
+                f"DOMAIN_LIMITS entry {entry!r} must be domain=rate[:burst[:concurrency]]"
+            )
+        if not domain.strip() or not parsed[0] > 0 or parsed[1] < 1 or parsed[2] < 1:
+            raise ConfigurationError(
+                f"DOMAIN_LIMITS entry {entry!r} needs a domain, a rate above 0 "
+                f"and a burst and concurrency of at least 1"
+            )
+        limits[domain.strip().lower()] = parsed
+    return limits
+
 
 class Settings:
     """Application settings."""
     
-    def __init__(self):
+    def __init__(self, env: Optional[Mapping[str, str]] = None):
+        """
+        Read and validate settings.
+        
+        Args:
+            env: Variables to read (defaults to the process environment)
+            
+        Raises:
+            ConfigurationError: If a value has the wrong type or is out of range
+        """
+        env = os.environ if env is None else env
+        # Values that could not be parsed, reported together with range errors
+        errors: List[str] = []
+        
         # Application
-        self.APP_NAME = os.getenv("APP_NAME", "Quick Mail Sender")
-        self.APP_VERSION = os.getenv("APP_VERSION", "1.0")
-        self.DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+        self.APP_NAME = env.get("APP_NAME", "Quick Mail Sender")
+        self.APP_VERSION = env.get("APP_VERSION", "1.0")
+        self.DEBUG = _bool(env, errors, "DEBUG", False)
+        # Bind address for `python main.py` (PORT is set by hosts such as Render)
+        self.HOST = env.get("HOST", "127.0.0.1")
+        self.PORT = _int(env, errors, "PORT", 8000)
         
         # API Keys
-        self.BREVO_API_KEY = os.getenv("BREVO_API_KEY", "")
-        self.BREVO_FROM_EMAIL = os.getenv("BREVO_FROM_EMAIL", "")
-        self.BREVO_FROM_NAME = os.getenv("BREVO_FROM_NAME", "Quick Mail Sender")
-        self.GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+        self.BREVO_API_KEY = env.get("BREVO_API_KEY", "")
+        self.BREVO_FROM_EMAIL = env.get("BREVO_FROM_EMAIL", "")
+        self.BREVO_FROM_NAME = env.get("BREVO_FROM_NAME", "Quick Mail Sender")
+        self.GEMINI_API_KEY = env.get("GEMINI_API_KEY", "")
+        # Options: 'gemini-2.5-flash', 'gemini-1.5-pro', 'gemini-1.5-flash', 'gemini-pro', 'gemini-1.0-pro'
+        self.GEMINI_MODEL = env.get("GEMINI_MODEL", "gemini-2.5-flash")
         
-        # CORS
-        allowed_origins_env = os.getenv("ALLOWED_ORIGINS", "")
+        # CORS (credentialed, so origins must be listed explicitly)
         self.ALLOWED_ORIGINS = [
-            "http://localhost:3000", 
-            "http://127.0.0.1:3000"
+            origin.strip()
+            for origin in env.get("ALLOWED_ORIGINS", "").split(",")
+            if origin.strip()
         ]
         
-        # Add production origins from environment variable
-        if allowed_origins_env:
-            self.ALLOWED_ORIGINS.extend(allowed_origins_env.split(","))
-        
-        # In production, allow all Vercel domains (more permissive for easier deployment)
-        if not self.DEBUG:
-            self.ALLOWED_ORIGINS.append("*")  # Allow all origins in production
-            # For more security, replace "*" with your specific Vercel domain:
-            # self.ALLOWED_ORIGINS.append("https://your-project.vercel.app")
+        # Local frontends are only allowed while debugging
+        if self.DEBUG:
+            self.ALLOWED_ORIGINS[:0] = ["http://localhost:3000", "http://127.0.0.1:3000"]
         
         # Rate Limiting
-        self.RATE_LIMIT_EMAIL = "15/minute"
-        self.RATE_LIMIT_AI = "10/minute"
+        self.RATE_LIMIT_EMAIL = env.get("RATE_LIMIT_EMAIL", "15/minute")
+        self.RATE_LIMIT_AI = env.get("RATE_LIMIT_AI", "10/minute")
+        # Upload creation and chunk requests each count
+        self.RATE_LIMIT_UPLOAD = env.get("RATE_LIMIT_UPLOAD", "120/minute")
+        # Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+        self.TRUST_PROXY_HEADERS = _bool(env, errors, "TRUST_PROXY_HEADERS", False)
+        
+        # API keys and quotas (authentication is off when no keys are configured)
+        self.API_KEYS_FILE = env.get("API_KEYS_FILE", "")
+        self.DEFAULT_DAILY_SEND_QUOTA = _int(env, errors, "DEFAULT_DAILY_SEND_QUOTA", 500)
+        self.DEFAULT_MONTHLY_SEND_QUOTA = _int(env, errors, "DEFAULT_MONTHLY_SEND_QUOTA", 10000)
+        self.DEFAULT_DAILY_AI_QUOTA = _int(env, errors, "DEFAULT_DAILY_AI_QUOTA", 200)
+        self.DEFAULT_MONTHLY_AI_QUOTA = _int(env, errors, "DEFAULT_MONTHLY_AI_QUOTA", 4000)
+        self.QUOTA_STORE_PATH = env.get("QUOTA_STORE_PATH", "data/quotas.db")
+        self.QUOTA_FLUSH_INTERVAL = _float(env, errors, "QUOTA_FLUSH_INTERVAL", 5.0)
+        
+        # Attachment optimization (image downscaling needs Pillow, PDF compression needs pypdf)
+        self.ATTACHMENT_OPTIMIZATION_ENABLED = _bool(env, errors, "ATTACHMENT_OPTIMIZATION_ENABLED", False)
+        self.ATTACHMENT_MAX_IMAGE_DIMENSION = _int(env, errors, "ATTACHMENT_MAX_IMAGE_DIMENSION", 2048)
+        self.ATTACHMENT_JPEG_QUALITY = _int(env, errors, "ATTACHMENT_JPEG_QUALITY", 85)
+        self.ATTACHMENT_MIN_TEXT_BYTES = _int(env, errors, "ATTACHMENT_MIN_TEXT_BYTES", 32768)
+        self.ATTACHMENT_OPTIMIZATION_TIMEOUT = _float(env, errors, "ATTACHMENT_OPTIMIZATION_TIMEOUT", 30)
+        self.ATTACHMENT_WORKERS = _int(env, errors, "ATTACHMENT_WORKERS", 2)
+        self.ATTACHMENT_CACHE_MAX_BYTES = _int(env, errors, "ATTACHMENT_CACHE_MAX_BYTES", 100 * 1024 * 1024)
+        
+        # Attachment scanning
+        self.ATTACHMENT_SCANNING_ENABLED = _bool(env, errors, "ATTACHMENT_SCANNING_ENABLED", True)
+        self.ATTACHMENT_SCANNERS = env.get("ATTACHMENT_SCANNERS", "magic,archive")
+        self.ATTACHMENT_SCAN_TIMEOUT = _float(env, errors, "ATTACHMENT_SCAN_TIMEOUT", 10)
+        self.ATTACHMENT_SCAN_WORKERS = _int(env, errors, "ATTACHMENT_SCAN_WORKERS", 2)
+        self.ATTACHMENT_MAX_ARCHIVE_MEMBERS = _int(env, errors, "ATTACHMENT_MAX_ARCHIVE_MEMBERS", 1000)
+        self.ATTACHMENT_MAX_UNCOMPRESSED_BYTES = _int(env, errors, "ATTACHMENT_MAX_UNCOMPRESSED_BYTES", 200 * 1024 * 1024)
+        self.ATTACHMENT_MAX_COMPRESSION_RATIO = _float(env, errors, "ATTACHMENT_MAX_COMPRESSION_RATIO", 100)
+        self.ATTACHMENT_MAX_ARCHIVE_DEPTH = _int(env, errors, "ATTACHMENT_MAX_ARCHIVE_DEPTH", 3)
+        # clamd socket path (/var/run/clamav/clamd.ctl) or host:port; empty disables clamd
+        self.CLAMD_ADDRESS = env.get("CLAMD_ADDRESS", "")
+        
+        # Per-recipient-domain throttling
+        self.DOMAIN_DEFAULT_RATE = _float(env, errors, "DOMAIN_DEFAULT_RATE", 10)
+        self.DOMAIN_DEFAULT_BURST = _int(env, errors, "DOMAIN_DEFAULT_BURST", 20)
+        self.DOMAIN_DEFAULT_CONCURRENCY = _int(env, errors, "DOMAIN_DEFAULT_CONCURRENCY", 4)
+        # Overrides as domain=rate:burst:concurrency, comma-separated
+        self.DOMAIN_LIMITS = env.get("DOMAIN_LIMITS", "")
+        self.DOMAIN_MAX_WAIT = _float(env, errors, "DOMAIN_MAX_WAIT", 30)
+        
+        # Graceful shutdown: seconds to let in-flight sends finish after SIGTERM
+        self.DRAIN_TIMEOUT = _float(env, errors, "DRAIN_TIMEOUT", 25)
+        
+        # Request tracing
+        self.TRACING_ENABLED = _bool(env, errors, "TRACING_ENABLED", True)
+        # Fraction of traces exported; slow requests are always logged and exported
+        self.TRACE_SAMPLE_RATE = _float(env, errors, "TRACE_SAMPLE_RATE", 0.1)
+        self.SLOW_REQUEST_THRESHOLD_MS = _float(env, errors, "SLOW_REQUEST_THRESHOLD_MS", 2000)
+        # "", "file" (OTLP/JSON lines) or "otlp" (OTLP/HTTP JSON collector)
+        self.TRACE_EXPORTER = env.get("TRACE_EXPORTER", "").lower()
+        self.TRACE_EXPORT_PATH = env.get("TRACE_EXPORT_PATH", "data/traces.jsonl")
+        self.TRACE_OTLP_ENDPOINT = env.get("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+        self.TRACE_EXPORT_INTERVAL = _float(env, errors, "TRACE_EXPORT_INTERVAL", 5.0)
+        
+        # Resumable attachment uploads
+        self.UPLOAD_SPOOL_DIR = env.get("UPLOAD_SPOOL_DIR", "data/uploads")
+        self.UPLOAD_MAX_BYTES = _int(env, errors, "UPLOAD_MAX_BYTES", 25 * 1024 * 1024)
+        # Seconds an upload may sit untouched before it is deleted
+        self.UPLOAD_EXPIRY = _float(env, errors, "UPLOAD_EXPIRY", 3600)
+        # Uploads one tenant (or IP when API keys are disabled) may hold at once
+        self.UPLOAD_MAX_ACTIVE = _int(env, errors, "UPLOAD_MAX_ACTIVE", 10)
+        # Total declared size of all uploads held by this worker
+        self.UPLOAD_MAX_SPOOL_BYTES = _int(env, errors, "UPLOAD_MAX_SPOOL_BYTES", 1024 * 1024 * 1024)
+        
+        # Admin profiling endpoints (off unless both are set)
+        self.PROFILING_ENABLED = _bool(env, errors, "PROFILING_ENABLED", False)
+        self.ADMIN_API_KEY = env.get("ADMIN_API_KEY", "")
+        self.PROFILE_MAX_SECONDS = _float(env, errors, "PROFILE_MAX_SECONDS", 120)
+        self.PROFILE_SAMPLE_INTERVAL_MS = _float(env, errors, "PROFILE_SAMPLE_INTERVAL_MS", 5)
+        self.LOOP_STALL_THRESHOLD_MS = _float(env, errors, "LOOP_STALL_THRESHOLD_MS", 100)
+        
+        # Shared outbound HTTP client (HTTP/2 needs the h2 package)
+        self.HTTP_MAX_CONNECTIONS = _int(env, errors, "HTTP_MAX_CONNECTIONS", 100)
+        self.HTTP_MAX_KEEPALIVE = _int(env, errors, "HTTP_MAX_KEEPALIVE", 20)
+        self.HTTP_KEEPALIVE_EXPIRY = _float(env, errors, "HTTP_KEEPALIVE_EXPIRY", 60)
+        self.HTTP_PER_HOST_LIMIT = _int(env, errors, "HTTP_PER_HOST_LIMIT", 50)
+        self.HTTP_CONNECT_TIMEOUT = _float(env, errors, "HTTP_CONNECT_TIMEOUT", 5)
+        self.HTTP_TIMEOUT = _float(env, errors, "HTTP_TIMEOUT", 60)
+        self.HTTP2_ENABLED = _bool(env, errors, "HTTP2_ENABLED", True)
+        self.HTTP_DNS_CACHE_TTL = _float(env, errors, "HTTP_DNS_CACHE_TTL", 300)
+        self.BREVO_API_URL = env.get("BREVO_API_URL", "https://api.brevo.com/v3")
+        # "sdk" (google-generativeai) or "rest" (shared HTTP client)
+        self.GEMINI_TRANSPORT = env.get("GEMINI_TRANSPORT", "sdk").lower()
+        self.GEMINI_API_URL = env.get("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta")
+        
+        # AI prompt templates and token budgets
+        self.PROMPT_TEMPLATE_VERSION = env.get("PROMPT_TEMPLATE_VERSION", "v2")
+        self.PROMPT_TEMPLATES_FILE = env.get("PROMPT_TEMPLATES_FILE", "")
+        self.AI_MAX_INPUT_TOKENS = _int(env, errors, "AI_MAX_INPUT_TOKENS", 512)
+        self.AI_MAX_OUTPUT_TOKENS = _int(env, errors, "AI_MAX_OUTPUT_TOKENS", 2048)
+        
+        # AI near-duplicate subject cache (requires numpy)
+        self.AI_SEMANTIC_CACHE_ENABLED = _bool(env, errors, "AI_SEMANTIC_CACHE_ENABLED", False)
+        self.AI_SEMANTIC_CACHE_SIZE = _int(env, errors, "AI_SEMANTIC_CACHE_SIZE", 10000)
+        self.AI_SEMANTIC_CACHE_THRESHOLD = _float(env, errors, "AI_SEMANTIC_CACHE_THRESHOLD", 0.9)
+        self.AI_SEMANTIC_CACHE_DIMENSIONS = _int(env, errors, "AI_SEMANTIC_CACHE_DIMENSIONS", 256)
+        
+        # HTML body processing
+        self.HTML_PIPELINE_ENABLED = _bool(env, errors, "HTML_PIPELINE_ENABLED", True)
+        self.HTML_INLINE_CSS = _bool(env, errors, "HTML_INLINE_CSS", True)
+        self.HTML_MINIFY = _bool(env, errors, "HTML_MINIFY", True)
+        self.HTML_CACHE_MAX_ENTRIES = _int(env, errors, "HTML_CACHE_MAX_ENTRIES", 1000)
+        self.HTML_CACHE_MAX_BYTES = _int(env, errors, "HTML_CACHE_MAX_BYTES", 50 * 1024 * 1024)
+        
+        # Delivery events (Brevo webhooks)
+        self.EVENT_STORE_PATH = env.get("EVENT_STORE_PATH", "data/events.db")
+        self.EVENT_FLUSH_INTERVAL = _float(env, errors, "EVENT_FLUSH_INTERVAL", 1.0)
+        self.EVENT_FLUSH_BATCH_SIZE = _int(env, errors, "EVENT_FLUSH_BATCH_SIZE", 5000)
+        self.EVENT_BUFFER_MAX = _int(env, errors, "EVENT_BUFFER_MAX", 100000)
+        self.BREVO_WEBHOOK_TOKEN = env.get("BREVO_WEBHOOK_TOKEN", "")
+        
+        # Suppression list
+        self.SUPPRESSION_LIST_PATH = env.get("SUPPRESSION_LIST_PATH", "data/suppressions.log")
+        
+        # Hot reload: seconds between checks of the .env file (0 disables; SIGHUP always reloads)
+        self.SETTINGS_RELOAD_INTERVAL = _float(env, errors, "SETTINGS_RELOAD_INTERVAL", 5.0)
+        
+        self._validate(errors)
+    
+    def _validate(self, errors: List[str]) -> None:
+        """
+        Check ranges, choices, rate-limit and DOMAIN_LIMITS syntax and CORS
+        origins, reporting every problem at once.
+        
+        Args:
+            errors: Parse errors already found while reading the values
+        """
+        from limits import parse_many
+        
+        for name in _POSITIVE:
+            if getattr(self, name) <= 0:
+                errors.append(f"{name} must be greater than 0")
+        for name in _NON_NEGATIVE:
+            if getattr(self, name) < 0:
+                errors.append(f"{name} must not be negative")
+        for name in _FRACTIONS:
+            if not 0 <= getattr(self, name) <= 1:
+                errors.append(f"{name} must be between 0 and 1")
+        for name, choices in _CHOICES.items():
+            if getattr(self, name) not in choices:
+                errors.append(f"{name} must be one of {list(choices)}")
+        for name in _RATE_LIMITS:
+            try:
+                parse_many(getattr(self, name))
+            except ValueError:
+                errors.append(f"{name} is not a valid rate limit (e.g. '15/minute')")
+        if "*" in self.ALLOWED_ORIGINS:
+            errors.append("ALLOWED_ORIGINS must list origins explicitly, not '*'")
+        elif not self.ALLOWED_ORIGINS:
+            errors.append("ALLOWED_ORIGINS must be set when DEBUG is off (e.g. 'https://your-project.vercel.app')")
+        if self.HTTP_MAX_KEEPALIVE > self.HTTP_MAX_CONNECTIONS:
+            errors.append("HTTP_MAX_KEEPALIVE must not exceed HTTP_MAX_CONNECTIONS")
+        if not 1 <= self.ATTACHMENT_JPEG_QUALITY <= 100:
+            errors.append("ATTACHMENT_JPEG_QUALITY must be between 1 and 100")
+        try:
+            parse_domain_limits(self.DOMAIN_LIMITS, self.DOMAIN_DEFAULT_CONCURRENCY)
+        except ConfigurationError as e:
+            errors.append(e.message)
+        if errors:
+            raise ConfigurationError(f"Invalid settings: {'; '.join(errors)}")
+
+
+def load_settings() -> Settings:
+    """
+    Build a fresh snapshot from the process environment and the current
+    contents of the .env file.
+    
+    Raises:
+        ConfigurationError: If the new values are invalid
+    """
+    file_values = {k: v for k, v in dotenv_values(ENV_FILE).items() if v is not None}
+    return Settings({**file_values, **_PROCESS_ENV})
+
+
+_pinned: ContextVar[Optional[Settings]] = ContextVar("pinned_settings", default=None)
+
+
+class SettingsProxy:
+    """
+    Stands in for the current ``Settings`` snapshot.
+    
+    Reads go to the snapshot pinned in the current context (each request
+    pins the snapshot that was current when it started), otherwise to the
+    latest one. ``swap`` replaces the latest snapshot in one assignment.
+    """
+    
+    def __init__(self, initial: Settings):
+        self._current = initial
+    
+    def __getattr__(self, name: str):
+        return getattr(_pinned.get() or self._current, name)
+    
+    def snapshot(self) -> Settings:
+        """Return the snapshot in effect for the current context."""
+        return _pinned.get() or self._current
+    
+    def latest(self) -> Settings:
+        """Return the latest snapshot, ignoring any pin."""
+        return self._current
+    
+    def swap(self, new: Settings) -> Settings:
+        """Make ``new`` the latest snapshot and return the previous one."""
+        old, self._current = self._current, new
+        return old
+    
+    @contextmanager
+    def pin(self, snapshot: Settings) -> Iterator[Settings]:
+        """Resolve settings to ``snapshot`` within this context."""
+        token = _pinned.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            _pinned.reset(token)
 
 
-settings = Settings()
+settings = SettingsProxy(Settings())
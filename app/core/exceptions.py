@@ -16,11 +16,45 @@ class EmailServiceError(QuickMailSenderError):
     pass
 
 
+class RecipientSuppressedError(EmailServiceError):
+    """Exception raised when the primary recipient is on the suppression list."""
+    
+    def __init__(self, message: str, suppressed: list):
+        self.suppressed = suppressed
+        super().__init__(message)
+
+
+class DomainThrottledError(EmailServiceError):
+    """Exception raised when a recipient domain's send backlog is too long."""
+    
+    def __init__(self, message: str, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
 class AIServiceError(QuickMailSenderError):
     """Exception raised when AI service fails."""
     pass
 
 
+class PromptError(AIServiceError):
+    """Exception raised when a prompt cannot be built or exceeds its token budget."""
+    pass
+
+
 class ConfigurationError(QuickMailSenderError):
     """Exception raised when configuration is invalid."""
     pass
+
+
+class EventStoreError(QuickMailSenderError):
+    """Exception raised when delivery events cannot be accepted or stored."""
+    pass
+
+
+class UploadError(QuickMailSenderError):
+    """Exception raised when a resumable upload request cannot be applied."""
+    
+    def __init__(self, message: str, status_code: int = 400):
+        self.status_code = status_code
+        super().__init__(message)
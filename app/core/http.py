@@ -0,0 +1,406 @@
+"""
+Shared async HTTP client for outbound calls to Brevo and Gemini.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, AsyncIterable, AsyncIterator, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+from app.core.config import settings
+from app.core.reload import settings_reloader
+from app.core.tracing import span, traceparent
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (optional, enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class CachingResolverBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that caches DNS lookups for ``ttl`` seconds.
+
+    httpx has no DNS cache of its own, so every new connection resolves
+    the host again. This backend resolves once, connects to the cached
+    addresses in order and drops the entry if none of them accept a
+    connection. TLS still uses the original hostname for SNI and
+    certificate checks because httpcore passes it to ``start_tls``
+    separately.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._backend = httpcore.AnyIOBackend()
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = await self.resolve(host, port)
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self._cache.pop((host, port), None)
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors and the httpx errors callers catch
+_ERRORS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextmanager
+def _httpx_errors(request: httpx.Request) -> Iterator[None]:
+    try:
+        yield
+    except Exception as e:
+        for core_error, httpx_error in _ERRORS:
+            if isinstance(e, core_error):
+                raise httpx_error(str(e), request=request) from e
+        raise
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: AsyncIterable[bytes], request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors(self._request):
+            async for chunk in self._stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            with _httpx_errors(self._request):
+                await self._stream.aclose()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over an ``httpcore.AsyncConnectionPool`` built here.
+
+    ``httpx.AsyncHTTPTransport`` does not accept a network backend, so this
+    transport owns the pool instead, which lets it resolve through the DNS
+    cache. It also remembers which origins it has connected to so pool
+    statistics can be grouped by host.
+    """
+
+    def __init__(self, pool: httpcore.AsyncConnectionPool):
+        self.pool = pool
+        self.origins: Dict[Tuple[bytes, bytes, int], Tuple[httpcore.Origin, str]] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = httpcore.URL(
+            scheme=request.url.raw_scheme,
+            host=request.url.raw_host,
+            port=request.url.port,
+            target=request.url.raw_path,
+        )
+        origin = url.origin
+        self.origins.setdefault((origin.scheme, origin.host, origin.port), (origin, request.url.host))
+        core_request = httpcore.Request(
+            method=request.method,
+            url=url,
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors(request):
+            response = await self.pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    def host_of(self, connection: httpcore.AsyncConnectionInterface) -> Optional[str]:
+        """Return the host a pooled connection belongs to."""
+        for origin, host in self.origins.values():
+            if connection.can_handle_request(origin):
+                return host
+        return None
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+
+class HostStats:
+    """Per-host request counters and concurrency limit."""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+
+class PoolConfig(NamedTuple):
+    """Client settings that take effect when the client is (re)created."""
+
+    http2: bool
+    limits: httpx.Limits
+    timeout: httpx.Timeout
+    per_host_limit: int
+    dns_ttl: float
+
+
+class HttpClientPool:
+    """
+    One ``httpx.AsyncClient`` shared by every outbound integration.
+
+    Connections are kept alive and reused across requests, HTTP/2 is
+    negotiated when the optional ``h2`` package is installed, DNS answers
+    are cached, and each host gets its own concurrency cap on top of the
+    global connection limit.
+    """
+
+    SETTINGS = (
+        "HTTP2_ENABLED", "HTTP_MAX_CONNECTIONS", "HTTP_MAX_KEEPALIVE", "HTTP_KEEPALIVE_EXPIRY",
+        "HTTP_TIMEOUT", "HTTP_CONNECT_TIMEOUT", "HTTP_PER_HOST_LIMIT", "HTTP_DNS_CACHE_TTL",
+    )
+
+    def __init__(self):
+        """Initialize the pool from settings; the client is created on first use."""
+        config = self.load_config()
+        self.http2, self.limits, self.timeout, self.per_host_limit, _ = config
+        self.resolver = CachingResolverBackend(config.dns_ttl)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[PooledTransport] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._hosts: Dict[str, HostStats] = {}
+        self._retiring: set = set()
+
+    @staticmethod
+    def load_config() -> PoolConfig:
+        """Read the client configuration from the current settings."""
+        if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+            logger.warning("HTTP2_ENABLED is set but h2 is not installed; using HTTP/1.1")
+        return PoolConfig(
+            http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            per_host_limit=settings.HTTP_PER_HOST_LIMIT,
+            dns_ttl=settings.HTTP_DNS_CACHE_TTL
+        )
+
+    def reconfigure(self, config: PoolConfig) -> None:
+        """
+        Apply a new configuration. The next request gets a fresh client;
+        requests still running on the old one finish on it, and it is
+        closed once they have had their full timeout.
+        """
+        grace = self.timeout.read or 60.0
+        self.http2, self.limits, self.timeout, self.per_host_limit, _ = config
+        self.resolver.ttl = config.dns_ttl
+        if self._client is not None:
+            task = asyncio.create_task(self._close_later(self._client, grace))
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+        self._client = None
+        self._transport = None
+        self._loop = None
+        self._hosts = {}
+        logger.info(
+            f"HTTP client reconfigured: max_connections={self.limits.max_connections}, "
+            f"per_host_limit={self.per_host_limit}, http2={self.http2}"
+        )
+
+    @staticmethod
+    async def _close_later(client: httpx.AsyncClient, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            await client.aclose()
+
+    def _build_transport(self) -> PooledTransport:
+        return PooledTransport(httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=self.limits.max_connections,
+            max_keepalive_connections=self.limits.max_keepalive_connections,
+            keepalive_expiry=self.limits.keepalive_expiry,
+            http1=True,
+            http2=self.http2,
+            retries=1,
+            network_backend=self.resolver
+        ))
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Connections cannot be shared between event loops
+            self._transport = self._build_transport()
+            self._client = httpx.AsyncClient(transport=self._transport, timeout=self.timeout)
+            self._loop = loop
+            self._hosts = {}
+        return self._client
+
+    def _host(self, host: str) -> HostStats:
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = HostStats(self.per_host_limit)
+        return stats
+
+    @asynccontextmanager
+    async def _slot(self, host: str) -> AsyncIterator[HostStats]:
+        stats = self._host(host)
+        stats.waiting += 1
+        try:
+            await stats.semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield stats
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.requests += 1
+            stats.total_seconds += time.perf_counter() - started
+            stats.semaphore.release()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared client.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: Passed to ``httpx.AsyncClient.request``
+
+        Returns:
+            The response (already read)
+
+        Raises:
+            httpx.HTTPError: On transport errors
+        """
+        client = self.client
+        host = urlsplit(url).hostname or ""
+        with span("http.request", method=method, host=host) as current:
+            parent = traceparent()
+            if parent:
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), "traceparent": parent}
+            async with self._slot(host):
+                response = await client.request(method, url, **kwargs)
+            if current is not None:
+                current.attributes["http.status_code"] = response.status_code
+            return response
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        for task in list(self._retiring):
+            task.cancel()
+        await asyncio.gather(*self._retiring, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._transport = None
+            self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return connection pool utilization and per-host request counters."""
+        connections: Dict[str, Dict[str, int]] = {}
+        if self._client is not None:
+            for connection in self._transport.pool.connections:
+                host = self._transport.host_of(connection)
+                if host is None:
+                    continue
+                entry = connections.setdefault(host, {"open": 0, "idle": 0, "http2": 0})
+                entry["open"] += 1
+                entry["idle"] += connection.is_idle()
+                entry["http2"] += "HTTP/2" in connection.info()
+
+        hosts = {}
+        for host, stats in sorted(self._hosts.items()):
+            hosts[host] = {
+                "in_flight": stats.in_flight,
+                "waiting": stats.waiting,
+                "limit": stats.limit,
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "avg_ms": round(stats.total_seconds / stats.requests * 1000, 2) if stats.requests else 0.0,
+                "connections": connections.get(host, {"open": 0, "idle": 0, "http2": 0}),
+            }
+
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "open_connections": sum(c["open"] for c in connections.values()),
+            "idle_connections": sum(c["idle"] for c in connections.values()),
+            "dns_cache": {"hits": self.resolver.hits, "misses": self.resolver.misses},
+            "hosts": hosts,
+        }
+
+
+http_pool = HttpClientPool()
+settings_reloader.register("http_pool", HttpClientPool.SETTINGS, HttpClientPool.load_config, http_pool.reconfigure)
@@ -0,0 +1,137 @@
+"""
+In-flight request tracking and graceful drain on shutdown.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from collections import defaultdict
+from typing import Dict, Any, AsyncIterator, Callable
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InFlightRegistry:
+    """
+    Counts in-flight operations by kind and waits for them on shutdown.
+
+    Once draining starts (SIGTERM or lifespan shutdown) new tracked
+    operations are refused with 503 and ``Retry-After`` so clients retry
+    against the next instance, while operations already running are given
+    until the drain deadline to finish.
+    """
+
+    def __init__(self, drain_timeout: float):
+        """
+        Args:
+            drain_timeout: Seconds to wait for in-flight operations on shutdown
+        """
+        self.drain_timeout = drain_timeout
+        self.draining = False
+        self.drain_started: float = 0.0
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._completed: Dict[str, int] = defaultdict(int)
+        self._rejected = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._counts.values())
+
+    def start_draining(self, reason: str) -> None:
+        """Stop accepting new tracked operations."""
+        if not self.draining:
+            self.draining = True
+            self.drain_started = time.monotonic()
+            logger.info(f"Draining ({reason}); {self.in_flight} operation(s) in flight")
+
+    def track(self, kind: str) -> Callable[[], AsyncIterator[None]]:
+        """
+        Build a FastAPI dependency that tracks a request for its whole
+        lifetime and refuses it while draining.
+
+        Args:
+            kind: Operation name used in stats (e.g. "send_email")
+
+        Returns:
+            Dependency function
+        """
+        async def dependency() -> AsyncIterator[None]:
+            if self.draining:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is shutting down, retry shortly",
+                    headers={"Retry-After": str(max(1, int(self.drain_timeout)))}
+                )
+            self._counts[kind] += 1
+            self._idle.clear()
+            try:
+                yield
+            finally:
+                self._counts[kind] -= 1
+                self._completed[kind] += 1
+                if not self.in_flight:
+                    self._idle.set()
+
+        return dependency
+
+    async def drain(self) -> bool:
+        """
+        Wait for in-flight operations to finish, up to the drain deadline
+        measured from when draining started.
+
+        Returns:
+            True if everything finished, False if the deadline passed
+        """
+        self.start_draining("shutdown")
+        remaining = self.drain_timeout - (time.monotonic() - self.drain_started)
+        if self.in_flight:
+            logger.info(f"Waiting up to {max(0.0, remaining):.1f}s for {self.in_flight} in-flight operation(s)")
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=max(0.0, remaining))
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Drain deadline passed with {dict(self._counts)} still in flight")
+            return False
+
+    def install_signal_handler(self) -> None:
+        """
+        Start draining on SIGTERM, then hand the signal to the previous
+        handler (uvicorn's) so the normal shutdown proceeds.
+        """
+        try:
+            previous = signal.getsignal(signal.SIGTERM)
+
+            def handle_sigterm(signum, frame):
+                self.start_draining("SIGTERM")
+                if callable(previous):
+                    previous(signum, frame)
+                elif previous == signal.SIG_DFL:
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    signal.raise_signal(signal.SIGTERM)
+
+            signal.signal(signal.SIGTERM, handle_sigterm)
+        except ValueError:
+            # Not in the main thread (e.g. under a test client)
+            logger.debug("SIGTERM handler not installed outside the main thread")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-flight counts and drain state."""
+        return {
+            "draining": self.draining,
+            "in_flight": self.in_flight,
+            "in_flight_by_kind": {kind: count for kind, count in self._counts.items() if count},
+            "completed": dict(self._completed),
+            "rejected_while_draining": self._rejected,
+            "drain_timeout": self.drain_timeout,
+        }
+
+
+inflight = InFlightRegistry(settings.DRAIN_TIMEOUT)
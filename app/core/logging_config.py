@@ -6,17 +6,19 @@ import logging
 import sys
 from typing import Dict, Any
 
+from app.core.tracing import RequestIdFilter
+
 
 def setup_logging() -> None:
     """Setup structured logging for the application."""
     
-    # Configure root logger
+    # Configure root logger; every line carries the request id (or "-")
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(RequestIdFilter())
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
+        format="%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s",
+        handlers=[handler]
     )
     
     # Configure specific loggers
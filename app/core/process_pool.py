@@ -0,0 +1,88 @@
+"""
+Bounded process pool for CPU-heavy work that must not block the event loop.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _start_context():
+    """
+    Start workers from a fork server (or by spawning where that is not
+    available, e.g. Windows) rather than by forking the server process,
+    whose threads may hold locks that a forked child would inherit locked.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+class ProcessPool:
+    """
+    Lazily started process pool with per-task timeouts.
+
+    Worker processes are only spawned on first use. A worker cannot be
+    interrupted once it runs a task, so when a task times out the whole
+    pool is replaced and its processes are terminated; otherwise a stuck
+    task would hold a slot forever.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        Args:
+            name: Pool name used in logs
+            max_workers: Maximum number of worker processes
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_start_context())
+            logger.info(f"Started {self.name} process pool with {self.max_workers} worker(s)")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a picklable function in a worker process.
+
+        Args:
+            fn: Module-level function to run
+            *args: Picklable arguments
+            timeout: Seconds to wait before giving up on the task
+
+        Returns:
+            The function's return value
+
+        Raises:
+            asyncio.TimeoutError: If the task did not finish in time
+        """
+        executor = self._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} task {fn.__name__} timed out after {timeout}s, recycling pool")
+            self._recycle(executor)
+            raise
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Replace the pool and kill the workers of the old one."""
+        if self._executor is executor:
+            self._executor = None
+        # ProcessPoolExecutor has no public way to kill a busy worker
+        processes = list(getattr(executor, "_processes", {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
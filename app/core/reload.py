@@ -0,0 +1,242 @@
+"""
+Hot reload of settings on SIGHUP or when the .env file changes.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Dict, Any, Callable, FrozenSet, Iterable, List, Optional, Tuple
+
+from fastapi.middleware.cors import CORSMiddleware
+
+from app.core.config import ENV_FILE, Settings, load_settings, settings
+from app.core.exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+# Settings that are read on every use, so a reload applies to them without
+# any component being rebuilt
+LIVE_SETTINGS = frozenset({
+    "ALLOWED_ORIGINS", "RATE_LIMIT_EMAIL", "RATE_LIMIT_AI", "RATE_LIMIT_UPLOAD", "TRUST_PROXY_HEADERS",
+    "ADMIN_API_KEY", "BREVO_WEBHOOK_TOKEN", "APP_NAME", "APP_VERSION",
+})
+
+
+class ReloadHook:
+    """Rebuilds one component when any of its settings change."""
+
+    def __init__(self, name: str, keys: Iterable[str], rebuild: Callable[[], Any], apply: Callable[[Any], None]):
+        self.name = name
+        self.keys: FrozenSet[str] = frozenset(keys)
+        self.rebuild = rebuild
+        self.apply = apply
+
+
+class SettingsReloader:
+    """
+    Reloads settings and swaps in the components built from them.
+
+    A reload builds a new snapshot from the environment and the .env file,
+    validates it, then rebuilds every registered component whose settings
+    changed while the new snapshot is pinned. Only when all of that
+    succeeds are the snapshot and the components swapped in, in one step
+    with no await in between; otherwise the old snapshot stays in effect.
+    Requests already in progress keep the snapshot they started with.
+    """
+
+    def __init__(self):
+        """Initialize the reloader from settings."""
+        self.env_file = ENV_FILE
+        self.interval = settings.SETTINGS_RELOAD_INTERVAL
+        self._hooks: List[ReloadHook] = []
+        self._lock = asyncio.Lock()
+        self._mtime = self._stat()
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set = set()
+        self.version = 1
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_changed: List[str] = []
+
+    def register(
+        self,
+        name: str,
+        keys: Iterable[str],
+        rebuild: Callable[[], Any],
+        apply: Callable[[Any], None]
+    ) -> None:
+        """
+        Rebuild a component when any of ``keys`` change.
+
+        Args:
+            name: Component name used in logs
+            keys: Settings the component is built from
+            rebuild: Builds the replacement; runs with the new snapshot
+                pinned and may raise to reject the reload
+            apply: Swaps the replacement in; must not fail
+        """
+        self._hooks.append(ReloadHook(name, keys, rebuild, apply))
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.env_file).st_mtime_ns
+        except OSError:
+            return None
+
+    async def reload(self, reason: str) -> bool:
+        """
+        Reload settings and rebuild affected components.
+
+        Args:
+            reason: What triggered the reload, for logs
+
+        Returns:
+            True if the new settings are in effect (or nothing changed),
+            False if they were rejected and the old ones kept
+        """
+        async with self._lock:
+            self._mtime = self._stat()
+            try:
+                new = await asyncio.to_thread(load_settings)
+                old = settings.latest()
+                changed = sorted(k for k, v in vars(new).items() if getattr(old, k, None) != v)
+                if not changed:
+                    logger.info(f"Settings reload ({reason}): no changes")
+                    return True
+
+                hooks = [hook for hook in self._hooks if hook.keys.intersection(changed)]
+                built: List[Tuple[ReloadHook, Any]] = []
+                with settings.pin(new):
+                    for hook in hooks:
+                        built.append((hook, hook.rebuild()))
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e) if isinstance(e, ConfigurationError) else repr(e)
+                logger.error(f"Settings reload ({reason}) rejected, keeping current settings: {self.last_error}")
+                return False
+
+            # Swap everything in without yielding to the event loop
+            settings.swap(new)
+            for hook, component in built:
+                hook.apply(component)
+
+            self.version += 1
+            self.reloads += 1
+            self.last_reload = time.time()
+            self.last_error = None
+            self.last_changed = changed
+            covered = LIVE_SETTINGS.union(*(hook.keys for hook in self._hooks))
+            logger.info(
+                f"Settings reloaded ({reason}), version {self.version}: changed {changed}, "
+                f"rebuilt {[hook.name for hook in hooks]}"
+            )
+            restart = [k for k in changed if k not in covered]
+            if restart:
+                logger.warning(f"These settings take effect after a restart: {restart}")
+            return True
+
+    def _schedule(self, reason: str) -> None:
+        task = asyncio.create_task(self.reload(reason))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._stat() != self._mtime:
+                await self.reload(f"{self.env_file} changed")
+
+    def install_signal_handler(self) -> None:
+        """Reload on SIGHUP (not available on Windows)."""
+        if not hasattr(signal, "SIGHUP"):
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            signal.signal(signal.SIGHUP, lambda signum, frame: loop.call_soon_threadsafe(self._schedule, "SIGHUP"))
+        except ValueError:
+            # Not in the main thread (e.g. under a test client)
+            logger.debug("SIGHUP handler not installed outside the main thread")
+
+    async def start(self) -> None:
+        """Install the SIGHUP handler and start watching the .env file."""
+        self.install_signal_handler()
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch_loop())
+            logger.info(f"Watching {self.env_file} for settings changes every {self.interval:g}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the settings version and reload history (names only, never values)."""
+        return {
+            "version": self.version,
+            "env_file": self.env_file,
+            "watching": self._task is not None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_reload": self.last_reload,
+            "last_changed": self.last_changed,
+            "last_error": self.last_error,
+        }
+
+
+settings_reloader = SettingsReloader()
+
+
+class SettingsSnapshotMiddleware:
+    """
+    ASGI middleware that pins the current settings snapshot for the whole
+    request, so a reload mid-request does not change the values it sees.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        with settings.pin(settings.snapshot()):
+            await self.app(scope, receive, send)
+
+
+class ReloadableCORSMiddleware:
+    """
+    CORS middleware whose allowed origins follow ``ALLOWED_ORIGINS`` in
+    the request's settings snapshot.
+
+    Starlette's ``CORSMiddleware`` fixes its origins when it is created,
+    so one is built per distinct origin list and reused.
+    """
+
+    MAX_VARIANTS = 4
+
+    def __init__(self, app, **options):
+        self.app = app
+        self.options = options
+        self._variants: Dict[Tuple[str, ...], CORSMiddleware] = {}
+
+    def _for(self, snapshot: Settings) -> CORSMiddleware:
+        origins = tuple(snapshot.ALLOWED_ORIGINS)
+        middleware = self._variants.get(origins)
+        if middleware is None:
+            if len(self._variants) >= self.MAX_VARIANTS:
+                self._variants.clear()
+            middleware = self._variants[origins] = CORSMiddleware(
+                self.app, allow_origins=list(origins), **self.options
+            )
+        return middleware
+
+    async def __call__(self, scope, receive, send):
+        await self._for(settings.snapshot())(scope, receive, send)
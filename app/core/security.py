@@ -0,0 +1,246 @@
+"""
+API key authentication, per-tenant quotas and rate-limit keys.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, Any, AsyncIterator, Optional, List
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from app.core.config import settings
+from app.core.exceptions import ConfigurationError
+from app.services.quota import quota_store, seconds_until_reset
+
+logger = logging.getLogger(__name__)
+
+API_KEY_HEADER = "X-API-Key"
+ADMIN_KEY_HEADER = "X-Admin-Key"
+
+
+class Tenant:
+    """An API consumer and its quotas (0 means unlimited)."""
+
+    def __init__(
+        self,
+        tenant_id: str,
+        daily_send: int = 0,
+        monthly_send: int = 0,
+        daily_ai: int = 0,
+        monthly_ai: int = 0
+    ):
+        self.id = tenant_id
+        self.quotas = {
+            "send": (daily_send, monthly_send),
+            "ai": (daily_ai, monthly_ai),
+        }
+
+    def __repr__(self) -> str:
+        return f"Tenant({self.id!r})"
+
+
+@lru_cache(maxsize=4096)
+def hash_api_key(api_key: str) -> str:
+    """
+    Hash an API key for lookup. Results are cached so a returning client
+    costs one dict hit instead of a SHA-256 per request.
+
+    Args:
+        api_key: Raw API key
+
+    Returns:
+        Hex SHA-256 digest of the key
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+class TenantRegistry:
+    """API keys (stored as SHA-256 hashes) mapped to tenants."""
+
+    def __init__(self, entries: Optional[List[Dict[str, Any]]] = None):
+        """
+        Build the registry from key entries.
+
+        Each entry has ``tenant`` and either ``key_sha256`` or ``key``, plus
+        optional ``daily_send``, ``monthly_send``, ``daily_ai`` and
+        ``monthly_ai`` quotas that default to the configured values.
+
+        Args:
+            entries: Key entries, usually loaded from API_KEYS_FILE
+
+        Raises:
+            ConfigurationError: If an entry is missing required fields
+        """
+        self._tenants: Dict[str, Tenant] = {}
+        for entry in entries or []:
+            if "tenant" not in entry or not (entry.get("key_sha256") or entry.get("key")):
+                raise ConfigurationError(f"Invalid API key entry: {sorted(entry)}")
+
+            key_hash = entry.get("key_sha256") or hash_api_key(entry["key"])
+            self._tenants[key_hash.lower()] = Tenant(
+                entry["tenant"],
+                daily_send=entry.get("daily_send", settings.DEFAULT_DAILY_SEND_QUOTA),
+                monthly_send=entry.get("monthly_send", settings.DEFAULT_MONTHLY_SEND_QUOTA),
+                daily_ai=entry.get("daily_ai", settings.DEFAULT_DAILY_AI_QUOTA),
+                monthly_ai=entry.get("monthly_ai", settings.DEFAULT_MONTHLY_AI_QUOTA),
+            )
+
+    @classmethod
+    def from_file(cls, path: str) -> "TenantRegistry":
+        """Load the registry from a JSON file containing a list of key entries."""
+        if not path:
+            return cls()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ConfigurationError(f"Could not load API keys from {path}: {e}")
+
+        registry = cls(entries)
+        logger.info(f"Loaded {len(registry)} API key(s) from {path}")
+        return registry
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    @property
+    def enabled(self) -> bool:
+        """Authentication is enforced only when at least one key is configured."""
+        return bool(self._tenants)
+
+    def lookup(self, api_key: Optional[str]) -> Optional[Tenant]:
+        """Get the tenant for a raw API key, or None if it is unknown."""
+        if not api_key:
+            return None
+        return self._tenants.get(hash_api_key(api_key))
+
+
+tenant_registry = TenantRegistry.from_file(settings.API_KEYS_FILE)
+
+
+def get_client_ip(request: Request) -> str:
+    """Get the client IP, honouring X-Forwarded-For when behind a trusted proxy."""
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return get_remote_address(request)
+
+
+def get_rate_limit_key(request: Request) -> str:
+    """Rate-limit key: the tenant for authenticated requests, else the client IP."""
+    tenant = tenant_registry.lookup(request.headers.get(API_KEY_HEADER))
+    if tenant is not None:
+        return f"tenant:{tenant.id}"
+    return f"ip:{get_client_ip(request)}"
+
+
+# Shared rate limiter
+limiter = Limiter(key_func=get_rate_limit_key)
+
+
+async def require_api_key(request: Request) -> Optional[Tenant]:
+    """
+    Authenticate the request by its API key.
+
+    Returns:
+        The tenant, or None when no API keys are configured
+
+    Raises:
+        HTTPException: If keys are configured and the key is missing or unknown
+    """
+    if not tenant_registry.enabled:
+        return None
+
+    tenant = tenant_registry.lookup(request.headers.get(API_KEY_HEADER))
+    if tenant is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Missing or invalid API key",
+            headers={"WWW-Authenticate": API_KEY_HEADER}
+        )
+
+    request.state.tenant = tenant
+    return tenant
+
+
+def _nothing_done(error: Exception) -> bool:
+    """
+    Whether a failed request used nothing it should be charged for: invalid
+    input, a rejected attachment, a suppressed recipient, a throttled domain
+    or an upstream (Brevo/Gemini) failure. A 500 may come after the send
+    went out, so it stays charged.
+    """
+    if isinstance(error, RequestValidationError):
+        return True
+    return isinstance(error, HTTPException) and error.status_code != 500
+
+
+def require_quota(kind: str):
+    """
+    Build a dependency that authenticates the request and counts one unit of
+    ``kind`` usage against the tenant's quotas.
+
+    The unit is counted up front, so concurrent requests cannot overshoot
+    the quota, and refunded if the request then fails without sending or
+    generating anything.
+
+    Args:
+        kind: Usage kind ("send" or "ai")
+
+    Returns:
+        FastAPI dependency yielding the tenant (or None when auth is off)
+    """
+    async def dependency(request: Request) -> AsyncIterator[Optional[Tenant]]:
+        tenant = await require_api_key(request)
+        if tenant is None:
+            yield None
+            return
+
+        daily_limit, monthly_limit = tenant.quotas[kind]
+        exhausted = quota_store.consume(tenant.id, kind, daily_limit, monthly_limit)
+        if exhausted is not None:
+            retry_after = seconds_until_reset(exhausted)
+            logger.warning(f"Tenant {tenant.id} exhausted {kind} quota for {exhausted}")
+            raise HTTPException(
+                status_code=429,
+                detail=f"{kind} quota exhausted for {exhausted[2:]}",
+                headers={"Retry-After": str(retry_after)}
+            )
+        periods = quota_store.periods
+
+        try:
+            yield tenant
+        except Exception as e:
+            if _nothing_done(e):
+                quota_store.refund(tenant.id, kind, periods)
+            raise
+
+    return dependency
+
+
+async def require_admin(request: Request) -> None:
+    """
+    Gate admin-only endpoints behind PROFILING_ENABLED and ADMIN_API_KEY.
+
+    Raises:
+        HTTPException: 404 when admin endpoints are disabled, 401 if the
+            admin key is missing or wrong
+    """
+    if not settings.PROFILING_ENABLED or not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    supplied = request.headers.get(ADMIN_KEY_HEADER, "")
+    if not hmac.compare_digest(supplied.encode("utf-8"), settings.ADMIN_API_KEY.encode("utf-8")):
+        logger.warning(f"Rejected admin request from {get_client_ip(request)}")
+        raise HTTPException(
+            status_code=401,
+            detail="Missing or invalid admin key",
+            headers={"WWW-Authenticate": ADMIN_KEY_HEADER}
+        )
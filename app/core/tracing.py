@@ -0,0 +1,333 @@
+"""
+Lightweight request tracing: request ids, timed spans, slow-request
+logging and an optional OTLP/JSON exporter.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS_PER_TRACE = 256
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_REQUEST_ID = re.compile(r"^[\w.:-]{1,128}$")
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any],
+                 start_ns: Optional[int] = None):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """All spans recorded while handling one request."""
+
+    __slots__ = ("trace_id", "request_id", "sampled", "root", "spans")
+
+    def __init__(self, trace_id: str, request_id: str, sampled: bool, root: Span):
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.sampled = sampled
+        self.root = root
+        self.spans: List[Span] = []
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def get_request_id() -> str:
+    """Return the current request id, or "-" outside a request."""
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else "-"
+
+
+def traceparent() -> Optional[str]:
+    """Return a W3C ``traceparent`` header value for outbound calls, if tracing."""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    current = _current_span.get() or trace.root
+    return f"00-{trace.trace_id}-{current.span_id}-{'01' if trace.sampled else '00'}"
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Time a block of code as a child of the current span.
+
+    Does nothing (and yields None) outside a traced request. Spans are
+    recorded for every request so slow ones can always be explained;
+    sampling only decides which traces are exported.
+
+    Args:
+        name: Span name, e.g. "brevo.send"
+        **attributes: Extra attributes recorded on the span
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get() or trace.root
+    current = Span(name, parent.span_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if len(trace.spans) < MAX_SPANS_PER_TRACE:
+            trace.spans.append(current)
+
+
+def record_span(name: str, start_ns: Optional[int] = None, **attributes: Any) -> None:
+    """
+    Record a span that started earlier (default: at the start of the
+    request) and ends now, e.g. the request parsing that happens before
+    the route handler runs.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get() or trace.root
+    current = Span(name, parent.span_id, attributes, start_ns=start_ns or trace.root.start_ns)
+    current.end_ns = time.time_ns()
+    if len(trace.spans) < MAX_SPANS_PER_TRACE:
+        trace.spans.append(current)
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds ``request_id`` to every log record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = get_request_id()
+        return True
+
+
+def format_breakdown(trace: Trace) -> str:
+    """Render a trace's spans as an indented tree with offsets and durations."""
+    children: Dict[Optional[str], List[Span]] = {}
+    for item in trace.spans:
+        children.setdefault(item.parent_id, []).append(item)
+
+    lines = []
+
+    def walk(node: Span, depth: int) -> None:
+        offset = (node.start_ns - trace.root.start_ns) / 1e6
+        error = f" !{node.error}" if node.error else ""
+        lines.append(f"{'  ' * depth}{node.name}: {node.duration_ms:.1f} ms (+{offset:.1f}){error}")
+        for child in sorted(children.get(node.span_id, []), key=lambda s: s.start_ns):
+            walk(child, depth + 1)
+
+    walk(trace.root, 0)
+    return "\n".join(lines)
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(trace: Trace, item: Span, server: bool = False) -> Dict[str, Any]:
+    data = {
+        "traceId": trace.trace_id,
+        "spanId": item.span_id,
+        "name": item.name,
+        "kind": 2 if server else 1,
+        "startTimeUnixNano": str(item.start_ns),
+        "endTimeUnixNano": str(item.end_ns),
+        "attributes": [_attribute(k, v) for k, v in item.attributes.items()],
+        "status": {"code": 2, "message": item.error} if item.error else {},
+    }
+    if item.parent_id:
+        data["parentSpanId"] = item.parent_id
+    return data
+
+
+class TraceExporter:
+    """
+    Buffers finished traces and writes them in OTLP/JSON, either as
+    lines in a file or POSTed to an OTLP/HTTP collector.
+    """
+
+    def __init__(self):
+        """Initialize the exporter from settings."""
+        self.mode = settings.TRACE_EXPORTER
+        self.path = settings.TRACE_EXPORT_PATH
+        self.endpoint = settings.TRACE_OTLP_ENDPOINT
+        self._buffer: deque = deque(maxlen=10000)
+        self._task: Optional[asyncio.Task] = None
+        self.exported = 0
+        self.dropped = 0
+
+    def enqueue(self, trace: Trace) -> None:
+        if not self.mode:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(trace)
+
+    def _payload(self, traces: List[Trace]) -> Dict[str, Any]:
+        spans = []
+        for trace in traces:
+            spans.append(_otlp_span(trace, trace.root, server=True))
+            spans.extend(_otlp_span(trace, item) for item in trace.spans)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", settings.APP_NAME)]},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+            }]
+        }
+
+    def _write_file(self, line: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+    async def flush(self) -> None:
+        """Export everything buffered so far."""
+        if not self._buffer:
+            return
+        traces = list(self._buffer)
+        self._buffer.clear()
+        payload = self._payload(traces)
+        try:
+            if self.mode == "file":
+                await asyncio.to_thread(self._write_file, json.dumps(payload, separators=(",", ":")))
+            elif self.mode == "otlp":
+                from app.core.http import http_pool
+                response = await http_pool.post(self.endpoint, json=payload)
+                response.raise_for_status()
+            self.exported += len(traces)
+        except Exception as e:
+            self.dropped += len(traces)
+            logger.warning(f"Failed to export {len(traces)} trace(s): {e!r}")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.TRACE_EXPORT_INTERVAL)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self.mode and self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+            logger.info(f"Trace exporter started ({self.mode})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+trace_exporter = TraceExporter()
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that starts a trace per HTTP request.
+
+    Takes the request id from ``X-Request-ID`` (or generates one) and
+    echoes it on the response, continues an incoming W3C ``traceparent``,
+    logs the span breakdown of requests slower than
+    SLOW_REQUEST_THRESHOLD_MS and hands sampled or slow traces to the
+    exporter.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rate = settings.TRACE_SAMPLE_RATE
+        self.slow_ms = settings.SLOW_REQUEST_THRESHOLD_MS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        match = _TRACEPARENT.match(headers.get(b"traceparent", b"").decode("latin-1"))
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            sampled = flags == "01" or random.random() < self.sample_rate
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = random.random() < self.sample_rate
+
+        root = Span(f"{scope['method']} {scope['path']}", parent_id, {"http.method": scope["method"]})
+        trace = Trace(trace_id, request_id, sampled, root)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except BaseException as e:
+            root.error = type(e).__name__
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            self._finish(trace)
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+
+    def _finish(self, trace: Trace) -> None:
+        slow = trace.root.duration_ms >= self.slow_ms
+        if slow:
+            logger.warning(
+                f"Slow request {trace.request_id} ({trace.root.duration_ms:.0f} ms):\n{format_breakdown(trace)}"
+            )
+        if trace.sampled or slow:
+            trace_exporter.enqueue(trace)
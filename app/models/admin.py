@@ -0,0 +1,38 @@
+"""
+Admin and profiling Pydantic models.
+"""
+
+from typing import Optional, Dict, Any, Literal
+from pydantic import BaseModel, Field
+
+
+class ProfileRequest(BaseModel):
+    """Request model for starting a profile."""
+
+    kind: Literal["cpu", "pstats", "memory", "stalls"] = Field(
+        ..., description="cpu (sampled collapsed stacks), pstats (cProfile), memory (tracemalloc diff) or stalls"
+    )
+    seconds: float = Field(default=10.0, gt=0, description="Profiling window in seconds")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "kind": "cpu",
+                "seconds": 10
+            }
+        }
+
+
+class ProfileInfo(BaseModel):
+    """Status of a profiling job."""
+
+    id: str = Field(..., description="Profile id")
+    kind: str = Field(..., description="Profile kind")
+    status: str = Field(..., description="running, done or failed")
+    seconds: float = Field(..., description="Profiling window in seconds")
+    started: float = Field(..., description="Start time (unix seconds)")
+    pid: int = Field(..., description="Worker process that ran the profile")
+    filename: str = Field(..., description="Download file name")
+    size: int = Field(..., description="Result size in bytes")
+    summary: Dict[str, Any] = Field(default_factory=dict, description="Short result summary")
+    error: Optional[str] = Field(default=None, description="Error if the profile failed")
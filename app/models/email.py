@@ -2,7 +2,7 @@
 Email-related Pydantic models.
 """
 
-from typing import Optional, List
+from typing import Optional, List, Literal
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -52,11 +52,15 @@ class EmailResponse(BaseModel):
     """Response model for email operations."""
     
     message: str = Field(..., description="Response message")
+    message_id: Optional[str] = Field(default=None, description="Brevo message id, usable with /messages/{message_id}")
+    suppressed: List[str] = Field(default_factory=list, description="CC/BCC recipients dropped because they are suppressed")
     
     class Config:
         json_schema_extra = {
             "example": {
-                "message": "Email sent successfully!"
+                "message": "Email sent successfully!",
+                "message_id": "<202401011200.12345678901@smtp-relay.mailin.fr>",
+                "suppressed": []
             }
         }
 
@@ -65,11 +69,23 @@ class AIBodyRequest(BaseModel):
     """Request model for AI body generation."""
     
     subject: str = Field(..., min_length=1, max_length=200, description="Email subject for AI generation")
+    tone: Optional[Literal["professional", "friendly", "formal", "casual", "persuasive"]] = Field(
+        None, description="Tone of the generated body (default professional)"
+    )
+    length: Optional[Literal["short", "medium", "long"]] = Field(
+        None, description="Length of the generated body (default medium)"
+    )
+    language: Optional[str] = Field(
+        None, min_length=2, max_length=32, description="Language to write the body in (default English)"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
-                "subject": "Meeting follow-up"
+                "subject": "Meeting follow-up",
+                "tone": "friendly",
+                "length": "short",
+                "language": "English"
             }
         }
 
@@ -85,3 +101,32 @@ class AIBodyResponse(BaseModel):
                 "body": "Thank you for taking the time to meet with me today. I wanted to follow up on our discussion and provide you with the additional information you requested."
             }
         }
+
+
+class SuppressionRequest(BaseModel):
+    """Request model for adding or removing suppressed addresses."""
+    
+    emails: List[str] = Field(..., min_length=1, description="Email addresses")
+    reason: str = Field(default="manual", max_length=100, description="Why the addresses are suppressed")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "emails": ["bounced@example.com"],
+                "reason": "hard_bounce"
+            }
+        }
+
+
+class SuppressionResponse(BaseModel):
+    """Response model for suppression list changes."""
+    
+    changed: int = Field(..., description="Number of addresses added or removed")
+    total: int = Field(..., description="Number of suppressed addresses after the change")
+
+
+class SuppressionStatus(BaseModel):
+    """Response model for a suppression lookup."""
+    
+    email: str = Field(..., description="Email address checked")
+    suppressed: bool = Field(..., description="Whether the address is suppressed")
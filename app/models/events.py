@@ -0,0 +1,47 @@
+"""
+Delivery event Pydantic models.
+"""
+
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+
+
+class WebhookAck(BaseModel):
+    """Response model for webhook ingestion."""
+
+    accepted: int = Field(..., description="Number of events queued for storage")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "accepted": 1
+            }
+        }
+
+
+class DeliveryEvent(BaseModel):
+    """A single stored delivery event."""
+
+    message_id: str = Field(..., description="Brevo message id")
+    email: Optional[str] = Field(default=None, description="Recipient the event refers to")
+    event: str = Field(..., description="Event name (sent, delivered, hard_bounce, opened, ...)")
+    event_ts: Optional[int] = Field(default=None, description="Event time reported by Brevo (unix seconds)")
+    received_at: float = Field(..., description="Time the event was received (unix seconds)")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="Raw webhook payload")
+
+
+class MessageEventsResponse(BaseModel):
+    """Response model for a message's delivery history."""
+
+    message_id: str = Field(..., description="Brevo message id")
+    status: Dict[str, str] = Field(default_factory=dict, description="Latest event per recipient")
+    events: List[DeliveryEvent] = Field(default_factory=list, description="All events, oldest first")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "message_id": "202401011200.12345678901@smtp-relay.mailin.fr",
+                "status": {"recipient@example.com": "delivered"},
+                "events": []
+            }
+        }
@@ -0,0 +1,46 @@
+"""
+Resumable upload Pydantic models.
+"""
+
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class UploadInfo(BaseModel):
+    """Status of a resumable upload."""
+
+    id: str = Field(..., description="Upload id; pass it to /send-email as an attachment id once finalized")
+    filename: str = Field(..., description="Attachment filename")
+    content_type: str = Field(..., description="MIME type")
+    length: int = Field(..., description="Total size in bytes")
+    offset: int = Field(..., description="Bytes received so far")
+    complete: bool = Field(..., description="Whether the upload has been finalized")
+    sha256: Optional[str] = Field(default=None, description="Hex SHA-256 of the file once finalized")
+    expires_at: float = Field(..., description="Time (unix seconds) the upload is deleted if left untouched")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "mJ3x0vQd7pYQe2nK1fW8bZs4",
+                "filename": "report.pdf",
+                "content_type": "application/pdf",
+                "length": 26214400,
+                "offset": 26214400,
+                "complete": True,
+                "sha256": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+                "expires_at": 1767225600.0
+            }
+        }
+
+
+class FinalizeRequest(BaseModel):
+    """Request model for finalizing an upload."""
+
+    sha256: Optional[str] = Field(default=None, description="Expected hex SHA-256 of the whole file")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "sha256": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+            }
+        }
@@ -2,82 +2,169 @@
 AI service using Google Gemini for content generation.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import google.generativeai as genai
 
 from app.core.config import settings
+from app.core.http import HttpClientPool, http_pool
+from app.core.tracing import span
 from app.core.exceptions import AIServiceError, ConfigurationError
+from app.services.prompt_templates import PromptRegistry, prompt_registry
+from app.services.semantic_cache import SemanticCache, semantic_cache
 
 logger = logging.getLogger(__name__)
 
 
+# Above this many cached subjects a lookup scans enough vectors to be
+# worth moving off the event loop
+CACHE_OFFLOAD_ENTRIES = 20000
+
+
 class AIService:
     """Service for AI-powered content generation using Google Gemini."""
     
-    def __init__(self):
-        """Initialize the AI service."""
+    def __init__(
+        self,
+        cache: Optional[SemanticCache] = semantic_cache,
+        prompts: PromptRegistry = prompt_registry,
+        http: HttpClientPool = http_pool
+    ):
+        """
+        Initialize the AI service.
+        
+        Args:
+            cache: Near-duplicate subject cache, or None to always call Gemini
+            prompts: Prompt template registry
+            http: Shared HTTP client used when GEMINI_TRANSPORT is "rest"
+        """
         if not settings.GEMINI_API_KEY:
             raise ConfigurationError("GEMINI_API_KEY is not configured")
         
         # Configure Gemini
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        # You can change the model here:
-        # Options: 'gemini-2.5-flash', 'gemini-1.5-pro', 'gemini-1.5-flash', 'gemini-pro', 'gemini-1.0-pro'
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = settings.GEMINI_MODEL
+        self.model = genai.GenerativeModel(self.model_name)
+        self.transport = settings.GEMINI_TRANSPORT
+        self.http = http
+        self.generate_url = f"{settings.GEMINI_API_URL.rstrip('/')}/models/{self.model_name}:generateContent"
+        self.cache = cache
+        self.prompts = prompts
         
         logger.info("AI service initialized successfully")
     
-    async def generate_email_body(self, subject: str) -> str:
+    async def generate_email_body(
+        self,
+        subject: str,
+        tone: Optional[str] = None,
+        length: Optional[str] = None,
+        language: Optional[str] = None,
+        tenant_id: Optional[str] = None
+    ) -> str:
         """
         Generate email body content based on subject using Gemini.
         
         Args:
             subject: Email subject line
+            tone: Prompt tone (see prompt_templates.TONES)
+            length: Body length: short, medium or long
+            language: Language to write the body in
+            tenant_id: Requesting tenant; cached bodies are never shared across tenants
             
         Returns:
             Generated email body content
             
         Raises:
+            PromptError: If the options are invalid or exceed the token budget
             AIServiceError: If AI generation fails
         """
+        prompt = self.prompts.render(subject, tone=tone, length=length, language=language)
+        variant = f"{tenant_id or ''}|{prompt.variant}"
+        
+        if self.cache is not None:
+            with span("ai.cache_lookup", entries=len(self.cache)) as lookup:
+                if len(self.cache) >= CACHE_OFFLOAD_ENTRIES:
+                    cached = await asyncio.to_thread(self.cache.get, subject, variant)
+                else:
+                    cached = self.cache.get(subject, variant)
+                if lookup is not None:
+                    lookup.attributes["hit"] = cached is not None
+            if cached is not None:
+                body, similarity = cached
+                logger.info(f"Serving cached email body for subject: {subject} (similarity {similarity:.2f})")
+                return body
+        
         try:
-            # Create prompt for email body generation
-            prompt = f"""You are an expert email writer. Write a complete, professional email body based ONLY on this subject: "{subject}"
-
-CRITICAL: The email body MUST be directly related to and expand upon the subject line "{subject}".
-
-Instructions:
-1. Start with an appropriate greeting (e.g., "Hi," or "Hello,")
-2. Write 2-4 paragraphs that are SPECIFICALLY about "{subject}"
-3. The content must logically follow from the subject line
-4. Use a professional yet friendly tone
-5. End with an appropriate closing (e.g., "Best regards," or "Thanks,")
-6. Do NOT repeat the subject line in the body
-7. Do NOT write generic content - make it specific to "{subject}"
-
-Example: If subject is "Trip Tomorrow", write about the trip happening tomorrow - details, reminders, plans, etc.
-
-Now write the email body:"""
-            
-            logger.info(f"Generating email body for subject: {subject}")
+            logger.info(
+                f"Generating email body for subject: {subject} "
+                f"(~{prompt.input_tokens} input tokens, max {prompt.max_output_tokens} output)"
+            )
             
             # Generate content
-            response = self.model.generate_content(prompt)
+            with span("gemini.generate", transport=self.transport, input_tokens=prompt.input_tokens):
+                if self.transport == "rest":
+                    text = await self._generate_rest(prompt.text, prompt.max_output_tokens)
+                else:
+                    # The SDK call blocks, so keep it off the event loop
+                    response = await asyncio.to_thread(
+                        self.model.generate_content,
+                        prompt.text,
+                        generation_config={"max_output_tokens": prompt.max_output_tokens}
+                    )
+                    text = response.text
             
-            if not response.text:
+            if not text:
                 raise AIServiceError("AI service returned empty response")
             
-            generated_body = response.text.strip()
+            generated_body = text.strip()
             logger.info("Email body generated successfully")
             
+            if self.cache is not None:
+                # Takes the cache lock, which a lookup in a worker thread may hold
+                if len(self.cache) >= CACHE_OFFLOAD_ENTRIES:
+                    await asyncio.to_thread(self.cache.put, subject, generated_body, variant)
+                else:
+                    self.cache.put(subject, generated_body, variant)
+            
             return generated_body
             
         except Exception as e:
             logger.error(f"Failed to generate email body: {str(e)}")
             raise AIServiceError(f"Failed to generate email body: {str(e)}")
     
+    async def _generate_rest(self, prompt: str, max_output_tokens: int) -> str:
+        """
+        Call the Gemini generateContent REST endpoint through the shared HTTP client.
+        
+        Args:
+            prompt: Prompt text
+            max_output_tokens: Completion token limit
+            
+        Returns:
+            Concatenated text of the first candidate
+            
+        Raises:
+            AIServiceError: If the API returns an error
+        """
+        response = await self.http.post(
+            self.generate_url,
+            headers={"x-goog-api-key": settings.GEMINI_API_KEY},
+            json={
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": {"maxOutputTokens": max_output_tokens},
+            }
+        )
+        if response.status_code >= 400:
+            raise AIServiceError(f"Gemini returned {response.status_code}: {response.text}")
+        
+        candidates = response.json().get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+    
     async def validate_subject(self, subject: str) -> bool:
         """
         Validate subject line for AI generation.
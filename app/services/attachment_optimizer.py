@@ -0,0 +1,219 @@
+"""
+Attachment optimization: shrink attachments before they are base64-encoded
+and uploaded to Brevo.
+"""
+
+import hashlib
+import io
+import logging
+import time
+import zipfile
+from collections import defaultdict
+from typing import Dict, Any, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.process_pool import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+OptimizedAttachment = Tuple[str, str, bytes]
+
+# Cached for attachments that could not be made smaller
+_UNCHANGED: OptimizedAttachment = ("", "", b"")
+
+TEXT_TYPES = {"text/plain", "text/csv"}
+IMAGE_TYPES = {"image/jpeg", "image/png"}
+PDF_TYPES = {"application/pdf"}
+
+
+def _zip_text(filename: str, content: bytes) -> OptimizedAttachment:
+    """Losslessly pack a text file into a zip archive."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        archive.writestr(filename, content)
+    return f"{filename}.zip", "application/zip", buffer.getvalue()
+
+
+def _shrink_image(filename: str, content_type: str, content: bytes, options: Dict[str, Any]) -> OptimizedAttachment:
+    """Downscale an oversized image and recompress it in its own format."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return filename, content_type, content
+
+    with Image.open(io.BytesIO(content)) as image:
+        max_dimension = options["max_image_dimension"]
+        if max(image.size) <= max_dimension:
+            # Recompressing alone loses quality for little or no gain
+            return filename, content_type, content
+
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        # Keep the colour profile and camera metadata (orientation is reset
+        # by exif_transpose, as the pixels are now upright)
+        exif = image.getexif()
+        metadata = {"icc_profile": image.info.get("icc_profile"), "exif": exif.tobytes() if exif else b""}
+
+        output = io.BytesIO()
+        if content_type == "image/jpeg":
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(output, "JPEG", quality=options["jpeg_quality"], optimize=True, progressive=True, **metadata)
+        else:
+            image.save(output, "PNG", optimize=True, **metadata)
+    return filename, content_type, output.getvalue()
+
+
+def _compress_pdf(filename: str, content_type: str, content: bytes) -> OptimizedAttachment:
+    """Deflate uncompressed PDF content streams."""
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        return filename, content_type, content
+
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(content)))
+    for page in writer.pages:
+        page.compress_content_streams()
+    output = io.BytesIO()
+    writer.write(output)
+    return filename, content_type, output.getvalue()
+
+
+def optimize_attachment(
+    filename: str,
+    content_type: str,
+    content: bytes,
+    options: Dict[str, Any]
+) -> Optional[OptimizedAttachment]:
+    """
+    Optimize one attachment. Runs in a worker process.
+
+    Args:
+        filename: Attachment filename
+        content_type: Validated MIME type
+        content: Raw file content
+        options: Tunables (max_image_dimension, jpeg_quality, min_text_bytes)
+
+    Returns:
+        Tuple of (filename, content_type, content), or None when the
+        attachment could not be made smaller (the original is then sent and
+        need not be copied back from the worker)
+    """
+    try:
+        if content_type in TEXT_TYPES:
+            if len(content) < options["min_text_bytes"]:
+                return None
+            result = _zip_text(filename, content)
+        elif content_type in IMAGE_TYPES:
+            result = _shrink_image(filename, content_type, content, options)
+        elif content_type in PDF_TYPES:
+            result = _compress_pdf(filename, content_type, content)
+        else:
+            return None
+    except Exception:
+        # A file we cannot parse is sent as uploaded
+        return None
+
+    return result if len(result[2]) < len(content) else None
+
+
+class AttachmentOptimizer:
+    """
+    Runs attachment optimization in a process pool, with results cached by
+    content hash and savings tracked per MIME type.
+    """
+
+    OPTIMIZABLE_TYPES = TEXT_TYPES | IMAGE_TYPES | PDF_TYPES
+
+    def __init__(self):
+        """Initialize the optimizer from settings."""
+        self.enabled = settings.ATTACHMENT_OPTIMIZATION_ENABLED
+        self.options = {
+            "max_image_dimension": settings.ATTACHMENT_MAX_IMAGE_DIMENSION,
+            "jpeg_quality": settings.ATTACHMENT_JPEG_QUALITY,
+            "min_text_bytes": settings.ATTACHMENT_MIN_TEXT_BYTES,
+        }
+        self.timeout = settings.ATTACHMENT_OPTIMIZATION_TIMEOUT
+        self.pool = ProcessPool("attachment-optimizer", settings.ATTACHMENT_WORKERS)
+        self.cache = LRUCache(
+            max_entries=256,
+            max_bytes=settings.ATTACHMENT_CACHE_MAX_BYTES,
+            sizeof=lambda result: len(result[2])
+        )
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    async def optimize(self, filename: str, content_type: str, content: bytes) -> OptimizedAttachment:
+        """
+        Optimize an attachment if it is of an optimizable type.
+
+        Args:
+            filename: Attachment filename
+            content_type: Validated MIME type
+            content: Raw file content
+
+        Returns:
+            Tuple of (filename, content_type, content), unchanged on failure
+        """
+        if not self.enabled or content_type not in self.OPTIMIZABLE_TYPES:
+            return filename, content_type, content
+        if content_type in TEXT_TYPES and len(content) < self.options["min_text_bytes"]:
+            return filename, content_type, content
+
+        stats = self._stats[content_type]
+        stats["files"] += 1
+        stats["bytes_in"] += len(content)
+
+        # Zipped text embeds the filename, so it is part of the key there
+        digest = hashlib.sha256(content).hexdigest()
+        key = (digest, content_type, filename if content_type in TEXT_TYPES else None)
+        result = self.cache.get(key)
+
+        if result is None:
+            started = time.perf_counter()
+            try:
+                result = await self.pool.run(
+                    optimize_attachment, filename, content_type, content, self.options,
+                    timeout=self.timeout
+                )
+            except Exception as e:
+                logger.warning(f"Attachment optimization failed for {filename}: {str(e)}")
+                result = None
+            stats["processing_ms"] += (time.perf_counter() - started) * 1000
+            self.cache.set(key, result or _UNCHANGED)
+        else:
+            stats["cache_hits"] += 1
+
+        if result is None or result is _UNCHANGED:
+            result = (filename, content_type, content)
+
+        stats["bytes_out"] += len(result[2])
+        if len(result[2]) < len(content):
+            logger.info(
+                f"Optimized {filename}: {len(content)} -> {len(result[2])} bytes "
+                f"({result[1]})"
+            )
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return bytes saved and processing time per MIME type."""
+        by_type = {}
+        for content_type, stats in self._stats.items():
+            processed = stats["files"] - stats["cache_hits"]
+            by_type[content_type] = {
+                "files": int(stats["files"]),
+                "cache_hits": int(stats["cache_hits"]),
+                "bytes_in": int(stats["bytes_in"]),
+                "bytes_out": int(stats["bytes_out"]),
+                "bytes_saved": int(stats["bytes_in"] - stats["bytes_out"]),
+                "processing_ms_total": round(stats["processing_ms"], 2),
+                "processing_ms_avg": round(stats["processing_ms"] / processed, 2) if processed else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "by_type": by_type,
+            "cache": self.cache.stats()
+        }
+
+
+attachment_optimizer = AttachmentOptimizer()
@@ -0,0 +1,330 @@
+"""
+Attachment content scanning: magic-byte sniffing, archive bomb detection
+and an optional clamd pass, run in a bounded process pool.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import socket
+import struct
+import zipfile
+from collections import defaultdict
+from typing import Dict, Any, Callable, List, NamedTuple, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.process_pool import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class ScanVerdict(NamedTuple):
+    """Result of scanning one attachment."""
+
+    clean: bool
+    reason: str = ""
+    detected_type: Optional[str] = None
+    # False for verdicts caused by a scanner error rather than the content
+    cacheable: bool = True
+
+
+CLEAN = ScanVerdict(True)
+
+# Leading bytes of each container format we accept
+SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"PK\x05\x06", "application/zip"),
+    (b"Rar!\x1a\x07", "application/x-rar-compressed"),
+]
+
+# Byte order marks of text encodings whose content contains NUL bytes
+# (UTF-32 first: its little-endian BOM starts with the UTF-16 one)
+TEXT_BOMS = (b"\xff\xfe\x00\x00", b"\x00\x00\xfe\xff", b"\xff\xfe", b"\xfe\xff")
+
+# Detected container format(s) each declared MIME type may have
+EXPECTED_FORMATS = {
+    "image/jpeg": {"image/jpeg"},
+    "image/png": {"image/png"},
+    "image/gif": {"image/gif"},
+    "image/webp": {"image/webp"},
+    "application/pdf": {"application/pdf"},
+    "application/msword": {"application/x-ole-storage"},
+    "application/vnd.ms-excel": {"application/x-ole-storage"},
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": {"application/zip"},
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": {"application/zip"},
+    "application/zip": {"application/zip"},
+    "application/x-rar-compressed": {"application/x-rar-compressed"},
+    "text/plain": {"text/plain"},
+    "text/csv": {"text/plain"},
+}
+
+OOXML_TYPES = {
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Executable content that must not hide inside an archive
+BLOCKED_MEMBER_EXTENSIONS = (
+    ".exe", ".scr", ".com", ".bat", ".cmd", ".pif", ".vbs", ".vbe",
+    ".js", ".jse", ".wsf", ".msi", ".jar", ".ps1", ".hta", ".lnk",
+)
+
+
+def sniff_type(content: bytes) -> Optional[str]:
+    """
+    Detect the container format of a file from its leading bytes.
+
+    Args:
+        content: File content
+
+    Returns:
+        Detected MIME type, "text/plain" for content without NUL bytes
+        or with a UTF-16/32 byte order mark, or None if unknown
+    """
+    for signature, mime_type in SIGNATURES:
+        if content.startswith(signature):
+            return mime_type
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "image/webp"
+    # Text in any 8-bit encoding (CSV exports are often not UTF-8), or
+    # UTF-16/32 text (e.g. Excel's "Unicode Text" export) marked by its BOM
+    if b"\x00" not in content[:8192] or content.startswith(TEXT_BOMS):
+        return "text/plain"
+    return None
+
+
+def check_magic(filename: str, declared_type: str, content: bytes, options: Dict[str, Any]) -> ScanVerdict:
+    """Reject files whose content does not match their declared type."""
+    detected = sniff_type(content)
+    if detected not in EXPECTED_FORMATS.get(declared_type, set()):
+        return ScanVerdict(
+            False,
+            f"content does not match declared type {declared_type}",
+            detected
+        )
+    return ScanVerdict(True, detected_type=detected)
+
+
+def _inspect_zip(archive: zipfile.ZipFile, compressed_size: int, depth: int, options: Dict[str, Any]) -> str:
+    """
+    Walk a zip archive (and zips nested in it) looking for bombs.
+
+    Returns:
+        Rejection reason, or an empty string if the archive looks safe
+    """
+    members = archive.infolist()
+    if len(members) > options["max_archive_members"]:
+        return f"archive has more than {options['max_archive_members']} members"
+
+    total = sum(member.file_size for member in members)
+    if total > options["max_uncompressed_bytes"]:
+        return f"archive expands to more than {options['max_uncompressed_bytes']} bytes"
+    if compressed_size and total / compressed_size > options["max_compression_ratio"]:
+        return f"archive compression ratio exceeds {options['max_compression_ratio']}"
+
+    for member in members:
+        name = member.filename.lower()
+        if name.endswith(BLOCKED_MEMBER_EXTENSIONS):
+            return f"archive contains blocked file {member.filename}"
+        if member.is_dir() or not name.endswith((".zip", ".docx", ".xlsx")):
+            continue
+
+        if depth + 1 > options["max_archive_depth"]:
+            return f"archive nesting exceeds depth {options['max_archive_depth']}"
+        # Size was checked above, so reading the nested archive is bounded
+        nested = archive.read(member)
+        try:
+            with zipfile.ZipFile(io.BytesIO(nested)) as inner:
+                reason = _inspect_zip(inner, len(nested), depth + 1, options)
+        except zipfile.BadZipFile:
+            continue
+        if reason:
+            return reason
+    return ""
+
+
+def check_archive(filename: str, declared_type: str, content: bytes, options: Dict[str, Any]) -> ScanVerdict:
+    """Reject zip-based files that are archive bombs or hide executables."""
+    if not content.startswith(b"PK"):
+        return CLEAN
+    try:
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            if declared_type in OOXML_TYPES and "[Content_Types].xml" not in archive.namelist():
+                return ScanVerdict(False, "not a valid Office document", "application/zip")
+            reason = _inspect_zip(archive, len(content), 1, options)
+    except zipfile.BadZipFile:
+        return ScanVerdict(False, "corrupt zip archive", "application/zip")
+    return ScanVerdict(not reason, reason)
+
+
+def check_clamd(filename: str, declared_type: str, content: bytes, options: Dict[str, Any]) -> ScanVerdict:
+    """Stream the file to a local clamd daemon using the INSTREAM command."""
+    address = options["clamd_address"]
+    if not address:
+        return CLEAN
+
+    if address.startswith("/"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        target: Any = address
+    else:
+        host, _, port = address.rpartition(":")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        target = (host, int(port))
+
+    with sock:
+        sock.settimeout(options["timeout"])
+        sock.connect(target)
+        sock.sendall(b"zINSTREAM\x00")
+        chunk_size = 64 * 1024
+        for offset in range(0, len(content), chunk_size):
+            chunk = content[offset:offset + chunk_size]
+            sock.sendall(struct.pack("!I", len(chunk)) + chunk)
+        sock.sendall(struct.pack("!I", 0))
+        reply = sock.recv(4096).rstrip(b"\x00").decode("utf-8", errors="replace")
+
+    if reply.endswith("OK"):
+        return CLEAN
+    return ScanVerdict(False, f"clamd: {reply.split(':', 1)[-1].strip()}")
+
+
+SCANNERS: Dict[str, Callable[[str, str, bytes, Dict[str, Any]], ScanVerdict]] = {
+    "magic": check_magic,
+    "archive": check_archive,
+    "clamd": check_clamd,
+}
+
+
+def scan_attachment(
+    filename: str,
+    declared_type: str,
+    content: bytes,
+    scanner_names: List[str],
+    options: Dict[str, Any]
+) -> ScanVerdict:
+    """
+    Run the configured scanners in order. Runs in a worker process.
+
+    Args:
+        filename: Attachment filename
+        declared_type: Client-declared MIME type
+        content: File content
+        scanner_names: Names of SCANNERS entries to run
+        options: Scanner limits
+
+    Returns:
+        The first failing verdict, or a clean verdict
+    """
+    detected = None
+    for name in scanner_names:
+        try:
+            verdict = SCANNERS[name](filename, declared_type, content, options)
+        except Exception as e:
+            return ScanVerdict(False, f"{name} scanner failed: {e}", detected, cacheable=False)
+        if not verdict.clean:
+            return verdict
+        detected = verdict.detected_type or detected
+    return ScanVerdict(True, detected_type=detected)
+
+
+class AttachmentScanner:
+    """
+    Scans attachments in a bounded process pool with per-file timeouts.
+
+    Verdicts are cached by SHA-256 and declared type, so an attachment that
+    is sent again (e.g. in a campaign) is only scanned once.
+    """
+
+    def __init__(self):
+        """Initialize the scanner from settings."""
+        self.enabled = settings.ATTACHMENT_SCANNING_ENABLED
+        self.scanner_names = [
+            name.strip() for name in settings.ATTACHMENT_SCANNERS.split(",")
+            if name.strip() in SCANNERS
+        ]
+        if settings.CLAMD_ADDRESS and "clamd" not in self.scanner_names:
+            self.scanner_names.append("clamd")
+        self.timeout = settings.ATTACHMENT_SCAN_TIMEOUT
+        self.options = {
+            "max_archive_members": settings.ATTACHMENT_MAX_ARCHIVE_MEMBERS,
+            "max_uncompressed_bytes": settings.ATTACHMENT_MAX_UNCOMPRESSED_BYTES,
+            "max_compression_ratio": settings.ATTACHMENT_MAX_COMPRESSION_RATIO,
+            "max_archive_depth": settings.ATTACHMENT_MAX_ARCHIVE_DEPTH,
+            "clamd_address": settings.CLAMD_ADDRESS,
+            "timeout": self.timeout,
+        }
+        self.pool = ProcessPool("attachment-scanner", settings.ATTACHMENT_SCAN_WORKERS)
+        self.cache = LRUCache(max_entries=10000)
+        self._stats: Dict[str, int] = defaultdict(int)
+
+    async def scan(self, filename: str, declared_type: str, content: bytes) -> ScanVerdict:
+        """
+        Scan an attachment.
+
+        Scans that time out or where a scanner fails (e.g. clamd is
+        unreachable) are rejected rather than let through, and not cached,
+        so the file is scanned again on the next attempt.
+
+        Args:
+            filename: Attachment filename
+            declared_type: Client-declared MIME type
+            content: File content
+
+        Returns:
+            Scan verdict
+        """
+        if not self.enabled or not self.scanner_names:
+            return CLEAN
+
+        self._stats["scanned"] += 1
+        key = (hashlib.sha256(content).hexdigest(), declared_type)
+        verdict = self.cache.get(key)
+        if verdict is not None:
+            self._stats["cache_hits"] += 1
+        else:
+            try:
+                verdict = await self.pool.run(
+                    scan_attachment, filename, declared_type, content,
+                    self.scanner_names, self.options,
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                self._stats["rejected"] += 1
+                return ScanVerdict(False, f"scan timed out after {self.timeout}s")
+            except Exception as e:
+                logger.error(f"Scanning {filename} failed: {str(e)}")
+                self._stats["rejected"] += 1
+                return ScanVerdict(False, "scan failed", cacheable=False)
+            if verdict.cacheable:
+                self.cache.set(key, verdict)
+            else:
+                self._stats["failures"] += 1
+
+        if not verdict.clean:
+            self._stats["rejected"] += 1
+            logger.warning(f"Rejected attachment {filename} ({declared_type}): {verdict.reason}")
+        return verdict
+
+    def stats(self) -> Dict[str, Any]:
+        """Return scan counters."""
+        return {
+            "enabled": self.enabled,
+            "scanners": self.scanner_names,
+            "scanned": self._stats["scanned"],
+            "cache_hits": self._stats["cache_hits"],
+            "rejected": self._stats["rejected"],
+            "timeouts": self._stats["timeouts"],
+            "failures": self._stats["failures"],
+            "cache": self.cache.stats()
+        }
+
+
+attachment_scanner = AttachmentScanner()
@@ -0,0 +1,206 @@
+"""
+Per-recipient-domain send throttling.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque, defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Iterable, List
+
+from app.core.config import settings, parse_domain_limits
+from app.core.exceptions import DomainThrottledError
+
+logger = logging.getLogger(__name__)
+
+RATE_WINDOW = 60.0
+# Back-off between attempts to take all of a message's concurrency slots
+SLOT_RETRY_MIN = 0.005
+SLOT_RETRY_MAX = 0.25
+
+
+class DomainThrottle:
+    """Token bucket plus concurrency cap for one recipient domain."""
+
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.in_flight = 0
+        self.sent = 0
+        self.recent: deque = deque()
+
+    def reserve(self, count: int, max_wait: float) -> float:
+        """
+        Reserve tokens for ``count`` recipients, letting the bucket go into
+        debt so later callers queue behind this one. A message with more
+        recipients than the burst is charged in full and simply waits longer.
+
+        Returns:
+            Seconds to wait before sending; if that exceeds max_wait
+            nothing is reserved
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        delay = max(0.0, (count - self.tokens) / self.rate) if self.rate > 0 else math.inf
+        if delay > max_wait:
+            return delay
+        self.tokens -= count
+        return delay
+
+    def refund(self, count: int) -> None:
+        """Return tokens reserved for a send that never started."""
+        self.tokens += count
+
+    def record(self, count: int) -> None:
+        """Record a completed send for rate reporting."""
+        now = time.monotonic()
+        self.sent += count
+        self.recent.append((now, count))
+        while self.recent and self.recent[0][0] < now - RATE_WINDOW:
+            self.recent.popleft()
+
+    @property
+    def full(self) -> bool:
+        return self.in_flight >= self.concurrency
+
+    @property
+    def idle(self) -> bool:
+        return not self.waiting and not self.in_flight and self.tokens >= self.burst
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(count for ts, count in self.recent if ts >= now - RATE_WINDOW)
+        return {
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "rate_per_min": recent,
+            "limit_per_sec": self.rate,
+            "concurrency": self.concurrency,
+        }
+
+
+class DomainScheduler:
+    """
+    Throttles sends per recipient domain.
+
+    Every domain has its own token bucket and concurrency cap, so a burst
+    to one domain (gmail.com, say) only queues sends to that domain while
+    sends to other domains go straight through. A message with recipients
+    in several domains takes one token per recipient from each domain's
+    bucket and one concurrency slot per domain. The slots are taken all
+    at once or not at all, so a message waiting on one busy domain never
+    holds another domain's slot in the meantime.
+    """
+
+    MAX_IDLE_DOMAINS = 10000
+
+    def __init__(self):
+        """Initialize the scheduler from settings."""
+        self.default_limits = (
+            settings.DOMAIN_DEFAULT_RATE,
+            settings.DOMAIN_DEFAULT_BURST,
+            settings.DOMAIN_DEFAULT_CONCURRENCY,
+        )
+        self.overrides = parse_domain_limits(settings.DOMAIN_LIMITS, settings.DOMAIN_DEFAULT_CONCURRENCY)
+        self.max_wait = settings.DOMAIN_MAX_WAIT
+        self._throttles: Dict[str, DomainThrottle] = {}
+
+    def _throttle(self, domain: str) -> DomainThrottle:
+        throttle = self._throttles.get(domain)
+        if throttle is None:
+            if len(self._throttles) >= self.MAX_IDLE_DOMAINS:
+                self._throttles = {d: t for d, t in self._throttles.items() if not t.idle}
+            throttle = DomainThrottle(*self.overrides.get(domain, self.default_limits))
+            self._throttles[domain] = throttle
+        return throttle
+
+    @staticmethod
+    def group_by_domain(recipients: Iterable[str]) -> Dict[str, int]:
+        """Count recipients per lower-cased domain."""
+        groups: Dict[str, int] = defaultdict(int)
+        for email in recipients:
+            groups[email.rpartition("@")[2].strip().lower()] += 1
+        return groups
+
+    @asynccontextmanager
+    async def slot(self, recipients: List[str]) -> AsyncIterator[None]:
+        """
+        Wait until a message to ``recipients`` may be sent and hold the
+        per-domain concurrency slots while it is being sent.
+
+        Args:
+            recipients: All to/cc/bcc addresses of the message
+
+        Raises:
+            DomainThrottledError: If a domain's backlog exceeds DOMAIN_MAX_WAIT
+        """
+        groups = self.group_by_domain(recipients)
+        throttles = [(domain, self._throttle(domain), count) for domain, count in sorted(groups.items())]
+
+        delay = 0.0
+        reserved = []
+        for domain, throttle, count in throttles:
+            wait = throttle.reserve(count, self.max_wait)
+            if wait > self.max_wait:
+                for earlier, earlier_count in reserved:
+                    earlier.refund(earlier_count)
+                raise DomainThrottledError(
+                    f"Sending to {domain} is throttled, try again later",
+                    retry_after=max(1, math.ceil(min(wait, 86400)))
+                )
+            reserved.append((throttle, count))
+            delay = max(delay, wait)
+
+        for _, throttle, _ in throttles:
+            throttle.waiting += 1
+        acquired = False
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            await self._acquire([throttle for _, throttle, _ in throttles])
+            acquired = True
+        finally:
+            for _, throttle, count in throttles:
+                throttle.waiting -= 1
+                if not acquired:
+                    # Cancelled (or failed) before sending: give the tokens back
+                    throttle.refund(count)
+
+        try:
+            yield
+            for _, throttle, count in throttles:
+                throttle.record(count)
+        finally:
+            for _, throttle, _ in throttles:
+                throttle.in_flight -= 1
+
+    @staticmethod
+    async def _acquire(throttles: List[DomainThrottle]) -> None:
+        """Take a concurrency slot in every throttle at once."""
+        backoff = SLOT_RETRY_MIN
+        # No await between the check and the increment, so this is atomic
+        while any(throttle.full for throttle in throttles):
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, SLOT_RETRY_MAX)
+        for throttle in throttles:
+            throttle.in_flight += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and send rate per active domain."""
+        return {
+            domain: throttle.stats()
+            for domain, throttle in sorted(self._throttles.items())
+            if throttle.sent or throttle.waiting or throttle.in_flight
+        }
+
+
+domain_scheduler = DomainScheduler()
@@ -4,10 +4,11 @@ Email service using Brevo (formerly Sendinblue).
 
 import logging
 import base64
+import time
 from typing import Dict, Any, Optional, List
 
+import httpx
 import sib_api_v3_sdk
-from sib_api_v3_sdk.rest import ApiException
 from sib_api_v3_sdk.api import TransactionalEmailsApi
 from sib_api_v3_sdk import SendSmtpEmail
 from sib_api_v3_sdk import SendSmtpEmailSender
@@ -17,7 +18,11 @@ from sib_api_v3_sdk import SendSmtpEmailBcc
 from sib_api_v3_sdk import SendSmtpEmailAttachment
 
 from app.core.config import settings
-from app.core.exceptions import EmailServiceError, ConfigurationError
+from app.core.http import HttpClientPool, http_pool
+from app.core.tracing import span, record_span
+from app.core.exceptions import EmailServiceError, ConfigurationError, RecipientSuppressedError
+from app.services.domain_scheduler import DomainScheduler, domain_scheduler
+from app.services.suppression import SuppressionList, suppression_list
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +41,20 @@ class EmailService:
         'application/zip', 'application/x-rar-compressed'
     }
     
-    def __init__(self):
-        """Initialize the email service."""
+    def __init__(
+        self,
+        suppressions: Optional[SuppressionList] = suppression_list,
+        scheduler: Optional[DomainScheduler] = domain_scheduler,
+        http: HttpClientPool = http_pool
+    ):
+        """
+        Initialize the email service.
+        
+        Args:
+            suppressions: Suppression list checked before every send (None disables it)
+            scheduler: Per-domain throttling around the Brevo call (None disables it)
+            http: Shared HTTP client used for Brevo API calls
+        """
         if not settings.BREVO_API_KEY:
             raise ConfigurationError("BREVO_API_KEY is not configured")
         
@@ -48,9 +65,20 @@ class EmailService:
         configuration = sib_api_v3_sdk.Configuration()
         configuration.api_key['api-key'] = settings.BREVO_API_KEY
         
+        # The SDK builds and serializes the payload; the request itself goes
+        # through the shared async HTTP client
         self.api_instance = TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+        self.http = http
+        self.send_url = f"{settings.BREVO_API_URL.rstrip('/')}/smtp/email"
+        self.headers = {
+            "api-key": settings.BREVO_API_KEY,
+            "accept": "application/json",
+            "content-type": "application/json",
+        }
         self.from_email = settings.BREVO_FROM_EMAIL
         self.from_name = settings.BREVO_FROM_NAME
+        self.suppressions = suppressions
+        self.scheduler = scheduler
         
         logger.info("Email service initialized successfully")
         logger.info(f"Using Brevo API key: {settings.BREVO_API_KEY[:10]}...")
@@ -80,12 +108,34 @@ class EmailService:
             attachments: Optional list of dicts with 'filename', 'content_type', 'content' (base64)
             
         Returns:
-            Dict containing the response from Brevo
+            Dict containing the response from Brevo, the recipients the email
+            was sent to and any suppressed recipients that were dropped
             
         Raises:
+            RecipientSuppressedError: If the primary recipient is suppressed
             EmailServiceError: If email sending fails
         """
+        # Drop suppressed recipients before building the payload
+        suppressed = []
+        if self.suppressions is not None and len(self.suppressions):
+            if self.suppressions.contains(to_email):
+                logger.warning(f"Not sending to suppressed recipient {to_email}")
+                raise RecipientSuppressedError(
+                    f"Recipient {to_email} is on the suppression list",
+                    suppressed=[to_email]
+                )
+            if cc_emails:
+                cc_emails, dropped = self.suppressions.filter(cc_emails)
+                suppressed.extend(dropped)
+            if bcc_emails:
+                bcc_emails, dropped = self.suppressions.filter(bcc_emails)
+                suppressed.extend(dropped)
+            if suppressed:
+                logger.warning(f"Dropped {len(suppressed)} suppressed recipient(s): {suppressed}")
+        
         try:
+            build_started = time.time_ns()
+            
             # Create sender
             sender = SendSmtpEmailSender(
                 email=self.from_email,
@@ -189,20 +239,41 @@ class EmailService:
             else:
                 logger.warning("Email attachment field is empty or missing")
             
-            response = self.api_instance.send_transac_email(email_data)
+            # The scheduler holds per-domain slots for the duration of the upload
+            recipients = [to_email] + (cc_emails or []) + (bcc_emails or [])
+            payload = self.api_instance.api_client.sanitize_for_serialization(email_data)
+            record_span("email.build_payload", start_ns=build_started, attachments=len(attachments or []))
+            
+            # Time outside the nested http.request span is spent waiting for domain slots
+            with span("brevo.send", recipients=len(recipients)):
+                if self.scheduler is not None:
+                    async with self.scheduler.slot(recipients):
+                        response = await self.http.post(self.send_url, json=payload, headers=self.headers)
+                else:
+                    response = await self.http.post(self.send_url, json=payload, headers=self.headers)
+            
+            if response.status_code >= 400:
+                logger.error(f"Brevo API error: {response.status_code} {response.text}")
+                raise EmailServiceError(f"Failed to send email: Brevo returned {response.status_code}: {response.text}")
+            
+            message_id = response.json().get("messageId")
             
             # Log response details
-            logger.info(f"Email sent successfully. Message ID: {response.message_id}")
-            logger.info(f"Brevo API response: {response}")
+            logger.info(f"Email sent successfully. Message ID: {message_id}")
+            logger.info(f"Brevo API response: {response.text}")
             
             return {
-                "message_id": response.message_id,
-                "message": "Email sent successfully!"
+                "message_id": message_id,
+                "message": "Email sent successfully!",
+                "recipients": recipients,
+                "suppressed": suppressed
             }
             
-        except ApiException as e:
-            logger.error(f"Brevo API error: {e}")
-            raise EmailServiceError(f"Failed to send email: {e}")
+        except EmailServiceError:
+            raise
+        except httpx.HTTPError as e:
+            logger.error(f"Brevo API request failed: {e!r}")
+            raise EmailServiceError(f"Failed to send email: {e!r}")
         except Exception as e:
             logger.error(f"Failed to send email: {str(e)}")
             raise EmailServiceError(f"Failed to send email: {str(e)}")
@@ -0,0 +1,336 @@
+"""
+Append-only delivery event store backed by SQLite in WAL mode.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import EventStoreError
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id TEXT NOT NULL,
+    email TEXT,
+    event TEXT NOT NULL,
+    event_ts INTEGER,
+    received_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_message_id ON events (message_id, id);
+CREATE INDEX IF NOT EXISTS idx_events_email ON events (email, id);
+CREATE TABLE IF NOT EXISTS message_owners (
+    message_id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL
+);
+"""
+
+_INSERT = (
+    "INSERT INTO events (message_id, email, event, event_ts, received_at, payload) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+_INSERT_OWNER = "INSERT OR IGNORE INTO message_owners (message_id, tenant) VALUES (?, ?)"
+
+
+def normalize_message_id(message_id: str) -> str:
+    """
+    Normalize a Brevo message id so API responses and webhooks agree.
+
+    Brevo returns ids wrapped in angle brackets (``<...@smtp-relay.mailin.fr>``)
+    from the send API but clients usually pass them around without.
+
+    Args:
+        message_id: Raw message id
+
+    Returns:
+        Message id without surrounding whitespace or angle brackets
+    """
+    return message_id.strip().strip("<>")
+
+
+class DeliveryEventStore:
+    """
+    Buffered, append-only store for delivery events.
+
+    Events are appended to an in-memory buffer and written to SQLite in
+    batches by a background task, either every ``flush_interval`` seconds or
+    as soon as ``batch_size`` events are pending. All writes go through a
+    single writer thread so the event loop never blocks on disk I/O.
+
+    Messages sent by a tenant are recorded with their owner, and history
+    queries made on behalf of a tenant only return events of that tenant's
+    messages.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 1.0,
+        batch_size: int = 5000,
+        buffer_max: int = 100000
+    ):
+        """Initialize the event store (the database is opened on start)."""
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.buffer_max = buffer_max
+
+        self._buffer: List[Tuple[Any, ...]] = []
+        self._owners: List[Tuple[str, str]] = []
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-writer")
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.events_received = 0
+        self.events_written = 0
+
+    def _open(self) -> None:
+        """Open the database and create the schema (runs on the writer thread)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._write_conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._write_conn.execute("PRAGMA journal_mode=WAL")
+        self._write_conn.execute("PRAGMA synchronous=NORMAL")
+        self._write_conn.executescript(_SCHEMA)
+        self._write_conn.commit()
+
+        self._read_conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._read_conn.row_factory = sqlite3.Row
+
+    def _close(self) -> None:
+        """Close database connections (runs on the writer thread)."""
+        if self._write_conn is not None:
+            self._write_conn.close()
+            self._write_conn = None
+        if self._read_conn is not None:
+            self._read_conn.close()
+            self._read_conn = None
+
+    async def start(self) -> None:
+        """Open the database and start the background flush task."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._open)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Delivery event store started at {self.path}")
+
+    async def stop(self) -> None:
+        """Stop the flush task, write out pending events and close the database."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._close)
+        logger.info(f"Delivery event store stopped ({self.events_written} events written)")
+
+    def append(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Queue events for writing. Never blocks.
+
+        Args:
+            events: Brevo webhook payloads (must carry ``message-id`` and ``event``)
+
+        Returns:
+            Number of events accepted
+
+        Raises:
+            EventStoreError: If the buffer is at capacity
+        """
+        if len(self._buffer) + len(events) > self.buffer_max:
+            raise EventStoreError(
+                f"Event buffer is full ({len(self._buffer)} pending events)"
+            )
+
+        received_at = time.time()
+        accepted = 0
+        for event in events:
+            message_id = event.get("message-id") or event.get("message_id")
+            event_name = event.get("event")
+            if not message_id or not event_name:
+                continue
+
+            event_ts = event.get("ts_event") or event.get("ts")
+            self._buffer.append((
+                normalize_message_id(str(message_id)),
+                (event.get("email") or "").lower() or None,
+                str(event_name),
+                int(event_ts) if isinstance(event_ts, (int, float)) else None,
+                received_at,
+                json.dumps(event, separators=(",", ":"))
+            ))
+            accepted += 1
+
+        self.events_received += accepted
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+        return accepted
+
+    def record_sent(self, message_id: str, recipients: List[str], tenant: Optional[str] = None) -> None:
+        """
+        Record a local ``sent`` event for each recipient of a message.
+
+        Args:
+            message_id: Message id returned by Brevo
+            recipients: All to/cc/bcc addresses the message was sent to
+            tenant: Tenant that sent the message (None when API keys are disabled)
+        """
+        if tenant is not None:
+            self._owners.append((normalize_message_id(message_id), tenant))
+        now = int(time.time())
+        try:
+            self.append([
+                {"event": "sent", "message-id": message_id, "email": email, "ts_event": now}
+                for email in recipients
+            ])
+        except EventStoreError as e:
+            logger.warning(f"Could not record sent event for {message_id}: {e}")
+
+    def _write_batch(self, batch: List[Tuple[Any, ...]], owners: List[Tuple[str, str]]) -> None:
+        """Insert a batch in a single transaction (runs on the writer thread)."""
+        with self._write_conn:
+            self._write_conn.executemany(_INSERT_OWNER, owners)
+            self._write_conn.executemany(_INSERT, batch)
+
+    async def flush(self) -> None:
+        """Write all pending events to disk."""
+        if not (self._buffer or self._owners) or self._write_conn is None:
+            return
+
+        batch, self._buffer = self._buffer, []
+        owners, self._owners = self._owners, []
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._writer, self._write_batch, batch, owners)
+            self.events_written += len(batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} delivery events: {str(e)}")
+            # Put the batch back in front so ordering is preserved on retry
+            self._buffer[:0] = batch
+            self._owners[:0] = owners
+
+    async def _flush_loop(self) -> None:
+        """Flush on a timer, or early when a full batch is pending."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _query(self, sql: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+        """Run a read query on the reader connection."""
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        return [
+            {
+                "message_id": row["message_id"],
+                "email": row["email"],
+                "event": row["event"],
+                "event_ts": row["event_ts"],
+                "received_at": row["received_at"],
+                "payload": json.loads(row["payload"])
+            }
+            for row in rows
+        ]
+
+    async def get_message_events(self, message_id: str, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get all stored events for a message, oldest first.
+
+        Args:
+            message_id: Brevo message id (with or without angle brackets)
+            tenant: Only return the events if this tenant sent the message
+                (None when API keys are disabled)
+
+        Returns:
+            List of event dicts
+        """
+        if self._read_conn is None:
+            return []
+        message_id = normalize_message_id(message_id)
+        if tenant is None:
+            return await asyncio.to_thread(
+                self._query,
+                "SELECT * FROM events WHERE message_id = ? ORDER BY id",
+                (message_id,)
+            )
+        return await asyncio.to_thread(
+            self._query,
+            "SELECT e.* FROM events e JOIN message_owners o ON o.message_id = e.message_id "
+            "WHERE e.message_id = ? AND o.tenant = ? ORDER BY e.id",
+            (message_id, tenant)
+        )
+
+    async def get_recipient_events(
+        self,
+        email: str,
+        limit: int = 100,
+        tenant: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the most recent events for a recipient, newest first.
+
+        Args:
+            email: Recipient email address
+            limit: Maximum number of events to return
+            tenant: Only return events of messages this tenant sent
+                (None when API keys are disabled)
+
+        Returns:
+            List of event dicts
+        """
+        if self._read_conn is None:
+            return []
+        email = email.strip().lower()
+        if tenant is None:
+            return await asyncio.to_thread(
+                self._query,
+                "SELECT * FROM events WHERE email = ? ORDER BY id DESC LIMIT ?",
+                (email, limit)
+            )
+        return await asyncio.to_thread(
+            self._query,
+            "SELECT e.* FROM events e JOIN message_owners o ON o.message_id = e.message_id "
+            "WHERE e.email = ? AND o.tenant = ? ORDER BY e.id DESC LIMIT ?",
+            (email, tenant, limit)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return ingestion counters."""
+        return {
+            "events_received": self.events_received,
+            "events_written": self.events_written,
+            "events_pending": len(self._buffer)
+        }
+
+
+event_store = DeliveryEventStore(
+    path=settings.EVENT_STORE_PATH,
+    flush_interval=settings.EVENT_FLUSH_INTERVAL,
+    batch_size=settings.EVENT_FLUSH_BATCH_SIZE,
+    buffer_max=settings.EVENT_BUFFER_MAX
+)
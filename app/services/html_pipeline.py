@@ -0,0 +1,453 @@
+"""
+HTML body processing: sanitize, inline CSS, minify and derive a plain-text
+alternative. Built on the standard library HTML parser.
+"""
+
+import asyncio
+import hashlib
+import html
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Token = Tuple[Any, ...]
+Attrs = List[Tuple[str, Optional[str]]]
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "source", "track", "wbr",
+}
+# Dropped together with everything inside them
+DROPPED_TAGS = {"script", "iframe", "object", "embed", "applet", "frame", "frameset", "noscript"}
+# Any attribute ending in "href" (e.g. xlink:href) is treated as a URL too
+URL_ATTRIBUTES = {"href", "src", "action", "background", "formaction", "poster"}
+UNSAFE_URL = re.compile(r"^(javascript|vbscript|data(?!:image/)):", re.IGNORECASE)
+# Browsers ignore control characters and whitespace inside a URL scheme
+URL_IGNORED_CHARS = re.compile(r"[\x00-\x20\x7f]+")
+CSS_DECLARATION = re.compile(r"[^;{}]+")
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_ESCAPE = re.compile(r"\\(?:([0-9a-fA-F]{1,6})\s?|(.))", re.DOTALL)
+CSS_UNSAFE = re.compile(
+    r"expression\(|-moz-binding|behavior:|javascript:|vbscript:|url\(['\"]?data:(?!image/)",
+    re.IGNORECASE
+)
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+# Whitespace-only text directly inside these is insignificant
+STRUCTURAL_TAGS = {"html", "head", "table", "thead", "tbody", "tfoot", "tr", "ul", "ol", "select"}
+TEXT_BLOCK_TAGS = {
+    "p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "table", "tr", "ul", "ol",
+    "blockquote", "section", "header", "footer", "article", "address", "pre",
+}
+TEXT_SKIPPED_TAGS = {"head", "style", "script", "title"}
+
+SIMPLE_SELECTOR = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*)?((?:[.#][-\w]+)*)$")
+WHITESPACE = re.compile(r"\s+")
+
+
+class _Tokenizer(HTMLParser):
+    """Flatten an HTML document into a token list."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens: List[Token] = []
+
+    def handle_starttag(self, tag: str, attrs: Attrs) -> None:
+        self.tokens.append(("start", tag, attrs))
+
+    def handle_startendtag(self, tag: str, attrs: Attrs) -> None:
+        self.tokens.append(("start", tag, attrs))
+        if tag not in VOID_TAGS:
+            self.tokens.append(("end", tag))
+
+    def handle_endtag(self, tag: str) -> None:
+        self.tokens.append(("end", tag))
+
+    def handle_data(self, data: str) -> None:
+        self.tokens.append(("data", data))
+
+    def handle_comment(self, data: str) -> None:
+        self.tokens.append(("comment", data))
+
+    def handle_decl(self, decl: str) -> None:
+        self.tokens.append(("decl", decl))
+
+    def unknown_decl(self, data: str) -> None:
+        self.tokens.append(("decl", data))
+
+
+def _tokenize(source: str) -> List[Token]:
+    tokenizer = _Tokenizer()
+    tokenizer.feed(source)
+    tokenizer.close()
+    return tokenizer.tokens
+
+
+def _is_url_attribute(key: str) -> bool:
+    return key in URL_ATTRIBUTES or key.endswith("href")
+
+
+def _unsafe_url(value: str) -> bool:
+    """Check a URL's scheme the way a browser reads it: entities decoded, tabs and newlines ignored."""
+    return bool(UNSAFE_URL.match(URL_IGNORED_CHARS.sub("", html.unescape(value))))
+
+
+def _css_unescape(match: "re.Match") -> str:
+    if match.group(1):
+        code = int(match.group(1), 16)
+        return chr(code) if 0 < code < 0x110000 else ""
+    return match.group(2)
+
+
+def _unsafe_css(declaration: str) -> bool:
+    normalized = CSS_ESCAPE.sub(_css_unescape, CSS_COMMENT.sub("", html.unescape(declaration)))
+    return bool(CSS_UNSAFE.search(URL_IGNORED_CHARS.sub("", normalized)))
+
+
+def _sanitize_css(css: str) -> str:
+    """Drop declarations that can run script (expression(), bindings, script or data: URLs)."""
+    return CSS_DECLARATION.sub(lambda m: "" if _unsafe_css(m.group()) else m.group(), css)
+
+
+def _sanitize(tokens: List[Token]) -> List[Token]:
+    """Drop active content, event handlers, script URLs and unsafe CSS."""
+    result: List[Token] = []
+    skip_depth = 0
+    skip_tag = None
+    in_style = False
+    for token in tokens:
+        kind = token[0]
+        if skip_depth:
+            if kind == "start" and token[1] == skip_tag:
+                skip_depth += 1
+            elif kind == "end" and token[1] == skip_tag:
+                skip_depth -= 1
+            continue
+
+        if kind == "start":
+            tag, attrs = token[1], token[2]
+            if tag in DROPPED_TAGS:
+                if tag not in VOID_TAGS:
+                    skip_depth, skip_tag = 1, tag
+                continue
+            if tag == "base" or (
+                tag == "meta" and any(k == "http-equiv" and (v or "").lower() == "refresh" for k, v in attrs)
+            ):
+                continue
+            attrs = [
+                (key, _sanitize_css(value) if key == "style" and value else value) for key, value in attrs
+                if not key.startswith("on")
+                and not (_is_url_attribute(key) and value and _unsafe_url(value))
+            ]
+            in_style = tag == "style"
+            result.append(("start", tag, attrs))
+        elif kind == "end" and token[1] in DROPPED_TAGS:
+            continue
+        elif kind == "data" and in_style:
+            result.append(("data", _sanitize_css(token[1])))
+        elif kind == "end":
+            in_style = False
+            result.append(token)
+        else:
+            result.append(token)
+    return result
+
+
+def _parse_declarations(block: str) -> Dict[str, str]:
+    declarations = {}
+    for declaration in block.split(";"):
+        prop, sep, value = declaration.partition(":")
+        if sep and prop.strip() and value.strip():
+            declarations[prop.strip().lower()] = WHITESPACE.sub(" ", value.strip())
+    return declarations
+
+
+def _parse_css(css: str) -> Tuple[List[Tuple[Tuple[int, int, int, int], Tuple[str, ...], Dict[str, str]]], str]:
+    """
+    Split a stylesheet into inlinable rules and CSS that has to stay in a
+    <style> block (at-rules, pseudo-classes, combinators).
+
+    Returns:
+        Tuple of (rules, retained_css); each rule is
+        ((ids, classes, tags, order), (tag, classes..., ids...), declarations)
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    rules = []
+    retained = []
+    position, order = 0, 0
+    while True:
+        brace = css.find("{", position)
+        if brace == -1:
+            break
+        selector_text = css[position:brace].strip()
+
+        if selector_text.startswith("@"):
+            # Keep the whole at-rule, including nested blocks
+            depth, end = 1, brace + 1
+            while depth and end < len(css):
+                depth += {"{": 1, "}": -1}.get(css[end], 0)
+                end += 1
+            retained.append(css[position:end].strip())
+            position = end
+            continue
+
+        close = css.find("}", brace)
+        if close == -1:
+            break
+        block = css[brace + 1:close]
+        position = close + 1
+
+        unsupported = []
+        for selector in selector_text.split(","):
+            selector = selector.strip()
+            match = SIMPLE_SELECTOR.match(selector)
+            if not selector or not match:
+                unsupported.append(selector)
+                continue
+            tag = (match.group(1) or "").lower()
+            parts = re.findall(r"[.#][-\w]+", match.group(2))
+            classes = tuple(part[1:] for part in parts if part[0] == ".")
+            ids = tuple(part[1:] for part in parts if part[0] == "#")
+            specificity = (len(ids), len(classes), 1 if tag else 0, order)
+            rules.append((specificity, (tag, classes, ids), _parse_declarations(block)))
+            order += 1
+        if unsupported:
+            retained.append(f"{','.join(unsupported)}{{{block.strip()}}}")
+
+    rules.sort(key=lambda rule: rule[0])
+    return rules, "".join(retained)
+
+
+def _inline_css(tokens: List[Token]) -> List[Token]:
+    """Move <style> rules with simple selectors into style attributes."""
+    css_parts = []
+    result: List[Token] = []
+    in_style = False
+    style_index = None
+    for token in tokens:
+        if token[0] == "start" and token[1] == "style":
+            in_style = True
+            if style_index is None:
+                style_index = len(result)
+            continue
+        if token[0] == "end" and token[1] == "style":
+            in_style = False
+            continue
+        if in_style:
+            if token[0] == "data":
+                css_parts.append(token[1])
+            continue
+        result.append(token)
+
+    if not css_parts:
+        return result
+
+    rules, retained = _parse_css("\n".join(css_parts))
+    if rules:
+        for index, token in enumerate(result):
+            if token[0] != "start":
+                continue
+            tag, attrs = token[1], token[2]
+            attr_map = dict(attrs)
+            element_classes = set((attr_map.get("class") or "").split())
+            element_id = attr_map.get("id")
+
+            merged: Dict[str, str] = {}
+            for _, (rule_tag, classes, ids), declarations in rules:
+                if rule_tag and rule_tag != tag:
+                    continue
+                if any(c not in element_classes for c in classes):
+                    continue
+                if any(i != element_id for i in ids):
+                    continue
+                merged.update(declarations)
+            if not merged:
+                continue
+
+            # Declarations already on the element win over stylesheet rules
+            merged.update(_parse_declarations(attr_map.get("style") or ""))
+            style = ";".join(f"{prop}:{value}" for prop, value in merged.items())
+            attrs = [(k, v) for k, v in attrs if k != "style"] + [("style", style)]
+            result[index] = ("start", tag, attrs)
+
+    if retained:
+        result[style_index:style_index] = [("start", "style", []), ("raw", retained), ("end", "style")]
+    return result
+
+
+def _serialize(tokens: List[Token], minify: bool = True) -> str:
+    """Render tokens back to HTML, compacting it when minify is set."""
+    out: List[str] = []
+    stack: List[str] = []
+    for token in tokens:
+        kind = token[0]
+        if kind == "start":
+            tag, attrs = token[1], token[2]
+            rendered = "".join(
+                f" {key}" if value is None else f' {key}="{html.escape(value, quote=True)}"'
+                for key, value in attrs
+            )
+            out.append(f"<{tag}{rendered}>")
+            if tag not in VOID_TAGS:
+                stack.append(tag)
+        elif kind == "end":
+            tag = token[1]
+            if tag in VOID_TAGS:
+                continue
+            out.append(f"</{tag}>")
+            if tag in stack:
+                while stack and stack.pop() != tag:
+                    pass
+        elif kind == "data" and stack and stack[-1] == "style":
+            out.append(token[1])
+        elif kind == "data":
+            text = token[1]
+            if minify and not any(tag in PRESERVE_WHITESPACE_TAGS for tag in stack):
+                if not text.strip() and (not stack or stack[-1] in STRUCTURAL_TAGS):
+                    continue
+                text = WHITESPACE.sub(" ", text)
+            out.append(html.escape(text, quote=False))
+        elif kind == "raw":
+            out.append(token[1])
+        elif kind == "comment":
+            # Keep Outlook conditional comments, drop the rest
+            if not minify or token[1].startswith("[if") or token[1].startswith("<![endif"):
+                out.append(f"<!--{token[1]}-->")
+        elif kind == "decl":
+            out.append(f"<!{token[1]}>")
+    return "".join(out)
+
+
+def _to_text(tokens: List[Token]) -> str:
+    """Render tokens as a readable plain-text alternative."""
+    out: List[str] = []
+    skip_depth = 0
+    pre_depth = 0
+    links: List[Optional[str]] = []
+    for token in tokens:
+        kind = token[0]
+        if kind == "start":
+            tag, attrs = token[1], dict(token[2])
+            if tag in TEXT_SKIPPED_TAGS:
+                skip_depth += 1
+            elif tag == "br":
+                out.append("\n")
+            elif tag == "hr":
+                out.append("\n\n---\n\n")
+            elif tag == "li":
+                out.append("\n- ")
+            elif tag in ("td", "th"):
+                out.append(" ")
+            elif tag == "img" and attrs.get("alt"):
+                out.append(attrs["alt"])
+            elif tag == "a":
+                links.append(attrs.get("href"))
+            elif tag in TEXT_BLOCK_TAGS:
+                out.append("\n\n")
+                if tag == "pre":
+                    pre_depth += 1
+        elif kind == "end":
+            tag = token[1]
+            if tag in TEXT_SKIPPED_TAGS:
+                skip_depth = max(0, skip_depth - 1)
+            elif tag == "a" and links:
+                href = links.pop()
+                if href and not href.startswith("#"):
+                    target = href[7:] if href.startswith("mailto:") else href
+                    label = out[-1].strip() if out else ""
+                    if target != label:
+                        out.append(f" ({target})")
+            elif tag in TEXT_BLOCK_TAGS:
+                out.append("\n\n")
+                if tag == "pre":
+                    pre_depth = max(0, pre_depth - 1)
+        elif kind == "data" and not skip_depth:
+            if pre_depth:
+                out.append(token[1])
+                continue
+            text = WHITESPACE.sub(" ", token[1])
+            if not out or out[-1].endswith("\n") or out[-1].endswith("- "):
+                text = text.lstrip()
+            if text:
+                out.append(text)
+
+    text = "\n".join(line.rstrip() for line in "".join(out).split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def process_html(source: str, inline_css: bool = True, minify: bool = True) -> Tuple[str, str]:
+    """
+    Run the full pipeline on an HTML body.
+
+    Args:
+        source: Raw HTML from the client
+        inline_css: Move simple <style> rules into style attributes
+        minify: Collapse whitespace and drop comments
+
+    Returns:
+        Tuple of (processed_html, plain_text)
+    """
+    tokens = _sanitize(_tokenize(source))
+    if inline_css:
+        tokens = _inline_css(tokens)
+    return _serialize(tokens, minify), _to_text(tokens)
+
+
+class HtmlPipeline:
+    """
+    Processes HTML bodies in a worker thread with results cached by content
+    hash, so campaign sends with identical bodies are processed once.
+    """
+
+    # Bodies below this size are processed inline; a thread hop costs more
+    INLINE_THRESHOLD = 16 * 1024
+
+    def __init__(self):
+        """Initialize the pipeline from settings."""
+        self.enabled = settings.HTML_PIPELINE_ENABLED
+        self.inline_css = settings.HTML_INLINE_CSS
+        self.minify = settings.HTML_MINIFY
+        self.cache = LRUCache(
+            max_entries=settings.HTML_CACHE_MAX_ENTRIES,
+            max_bytes=settings.HTML_CACHE_MAX_BYTES,
+            sizeof=lambda result: len(result[0]) + len(result[1])
+        )
+
+    async def process(self, body_html: str) -> Tuple[str, str]:
+        """
+        Process an HTML body.
+
+        Args:
+            body_html: Raw HTML from the client
+
+        Returns:
+            Tuple of (processed_html, plain_text); the HTML is returned
+            unchanged when the pipeline is disabled
+        """
+        if not self.enabled:
+            return body_html, _to_text(_tokenize(body_html))
+
+        key = hashlib.sha256(body_html.encode("utf-8")).digest()
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+
+        if len(body_html) < self.INLINE_THRESHOLD:
+            result = process_html(body_html, self.inline_css, self.minify)
+        else:
+            result = await asyncio.to_thread(process_html, body_html, self.inline_css, self.minify)
+        self.cache.set(key, result)
+        logger.info(f"Processed HTML body: {len(body_html)} -> {len(result[0])} chars")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        return {"enabled": self.enabled, "cache": self.cache.stats()}
+
+
+html_pipeline = HtmlPipeline()
@@ -0,0 +1,286 @@
+"""
+On-demand profiling of a running worker: sampled CPU stacks, cProfile,
+tracemalloc diffs and event-loop stall detection.
+
+Nothing here runs until a profile is requested; every hook (sampler
+thread, cProfile, tracemalloc, loop watchdog) is installed for the
+requested window only and removed afterwards.
+"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS = 20
+MAX_STALLS = 200
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _collapse(frame, prefix: str) -> str:
+    """Render a frame's stack root-first in collapsed-stack form."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame).replace(";", ":"))
+        frame = frame.f_back
+    labels.append(prefix)
+    return ";".join(reversed(labels))
+
+
+def _format_stack(frame) -> str:
+    lines = []
+    while frame is not None:
+        lines.append(f"  {frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return "\n".join(reversed(lines))
+
+
+class ProfileResult:
+    """A finished (or running) profiling job and its downloadable output."""
+
+    def __init__(self, kind: str, seconds: float, filename: str, media_type: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.seconds = seconds
+        self.filename = filename
+        self.media_type = media_type
+        self.status = "running"
+        self.started = time.time()
+        self.data: bytes = b""
+        self.summary: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "seconds": self.seconds,
+            "started": self.started,
+            "pid": os.getpid(),
+            "filename": self.filename,
+            "size": len(self.data),
+            "summary": self.summary,
+            "error": self.error,
+        }
+
+
+class Profiler:
+    """Runs one profiling job at a time and keeps recent results for download."""
+
+    KINDS = ("cpu", "pstats", "memory", "stalls")
+
+    def __init__(self):
+        """Initialize the profiler from settings."""
+        self.max_seconds = settings.PROFILE_MAX_SECONDS
+        self.sample_interval = settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        self.stall_threshold = settings.LOOP_STALL_THRESHOLD_MS / 1000
+        self.results: "OrderedDict[str, ProfileResult]" = OrderedDict()
+        self._running: Optional[ProfileResult] = None
+        self._tasks: set = set()
+
+    @property
+    def busy(self) -> bool:
+        return self._running is not None
+
+    def start(self, kind: str, seconds: float) -> ProfileResult:
+        """
+        Start a profiling job in the background.
+
+        Args:
+            kind: cpu (sampled collapsed stacks), pstats (cProfile of the
+                event-loop thread), memory (tracemalloc diff) or stalls
+                (event-loop stall stacks)
+            seconds: Profiling window, capped at PROFILE_MAX_SECONDS
+
+        Returns:
+            The running job
+
+        Raises:
+            ValueError: On an unknown kind
+            RuntimeError: If another job is already running
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown profile kind '{kind}', expected one of {list(self.KINDS)}")
+        if self._running is not None:
+            raise RuntimeError(f"Profile {self._running.id} is already running")
+
+        seconds = max(0.1, min(seconds, self.max_seconds))
+        filename, media_type = {
+            "cpu": ("cpu.collapsed.txt", "text/plain"),
+            "pstats": ("cpu.pstats", "application/octet-stream"),
+            "memory": ("memory-diff.txt", "text/plain"),
+            "stalls": ("loop-stalls.txt", "text/plain"),
+        }[kind]
+        result = ProfileResult(kind, seconds, filename, media_type)
+        self._running = result
+        self.results[result.id] = result
+        while len(self.results) > MAX_RESULTS:
+            self.results.popitem(last=False)
+
+        task = asyncio.create_task(self._run(result))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Started {kind} profile {result.id} for {seconds:.1f}s")
+        return result
+
+    async def _run(self, result: ProfileResult) -> None:
+        runner = {
+            "cpu": self._sample_cpu,
+            "pstats": self._cprofile,
+            "memory": self._memory_diff,
+            "stalls": self._loop_stalls,
+        }[result.kind]
+        try:
+            await runner(result)
+            result.status = "done"
+            logger.info(f"Profile {result.id} finished: {result.summary}")
+        except Exception as e:
+            result.status = "failed"
+            result.error = repr(e)
+            logger.error(f"Profile {result.id} failed: {e!r}")
+        finally:
+            self._running = None
+
+    async def _sample_cpu(self, result: ProfileResult) -> None:
+        """Sample every thread's stack from a helper thread."""
+        counts: Counter = Counter()
+        stop = threading.Event()
+
+        def sample() -> None:
+            own = threading.get_ident()
+            while not stop.wait(self.sample_interval):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != own:
+                        counts[_collapse(frame, names.get(ident, str(ident)))] += 1
+
+        sampler = threading.Thread(target=sample, name="profiler-sampler", daemon=True)
+        sampler.start()
+        try:
+            await asyncio.sleep(result.seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+
+        result.data = "".join(f"{stack} {count}\n" for stack, count in counts.most_common()).encode("utf-8")
+        result.summary = {"samples": sum(counts.values()), "unique_stacks": len(counts)}
+
+    async def _cprofile(self, result: ProfileResult) -> None:
+        """Deterministic profile of everything that runs on the event-loop thread."""
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(result.seconds)
+        finally:
+            profile.disable()
+        profile.create_stats()
+        result.data = marshal.dumps(profile.stats)
+        result.summary = {"functions": len(profile.stats)}
+
+    async def _memory_diff(self, result: ProfileResult, top: int = 50) -> None:
+        """Compare tracemalloc snapshots taken at the start and end of the window."""
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(25)
+        try:
+            before = tracemalloc.take_snapshot()
+            await asyncio.sleep(result.seconds)
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+        stats = after.compare_to(before, "traceback")
+        out = io.StringIO()
+        growth = sum(stat.size_diff for stat in stats)
+        out.write(f"Total change: {growth / 1024:+.1f} KiB over {result.seconds:.1f}s\n\n")
+        for stat in stats[:top]:
+            out.write(f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks), "
+                      f"now {stat.size / 1024:.1f} KiB\n")
+            for line in stat.traceback.format(limit=8):
+                out.write(f"  {line}\n")
+            out.write("\n")
+        result.data = out.getvalue().encode("utf-8")
+        result.summary = {"total_change_kib": round(growth / 1024, 1), "sites": len(stats)}
+
+    async def _loop_stalls(self, result: ProfileResult) -> None:
+        """
+        Record the event-loop thread's stack whenever the loop fails to run
+        a heartbeat callback for longer than LOOP_STALL_THRESHOLD_MS.
+        """
+        loop = asyncio.get_running_loop()
+        loop_thread = threading.get_ident()
+        interval = min(0.02, self.stall_threshold / 4)
+        beat = [time.monotonic()]
+        stop = threading.Event()
+        stalls: List[Dict[str, Any]] = []
+
+        def heartbeat() -> None:
+            beat[0] = time.monotonic()
+            if not stop.is_set():
+                loop.call_later(interval, heartbeat)
+
+        def watch() -> None:
+            current: Optional[Dict[str, Any]] = None
+            while not stop.wait(interval):
+                lag = time.monotonic() - beat[0]
+                if lag >= self.stall_threshold:
+                    if current is None:
+                        frame = sys._current_frames().get(loop_thread)
+                        current = {
+                            "at": time.time(),
+                            "stack": _format_stack(frame),
+                            "collapsed": _collapse(frame, "event-loop") if frame else "event-loop",
+                        }
+                    current["ms"] = lag * 1000
+                elif current is not None:
+                    if len(stalls) < MAX_STALLS:
+                        stalls.append(current)
+                    current = None
+            if current is not None and len(stalls) < MAX_STALLS:
+                stalls.append(current)
+
+        loop.call_soon(heartbeat)
+        watcher = threading.Thread(target=watch, name="profiler-loop-watchdog", daemon=True)
+        watcher.start()
+        try:
+            await asyncio.sleep(result.seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(watcher.join)
+
+        out = io.StringIO()
+        out.write(f"{len(stalls)} stall(s) over {self.stall_threshold * 1000:.0f} ms "
+                  f"in {result.seconds:.1f}s\n\n")
+        for stall in sorted(stalls, key=lambda s: -s["ms"]):
+            stamp = time.strftime("%H:%M:%S", time.localtime(stall["at"]))
+            out.write(f"[{stamp}] blocked ~{stall['ms']:.0f} ms\n{stall['stack']}\n\n")
+        out.write("# collapsed stacks weighted by ms\n")
+        for stall in stalls:
+            out.write(f"{stall['collapsed']} {int(stall['ms'])}\n")
+        result.data = out.getvalue().encode("utf-8")
+        result.summary = {
+            "stalls": len(stalls),
+            "worst_ms": round(max((s["ms"] for s in stalls), default=0.0), 1),
+        }
+
+
+profiler = Profiler()
@@ -0,0 +1,236 @@
+"""
+Versioned prompt templates and token budgeting for AI body generation.
+"""
+
+import json
+import logging
+import math
+import re
+from string import Formatter
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import PromptError
+
+logger = logging.getLogger(__name__)
+
+TONES = {
+    "professional": "professional yet friendly",
+    "friendly": "warm, friendly",
+    "formal": "formal",
+    "casual": "casual",
+    "persuasive": "persuasive",
+}
+
+# length -> (instruction, max output tokens)
+LENGTHS = {
+    "short": ("1 short paragraph", 512),
+    "medium": ("2-3 paragraphs", 1024),
+    "long": ("4-5 paragraphs", 2048),
+}
+
+DEFAULT_TONE = "professional"
+DEFAULT_LENGTH = "medium"
+DEFAULT_LANGUAGE = "English"
+# Language names only: the value is interpolated into the prompt
+LANGUAGE_PATTERN = re.compile(r"[A-Za-z -]{2,32}")
+
+# The original inline prompt, kept so deployments can pin it
+LEGACY_PROMPT = """You are an expert email writer. Write a complete, professional email body based ONLY on this subject: "{subject}"
+
+CRITICAL: The email body MUST be directly related to and expand upon the subject line "{subject}".
+
+Instructions:
+1. Start with an appropriate greeting (e.g., "Hi," or "Hello,")
+2. Write 2-4 paragraphs that are SPECIFICALLY about "{subject}"
+3. The content must logically follow from the subject line
+4. Use a professional yet friendly tone
+5. End with an appropriate closing (e.g., "Best regards," or "Thanks,")
+6. Do NOT repeat the subject line in the body
+7. Do NOT write generic content - make it specific to "{subject}"
+
+Example: If subject is "Trip Tomorrow", write about the trip happening tomorrow - details, reminders, plans, etc.
+
+Now write the email body:"""
+
+COMPACT_PROMPT = (
+    "Write the body of a {tone} email about: {subject}\n"
+    "Use {length}, start with a greeting, end with a sign-off, stay specific "
+    "to the subject and do not repeat it.{language} Reply with the body only."
+)
+
+BUILTIN_TEMPLATES = {
+    "email_body": {
+        "v1": LEGACY_PROMPT,
+        "v2": COMPACT_PROMPT,
+    },
+}
+
+_WORD = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of ``text`` without calling the model.
+
+    Takes the larger of a characters/4 and a words-and-punctuation count,
+    a rough approximation of Gemini's tokenizer that errs on the high side.
+
+    Args:
+        text: Prompt or completion text
+
+    Returns:
+        Estimated number of tokens
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), len(_WORD.findall(text)))
+
+
+class PromptTemplate:
+    """A named, versioned prompt with its placeholders parsed once at load."""
+
+    FIELDS = {"subject", "tone", "length", "language"}
+
+    def __init__(self, name: str, version: str, text: str):
+        """
+        Args:
+            name: Template name
+            version: Template version
+            text: ``str.format`` template using subject/tone/length/language
+
+        Raises:
+            PromptError: If the template uses unknown placeholders or no subject
+        """
+        fields = {field for _, field, _, _ in Formatter().parse(text) if field is not None}
+        unknown = fields - self.FIELDS
+        if unknown or "subject" not in fields:
+            raise PromptError(
+                f"Prompt template {name}/{version} must use {{subject}} and only "
+                f"{sorted(self.FIELDS)}; got {sorted(fields)}"
+            )
+        self.name = name
+        self.version = version
+        self.text = text
+
+    def render(self, **values: str) -> str:
+        return self.text.format_map(values)
+
+
+class RenderedPrompt(NamedTuple):
+    """A prompt ready to send, with its budgets and cache variant key."""
+    text: str
+    input_tokens: int
+    max_output_tokens: int
+    variant: str
+
+
+class PromptRegistry:
+    """
+    Loads prompt templates once and renders them per request.
+
+    Built-in templates can be overridden or extended with a JSON file
+    (``PROMPT_TEMPLATES_FILE``) of the form
+    ``{"email_body": {"v3": "... {subject} ..."}}``.
+    """
+
+    def __init__(self, templates: Dict[str, Dict[str, str]], default_version: str,
+                 max_input_tokens: int, max_output_tokens: int):
+        """
+        Args:
+            templates: Template text by name and version
+            default_version: Version used when a request does not pick one
+            max_input_tokens: Upper bound on estimated prompt tokens
+            max_output_tokens: Upper bound on requested completion tokens
+        """
+        self._templates: Dict[Tuple[str, str], PromptTemplate] = {}
+        for name, versions in templates.items():
+            for version, text in versions.items():
+                self._templates[(name, version)] = PromptTemplate(name, version, text)
+        self.default_version = default_version
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+
+        if ("email_body", default_version) not in self._templates:
+            raise PromptError(f"Unknown default prompt version: {default_version}")
+
+    @classmethod
+    def from_settings(cls) -> "PromptRegistry":
+        """Build the registry from built-in templates and PROMPT_TEMPLATES_FILE."""
+        templates = {name: dict(versions) for name, versions in BUILTIN_TEMPLATES.items()}
+        if settings.PROMPT_TEMPLATES_FILE:
+            with open(settings.PROMPT_TEMPLATES_FILE, encoding="utf-8") as fh:
+                for name, versions in json.load(fh).items():
+                    templates.setdefault(name, {}).update(versions)
+        registry = cls(
+            templates,
+            default_version=settings.PROMPT_TEMPLATE_VERSION,
+            max_input_tokens=settings.AI_MAX_INPUT_TOKENS,
+            max_output_tokens=settings.AI_MAX_OUTPUT_TOKENS
+        )
+        logger.info(f"Loaded {len(registry._templates)} prompt templates (default {registry.default_version})")
+        return registry
+
+    def render(
+        self,
+        subject: str,
+        tone: Optional[str] = None,
+        length: Optional[str] = None,
+        language: Optional[str] = None,
+        version: Optional[str] = None,
+        name: str = "email_body"
+    ) -> RenderedPrompt:
+        """
+        Render a prompt and check it against the token budgets.
+
+        Args:
+            subject: Email subject
+            tone: One of TONES (default professional)
+            length: One of LENGTHS (default medium)
+            language: Language name to write in, letters, spaces and hyphens
+                only (default English)
+            version: Template version (default PROMPT_TEMPLATE_VERSION)
+            name: Template name
+
+        Returns:
+            Rendered prompt with budgets and cache variant key
+
+        Raises:
+            PromptError: On unknown options or if a budget would be exceeded
+        """
+        tone = tone or DEFAULT_TONE
+        length = length or DEFAULT_LENGTH
+        language = " ".join((language or DEFAULT_LANGUAGE).split())
+        version = version or self.default_version
+
+        template = self._templates.get((name, version))
+        if template is None:
+            raise PromptError(f"Unknown prompt template: {name}/{version}")
+        if tone not in TONES:
+            raise PromptError(f"Unknown tone '{tone}', expected one of {sorted(TONES)}")
+        if length not in LENGTHS:
+            raise PromptError(f"Unknown length '{length}', expected one of {sorted(LENGTHS)}")
+        if not LANGUAGE_PATTERN.fullmatch(language):
+            raise PromptError("Language must be 2-32 letters, spaces or hyphens (e.g. 'Brazilian Portuguese')")
+
+        length_text, output_tokens = LENGTHS[length]
+        if output_tokens > self.max_output_tokens:
+            output_tokens = self.max_output_tokens
+
+        text = template.render(
+            subject=subject,
+            tone=TONES[tone],
+            length=length_text,
+            language="" if language.lower() == DEFAULT_LANGUAGE.lower() else f" Write it in {language}."
+        )
+        input_tokens = estimate_tokens(text)
+        if input_tokens > self.max_input_tokens:
+            raise PromptError(
+                f"Prompt would use ~{input_tokens} input tokens, budget is {self.max_input_tokens}"
+            )
+
+        variant = f"{name}/{version}|{tone}|{length}|{language.lower()}"
+        return RenderedPrompt(text, input_tokens, output_tokens, variant)
+
+
+prompt_registry = PromptRegistry.from_settings()
@@ -0,0 +1,245 @@
+"""
+Per-tenant usage counters kept in memory and flushed to SQLite in batches.
+"""
+
+import asyncio
+import calendar
+import logging
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_counters (
+    tenant TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    period TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (tenant, kind, period)
+);
+"""
+
+_UPSERT = (
+    "INSERT INTO usage_counters (tenant, kind, period, count) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (tenant, kind, period) DO UPDATE SET count = count + excluded.count"
+)
+
+CounterKey = Tuple[str, str, str]
+
+
+def current_periods(now: Optional[float] = None) -> Tuple[str, str]:
+    """
+    Get the daily and monthly period labels (UTC) for a timestamp.
+
+    Args:
+        now: Unix timestamp, defaults to the current time
+
+    Returns:
+        Tuple of (daily, monthly) labels, e.g. ("d:2024-01-31", "m:2024-01")
+    """
+    t = time.gmtime(now)
+    return time.strftime("d:%Y-%m-%d", t), time.strftime("m:%Y-%m", t)
+
+
+def seconds_until_reset(period: str, now: Optional[float] = None) -> int:
+    """Seconds until a daily or monthly period rolls over (UTC)."""
+    now = time.time() if now is None else now
+    t = time.gmtime(now)
+    if period.startswith("d:"):
+        return 86400 - (t.tm_hour * 3600 + t.tm_min * 60 + t.tm_sec)
+    year, month = (t.tm_year + 1, 1) if t.tm_mon == 12 else (t.tm_year, t.tm_mon + 1)
+    next_month = calendar.timegm((year, month, 1, 0, 0, 0))
+    return max(1, int(next_month - now))
+
+
+class QuotaStore:
+    """
+    Usage counters for quota enforcement.
+
+    Checks and increments happen purely in memory. Increments are also
+    accumulated as pending deltas that a background task adds to SQLite
+    every ``flush_interval`` seconds, so a request never waits on disk.
+    Deltas (rather than absolute values) are written so several workers can
+    share one database without overwriting each other's counts.
+
+    Each flush also reads back the stored totals, so a worker sees the
+    usage of the other workers sharing the database at most one flush
+    interval late. Limits are therefore enforced per worker between
+    flushes: with N workers a tenant can overshoot a quota by up to what
+    the other N-1 workers counted since their last flush.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0):
+        """Initialize the store (the database is opened on start)."""
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self._counts: Dict[CounterKey, int] = defaultdict(int)
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quota-writer")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._periods = current_periods()
+
+    def _open(self) -> None:
+        """Open the database and load counters for the current periods."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        rows = self._conn.execute(
+            "SELECT tenant, kind, period, count FROM usage_counters WHERE period IN (?, ?)",
+            self._periods
+        ).fetchall()
+        for tenant, kind, period, count in rows:
+            self._counts[(tenant, kind, period)] = count
+
+    def _close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def start(self) -> None:
+        """Open the database and start the background flush task."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._open)
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Quota store started at {self.path}")
+
+    async def stop(self) -> None:
+        """Stop the flush task, write out pending deltas and close the database."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._close)
+
+    def _roll_periods(self) -> Tuple[str, str]:
+        """Drop in-memory counters of periods that have ended."""
+        periods = current_periods()
+        if periods != self._periods:
+            self._periods = periods
+            self._counts = defaultdict(int, {
+                key: count for key, count in self._counts.items() if key[2] in periods
+            })
+        return periods
+
+    @property
+    def periods(self) -> Tuple[str, str]:
+        """Daily and monthly periods the last ``consume`` counted against."""
+        return self._periods
+
+    def consume(self, tenant: str, kind: str, daily_limit: int, monthly_limit: int) -> Optional[str]:
+        """
+        Count one unit of usage if it fits in the tenant's quotas.
+
+        Args:
+            tenant: Tenant id
+            kind: Usage kind ("send" or "ai")
+            daily_limit: Daily quota (0 means unlimited)
+            monthly_limit: Monthly quota (0 means unlimited)
+
+        Returns:
+            None if the usage was counted, otherwise the label of the
+            exhausted period (nothing is counted in that case)
+        """
+        daily, monthly = self._roll_periods()
+        daily_key, monthly_key = (tenant, kind, daily), (tenant, kind, monthly)
+
+        if daily_limit and self._counts[daily_key] >= daily_limit:
+            return daily
+        if monthly_limit and self._counts[monthly_key] >= monthly_limit:
+            return monthly
+
+        for key in (daily_key, monthly_key):
+            self._counts[key] += 1
+            self._pending[key] += 1
+        return None
+
+    def refund(self, tenant: str, kind: str, periods: Tuple[str, str]) -> None:
+        """
+        Give back one unit of usage counted by ``consume``, e.g. because the
+        request failed before anything was sent.
+
+        Args:
+            tenant: Tenant id
+            kind: Usage kind ("send" or "ai")
+            periods: ``periods`` as it was right after the usage was counted
+        """
+        for period in periods:
+            key = (tenant, kind, period)
+            # Periods that have rolled over are no longer held in memory
+            if period in self._periods:
+                self._counts[key] -= 1
+            self._pending[key] -= 1
+
+    def _write(self, deltas: Dict[CounterKey, int], periods: Tuple[str, str]) -> List[Tuple[str, str, str, int]]:
+        """
+        Add deltas to the stored counters in one transaction.
+
+        Returns:
+            Stored counters of ``periods``, including other workers' usage
+        """
+        with self._conn:
+            self._conn.executemany(
+                _UPSERT,
+                [(tenant, kind, period, count) for (tenant, kind, period), count in deltas.items() if count]
+            )
+        return self._conn.execute(
+            "SELECT tenant, kind, period, count FROM usage_counters WHERE period IN (?, ?)",
+            periods
+        ).fetchall()
+
+    async def flush(self) -> None:
+        """Write pending deltas to disk and pick up other workers' usage."""
+        if self._conn is None:
+            return
+
+        deltas, self._pending = self._pending, defaultdict(int)
+        periods = self._periods
+        loop = asyncio.get_running_loop()
+        try:
+            rows = await loop.run_in_executor(self._writer, self._write, deltas, periods)
+        except Exception as e:
+            logger.error(f"Failed to flush usage counters: {str(e)}")
+            for key, count in deltas.items():
+                self._pending[key] += count
+            return
+
+        if periods != self._periods:
+            return
+        # Usage counted while the write ran is still pending, so add it back
+        for tenant, kind, period, count in rows:
+            key = (tenant, kind, period)
+            self._counts[key] = count + self._pending.get(key, 0)
+
+    async def _flush_loop(self) -> None:
+        """Flush pending deltas on a timer."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+quota_store = QuotaStore(
+    path=settings.QUOTA_STORE_PATH,
+    flush_interval=settings.QUOTA_FLUSH_INTERVAL
+)
@@ -0,0 +1,252 @@
+"""
+Near-duplicate cache for AI-generated email bodies, keyed by subject
+similarity rather than exact text.
+"""
+
+import logging
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_WORD = re.compile(r"\w+(?:'\w+)?")
+# Words that flip a subject's meaning while barely changing its n-grams
+_NEGATIONS = frozenset({
+    "not", "no", "never", "without", "cancel", "cancelled", "canceled", "cancellation",
+    "postponed", "declined", "rejected", "failed", "unpaid", "overdue",
+})
+
+
+def normalize_subject(subject: str) -> str:
+    """Lower-case a subject and strip punctuation and extra whitespace."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", subject.lower())).strip()
+
+
+def salient_tokens(subject: str) -> Tuple[str, ...]:
+    """
+    Tokens that must match exactly for two subjects to share a body:
+    anything containing a digit (order and invoice numbers, dates),
+    capitalized words after the first (names) and negations.
+    """
+    tokens = set()
+    for position, word in enumerate(_WORD.findall(subject)):
+        lower = word.lower()
+        if (
+            any(c.isdigit() for c in word)
+            or lower in _NEGATIONS
+            or lower.endswith("n't")
+            or (position > 0 and word[0].isupper())
+        ):
+            tokens.add(lower)
+    return tuple(sorted(tokens))
+
+
+class SubjectVectorizer:
+    """
+    Hashed character n-gram vectorizer.
+
+    Each word is padded with spaces and split into n-grams, which are hashed
+    into a fixed number of buckets; the counts are L2-normalized so a dot
+    product is the cosine similarity. Word order does not matter, and small
+    spelling or punctuation differences only change a few n-grams.
+    """
+
+    def __init__(self, dimensions: int = 256, ngram: int = 3):
+        self.dimensions = dimensions
+        self.ngram = ngram
+
+    def ngrams(self, normalized: str) -> List[str]:
+        grams = []
+        n = self.ngram
+        for word in normalized.split():
+            padded = f" {word} "
+            grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+        return grams
+
+    def vectorize(self, normalized: str) -> "np.ndarray":
+        """Vectorize an already normalized subject."""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for gram in self.ngrams(normalized):
+            vector[zlib.crc32(gram.encode("utf-8")) % self.dimensions] += 1.0
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector
+
+
+class SemanticCache:
+    """
+    Fixed-capacity nearest-neighbour cache of generated bodies.
+
+    Subject vectors live in one preallocated float32 matrix so a lookup is
+    a single matrix-vector product. When full, the oldest entry is
+    overwritten (ring buffer). Exact repeats skip the vector search.
+
+    Entries are partitioned by a ``variant`` key (tenant, prompt template,
+    tone, length, language) and by the subject's salient tokens (numbers,
+    names, negations), so a fuzzy hit only happens between subjects that
+    agree on all of them: "Invoice #4821" never serves "Invoice #4822".
+
+    Lookups may run in a worker thread while inserts run on the event
+    loop, so both take the same lock.
+    """
+
+    def __init__(self, capacity: int, threshold: float, dimensions: int = 256):
+        """
+        Args:
+            capacity: Maximum number of cached subjects
+            threshold: Minimum cosine similarity for a hit
+            dimensions: Vector size
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self.vectorizer = SubjectVectorizer(dimensions)
+        self._vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self._partition_ids = np.full(capacity, -1, dtype=np.int64)
+        # Partition key -> [id, live entries]; dropped when its last entry is evicted
+        self._partitions: Dict[Tuple[str, Tuple[str, ...]], List[int]] = {}
+        self._slot_partitions: List[Optional[Tuple[str, Tuple[str, ...]]]] = [None] * capacity
+        self._partition_seq = 0
+        self._keys: List[Optional[Tuple[str, str]]] = [None] * capacity
+        self._bodies: List[Optional[str]] = [None] * capacity
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self._lookup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, subject: str, variant: str = "") -> Optional[Tuple[str, float]]:
+        """
+        Find a cached body for a similar subject.
+
+        Args:
+            subject: Email subject
+            variant: Generation options the body must have been produced with
+
+        Returns:
+            Tuple of (body, similarity), or None on a miss
+        """
+        started = time.perf_counter()
+        normalized = normalize_subject(subject)
+        partition = (variant, salient_tokens(subject))
+        vector = self.vectorizer.vectorize(normalized)
+        with self._lock:
+            try:
+                slot = self._exact.get((variant, normalized))
+                if slot is not None:
+                    self.hits += 1
+                    self.exact_hits += 1
+                    return self._bodies[slot], 1.0
+
+                entry = self._partitions.get(partition)
+                if entry is None:
+                    self.misses += 1
+                    return None
+                partition_id = entry[0]
+
+                scores = self._vectors[:self._size] @ vector
+                if len(self._partitions) > 1:
+                    scores[self._partition_ids[:self._size] != partition_id] = -1.0
+                best = int(np.argmax(scores))
+                similarity = float(scores[best])
+                if similarity >= self.threshold:
+                    self.hits += 1
+                    return self._bodies[best], similarity
+
+                self.misses += 1
+                return None
+            finally:
+                self._lookup_seconds += time.perf_counter() - started
+
+    def put(self, subject: str, body: str, variant: str = "") -> None:
+        """
+        Cache a generated body.
+
+        Args:
+            subject: Subject the body was generated for
+            body: Generated body
+            variant: Generation options the body was produced with
+        """
+        normalized = normalize_subject(subject)
+        key = (variant, normalized)
+        if not normalized:
+            return
+        partition = (variant, salient_tokens(subject))
+        vector = self.vectorizer.vectorize(normalized)
+
+        with self._lock:
+            if key in self._exact:
+                return
+            slot = self._next
+            evicted = self._keys[slot]
+            if evicted is not None:
+                self._exact.pop(evicted, None)
+                old = self._partitions[self._slot_partitions[slot]]
+                old[1] -= 1
+                if not old[1]:
+                    del self._partitions[self._slot_partitions[slot]]
+
+            entry = self._partitions.get(partition)
+            if entry is None:
+                entry = self._partitions[partition] = [self._partition_seq, 0]
+                self._partition_seq += 1
+            entry[1] += 1
+
+            self._vectors[slot] = vector
+            self._partition_ids[slot] = entry[0]
+            self._slot_partitions[slot] = partition
+            self._keys[slot] = key
+            self._bodies[slot] = body
+            self._exact[key] = slot
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit rate and average lookup latency."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_lookup_us": round(self._lookup_seconds / lookups * 1e6, 2) if lookups else 0.0,
+        }
+
+
+def create_semantic_cache() -> Optional[SemanticCache]:
+    """Build the cache from settings, or None if it is disabled or numpy is missing."""
+    if not settings.AI_SEMANTIC_CACHE_ENABLED:
+        return None
+    if np is None:
+        logger.warning("AI_SEMANTIC_CACHE_ENABLED is set but numpy is not installed; cache disabled")
+        return None
+    return SemanticCache(
+        capacity=settings.AI_SEMANTIC_CACHE_SIZE,
+        threshold=settings.AI_SEMANTIC_CACHE_THRESHOLD,
+        dimensions=settings.AI_SEMANTIC_CACHE_DIMENSIONS
+    )
+
+
+semantic_cache = create_semantic_cache()
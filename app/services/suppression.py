@@ -0,0 +1,197 @@
+"""
+Suppression list: addresses that must never be sent to again.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from typing import Dict, Any, Iterable, List, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_address(email: str) -> str:
+    """Normalize an email address for suppression matching."""
+    return email.strip().lower()
+
+
+def _fingerprint(email: str) -> int:
+    """Hash a normalized address into a 64-bit fingerprint."""
+    return int.from_bytes(
+        hashlib.blake2b(email.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class SuppressionList:
+    """
+    In-memory suppression index with an append-only log on disk.
+
+    Addresses are never kept in memory: the index is a set of 64-bit
+    fingerprints, so a lookup is one hash plus one set probe. Collisions
+    only become likely around 2**32 entries. The log file stores one
+    ``+address<TAB>reason`` or ``-address`` line per change and is replayed
+    on startup; it is compacted when removals make up a large share of it.
+    """
+
+    def __init__(self, path: str):
+        """Initialize an empty suppression list (the log is read on load)."""
+        self.path = path
+        self._fingerprints: Set[int] = set()
+        self._file_lock = threading.Lock()
+        self._log_lines = 0
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def _index(self, email: str) -> bool:
+        """Add a normalized address to the in-memory index."""
+        fingerprint = _fingerprint(email)
+        if fingerprint in self._fingerprints:
+            return False
+        self._fingerprints.add(fingerprint)
+        return True
+
+    def _unindex(self, email: str) -> bool:
+        """Remove a normalized address from the in-memory index."""
+        fingerprint = _fingerprint(email)
+        if fingerprint not in self._fingerprints:
+            return False
+        self._fingerprints.discard(fingerprint)
+        return True
+
+    def contains(self, email: str) -> bool:
+        """
+        Check whether an address is suppressed.
+
+        Args:
+            email: Email address (any case)
+
+        Returns:
+            True if the address is on the suppression list
+        """
+        return _fingerprint(normalize_address(email)) in self._fingerprints
+
+    def filter(self, emails: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Split addresses into allowed and suppressed, preserving order.
+
+        Args:
+            emails: Addresses to check
+
+        Returns:
+            Tuple of (allowed, suppressed)
+        """
+        allowed, suppressed = [], []
+        for email in emails:
+            (suppressed if self.contains(email) else allowed).append(email)
+        return allowed, suppressed
+
+    def _append_log(self, lines: List[str]) -> None:
+        """Append change lines to the log file (runs in a worker thread)."""
+        with self._file_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            self._log_lines += len(lines)
+
+    async def add(self, emails: Iterable[str], reason: str = "manual") -> int:
+        """
+        Suppress addresses.
+
+        Args:
+            emails: Addresses to suppress
+            reason: Why they are suppressed (hard_bounce, unsubscribed, import, ...)
+
+        Returns:
+            Number of addresses that were not already suppressed
+        """
+        reason = reason.replace("\t", " ").replace("\n", " ")
+        lines = []
+        for email in emails:
+            email = normalize_address(email)
+            if email and "\n" not in email and self._index(email):
+                lines.append(f"+{email}\t{reason}\n")
+
+        if lines:
+            await asyncio.to_thread(self._append_log, lines)
+            logger.info(f"Suppressed {len(lines)} address(es) ({reason})")
+        return len(lines)
+
+    async def remove(self, emails: Iterable[str]) -> int:
+        """
+        Lift suppression for addresses.
+
+        Args:
+            emails: Addresses to remove from the list
+
+        Returns:
+            Number of addresses that were suppressed
+        """
+        lines = []
+        for email in emails:
+            email = normalize_address(email)
+            if email and self._unindex(email):
+                lines.append(f"-{email}\n")
+
+        if lines:
+            await asyncio.to_thread(self._append_log, lines)
+            logger.info(f"Removed {len(lines)} address(es) from suppression list")
+            if self._log_lines > 2 * len(self._fingerprints) + 1000:
+                await asyncio.to_thread(self._compact)
+        return len(lines)
+
+    def _replay(self) -> Dict[str, str]:
+        """Replay the log into an address -> reason mapping."""
+        entries: Dict[str, str] = {}
+        lines = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                line = line.rstrip("\n")
+                if line.startswith("+"):
+                    email, _, reason = line[1:].partition("\t")
+                    entries[email] = reason
+                elif line.startswith("-"):
+                    entries.pop(line[1:], None)
+        self._log_lines = lines
+        return entries
+
+    def _compact(self) -> None:
+        """Rewrite the log with one line per suppressed address."""
+        with self._file_lock:
+            entries = self._replay()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(f"+{email}\t{reason}\n" for email, reason in entries.items())
+            os.replace(tmp_path, self.path)
+            self._log_lines = len(entries)
+        logger.info(f"Compacted suppression log to {len(entries)} entries")
+
+    def _load(self) -> None:
+        """Build the index from the log file (runs in a worker thread)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.path):
+            return
+
+        entries = self._replay()
+        self._fingerprints = {_fingerprint(email) for email in entries}
+
+    async def load(self) -> None:
+        """Load the suppression list from disk."""
+        await asyncio.to_thread(self._load)
+        logger.info(f"Suppression list loaded: {len(self)} address(es)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index size information."""
+        return {
+            "entries": len(self._fingerprints),
+            "log_lines": self._log_lines
+        }
+
+
+suppression_list = SuppressionList(path=settings.SUPPRESSION_LIST_PATH)
@@ -0,0 +1,427 @@
+"""
+Resumable (tus-style) attachment uploads spooled to disk.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+import shutil
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import UploadError
+
+logger = logging.getLogger(__name__)
+
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+class Upload:
+    """State of one resumable upload; the bytes live in an append-only spool file."""
+
+    def __init__(
+        self,
+        filename: str,
+        content_type: str,
+        length: int,
+        owner: Optional[str],
+        path: str,
+        client: Optional[str] = None
+    ):
+        self.id = os.path.basename(path)
+        self.filename = filename
+        self.content_type = content_type
+        self.length = length
+        self.owner = owner
+        self.client = client
+        self.path = path
+        self.offset = 0
+        self.hasher = hashlib.sha256()
+        self.sha256: Optional[str] = None
+        self.created = time.time()
+        self.updated = self.created
+        self.lock = asyncio.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return self.sha256 is not None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "length": self.length,
+            "offset": self.offset,
+            "complete": self.complete,
+            "sha256": self.sha256,
+            "expires_at": self.updated + settings.UPLOAD_EXPIRY,
+        }
+
+
+class UploadStore:
+    """
+    Tracks resumable uploads and their spool files.
+
+    Chunks are appended to the spool file as they stream in and fed to an
+    incremental SHA-256, so finalizing never re-reads the file. A chunk
+    sent with an ``Upload-Checksum`` is rolled back (file truncated, hash
+    restored) if it does not match. Uploads untouched for UPLOAD_EXPIRY
+    seconds are deleted by a background sweeper.
+
+    Each client (tenant, or IP when API keys are disabled) may hold
+    UPLOAD_MAX_ACTIVE uploads, and new uploads are refused once the
+    declared sizes of all held uploads would exceed UPLOAD_MAX_SPOOL_BYTES,
+    so the spool cannot outgrow its budget however the chunks arrive.
+
+    Upload state is kept in memory, so a client must resume against the
+    same worker process. Each process spools into its own subdirectory;
+    directories left by earlier processes are removed once they expire.
+    """
+
+    def __init__(self):
+        """Initialize the store from settings."""
+        self.spool_root = settings.UPLOAD_SPOOL_DIR
+        self.spool_dir = os.path.join(self.spool_root, str(os.getpid()))
+        self.max_bytes = settings.UPLOAD_MAX_BYTES
+        self.expiry = settings.UPLOAD_EXPIRY
+        self.max_active = settings.UPLOAD_MAX_ACTIVE
+        self.max_spool_bytes = settings.UPLOAD_MAX_SPOOL_BYTES
+        self._uploads: Dict[str, Upload] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.expired = 0
+
+    def _get(self, upload_id: str, owner: Optional[str]) -> Upload:
+        upload = self._uploads.get(upload_id)
+        if upload is None or upload.owner != owner:
+            raise UploadError("Upload not found", status_code=404)
+        return upload
+
+    async def create(
+        self,
+        filename: str,
+        content_type: str,
+        length: int,
+        owner: Optional[str],
+        client: Optional[str] = None
+    ) -> Upload:
+        """
+        Start a new upload.
+
+        Args:
+            filename: Attachment filename
+            content_type: Declared MIME type
+            length: Total size in bytes
+            owner: Tenant id (None when API keys are disabled)
+            client: Key the per-client upload cap is counted under
+
+        Returns:
+            The new upload
+
+        Raises:
+            UploadError: 400/413 if the size is invalid or too large, 429 if
+                the client holds too many uploads, 507 if the spool is full
+        """
+        if length <= 0:
+            raise UploadError("Upload-Length must be a positive integer")
+        if length > self.max_bytes:
+            raise UploadError(
+                f"Upload is too large. Max size: {self.max_bytes / 1024 / 1024:.0f} MB", status_code=413
+            )
+        uploads = list(self._uploads.values())
+        if sum(u.client == client for u in uploads) >= self.max_active:
+            raise UploadError(
+                f"Too many uploads in progress (max {self.max_active}); finish or delete one first",
+                status_code=429
+            )
+        if sum(u.length for u in uploads) + length > self.max_spool_bytes:
+            logger.warning(f"Upload spool is full, refusing {length} byte upload")
+            raise UploadError("Upload storage is full, try again later", status_code=507)
+
+        path = os.path.join(self.spool_dir, secrets.token_urlsafe(18))
+        upload = Upload(filename, content_type, length, owner, path, client)
+        # Registered before the first await so concurrent creates see it
+        self._uploads[upload.id] = upload
+        try:
+            await asyncio.to_thread(self._create_file, path)
+        except BaseException:
+            self._uploads.pop(upload.id, None)
+            raise
+        logger.info(f"Created upload {upload.id} for {filename} ({length} bytes)")
+        return upload
+
+    def _create_file(self, path: str) -> None:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with open(path, "xb"):
+            pass
+
+    def status(self, upload_id: str, owner: Optional[str]) -> Upload:
+        """Return an upload, or raise UploadError(404)."""
+        return self._get(upload_id, owner)
+
+    async def append(
+        self,
+        upload_id: str,
+        owner: Optional[str],
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        checksum: Optional[bytes] = None
+    ) -> Upload:
+        """
+        Append a chunk streamed from the client.
+
+        Args:
+            upload_id: Upload id
+            owner: Tenant id
+            offset: Client's Upload-Offset; must equal the bytes received so far
+            chunks: Request body stream
+            checksum: Expected SHA-256 digest of this chunk, if the client sent one
+
+        Returns:
+            The upload with its new offset
+
+        Raises:
+            UploadError: 404 unknown, 409 offset mismatch or already complete,
+                413 past Upload-Length, 460 checksum mismatch
+        """
+        upload = self._get(upload_id, owner)
+        async with upload.lock:
+            if upload.complete:
+                raise UploadError("Upload is already finalized", status_code=409)
+            if offset != upload.offset:
+                raise UploadError(f"Upload-Offset is {upload.offset}, got {offset}", status_code=409)
+
+            start = upload.offset
+            saved_hasher = upload.hasher.copy()
+            chunk_hasher = hashlib.sha256() if checksum is not None else None
+            buffer = bytearray()
+            # Unbuffered, so truncating to upload.offset always leaves exactly
+            # the bytes the offset and hash account for
+            with open(upload.path, "ab", buffering=0) as fh:
+                try:
+                    async for piece in chunks:
+                        if upload.offset + len(buffer) + len(piece) > upload.length:
+                            raise UploadError("Chunk extends past Upload-Length", status_code=413)
+                        if chunk_hasher is not None:
+                            chunk_hasher.update(piece)
+                        buffer += piece
+                        if len(buffer) >= WRITE_BUFFER_BYTES:
+                            data = bytes(buffer)
+                            buffer.clear()
+                            await self._commit(upload, fh, data)
+                    if buffer:
+                        data = bytes(buffer)
+                        buffer.clear()
+                        await self._commit(upload, fh, data)
+                    if chunk_hasher is not None and chunk_hasher.digest() != checksum:
+                        raise UploadError("Chunk checksum mismatch", status_code=460)
+                except BaseException as e:
+                    # UploadError, client disconnect, cancellation or a failed write
+                    if isinstance(e, UploadError) or chunk_hasher is not None:
+                        # The chunk must be applied as a whole or not at all
+                        self._rollback(upload, fh, start, saved_hasher)
+                        raise
+                    # Otherwise keep what arrived so the client can resume
+                    try:
+                        if buffer:
+                            self._write_all(fh, bytes(buffer))
+                            self._advance(upload, bytes(buffer))
+                    finally:
+                        fh.truncate(upload.offset)
+                    raise
+
+            upload.updated = time.time()
+            return upload
+
+    @staticmethod
+    def _write_all(fh, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            view = view[fh.write(view):]
+
+    @staticmethod
+    def _advance(upload: Upload, data: bytes) -> None:
+        upload.hasher.update(data)
+        upload.offset += len(data)
+        upload.updated = time.time()
+
+    async def _commit(self, upload: Upload, fh, data: bytes) -> None:
+        """
+        Append ``data`` off the event loop, then advance the offset and hash.
+
+        If the request is cancelled meanwhile, the write (which cannot be
+        stopped once running in its thread) is waited for and accounted
+        for before the cancellation propagates.
+        """
+        write = asyncio.ensure_future(asyncio.to_thread(self._write_all, fh, data))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            await write
+            self._advance(upload, data)
+            raise
+        self._advance(upload, data)
+
+    @staticmethod
+    def _rollback(upload: Upload, fh, start: int, saved_hasher) -> None:
+        fh.truncate(start)
+        upload.hasher = saved_hasher
+        upload.offset = start
+
+    async def finalize(self, upload_id: str, owner: Optional[str], sha256: Optional[str] = None) -> Upload:
+        """
+        Mark a fully received upload as ready to attach.
+
+        Args:
+            upload_id: Upload id
+            owner: Tenant id
+            sha256: Expected hex digest of the whole file, if known
+
+        Returns:
+            The finalized upload
+
+        Raises:
+            UploadError: 404 unknown, 409 incomplete, 460 digest mismatch
+        """
+        upload = self._get(upload_id, owner)
+        async with upload.lock:
+            if upload.complete:
+                return upload
+            if upload.offset != upload.length:
+                raise UploadError(
+                    f"Upload is incomplete: {upload.offset} of {upload.length} bytes received", status_code=409
+                )
+            digest = upload.hasher.hexdigest()
+            if sha256 and sha256.lower() != digest:
+                raise UploadError("Upload checksum mismatch", status_code=460)
+            upload.sha256 = digest
+            upload.updated = time.time()
+            logger.info(f"Finalized upload {upload.id} ({upload.length} bytes, sha256 {digest[:12]}...)")
+            return upload
+
+    async def read(self, upload_ids: List[str], owner: Optional[str]) -> List[Tuple[str, str, bytes]]:
+        """
+        Load finalized uploads for attaching to an email.
+
+        Args:
+            upload_ids: Attachment ids from ``finalize``
+            owner: Tenant id
+
+        Returns:
+            List of (filename, content_type, content)
+
+        Raises:
+            UploadError: If an id is unknown or not finalized
+        """
+        uploads = []
+        for upload_id in upload_ids:
+            upload = self._get(upload_id, owner)
+            if not upload.complete:
+                raise UploadError(f"Attachment {upload_id} has not been finalized", status_code=409)
+            uploads.append(upload)
+
+        result = []
+        for upload in uploads:
+            content = await asyncio.to_thread(self._read_file, upload.path)
+            upload.updated = time.time()
+            result.append((upload.filename, upload.content_type, content))
+        return result
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as fh:
+            return fh.read()
+
+    async def delete(self, upload_ids: List[str], owner: Optional[str]) -> None:
+        """Delete uploads and their spool files (unknown ids are ignored)."""
+        for upload_id in upload_ids:
+            upload = self._uploads.get(upload_id)
+            if upload is not None and upload.owner == owner:
+                await self._remove(upload)
+
+    async def _remove(self, upload: Upload) -> None:
+        self._uploads.pop(upload.id, None)
+        try:
+            await asyncio.to_thread(os.remove, upload.path)
+        except FileNotFoundError:
+            pass
+
+    async def sweep(self) -> int:
+        """Delete uploads that have not been touched for UPLOAD_EXPIRY seconds."""
+        cutoff = time.time() - self.expiry
+        stale = [u for u in self._uploads.values() if u.updated < cutoff and not u.lock.locked()]
+        for upload in stale:
+            await self._remove(upload)
+        if stale:
+            self.expired += len(stale)
+            logger.info(f"Expired {len(stale)} abandoned upload(s)")
+        return len(stale)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(min(60.0, self.expiry))
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Upload sweep failed: {e!r}")
+
+    @staticmethod
+    def _last_activity(path: str) -> float:
+        """
+        Return the newest mtime of a spool directory and the files in it.
+        Appends only touch the file, never the directory itself.
+        """
+        newest = os.path.getmtime(path)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    newest = max(newest, entry.stat().st_mtime)
+                except FileNotFoundError:
+                    pass
+        return newest
+
+    def _clean_spool_root(self) -> None:
+        """
+        Remove this process's stale directory and those of other processes
+        whose uploads have all been idle for longer than the expiry.
+        """
+        if not os.path.isdir(self.spool_root):
+            return
+        cutoff = time.time() - self.expiry
+        for name in os.listdir(self.spool_root):
+            path = os.path.join(self.spool_root, name)
+            try:
+                stale = path == self.spool_dir or self._last_activity(path) < cutoff
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+
+    async def start(self) -> None:
+        """Clean up old spool directories and start the sweeper."""
+        await asyncio.to_thread(self._clean_spool_root)
+        self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        uploads = list(self._uploads.values())
+        return {
+            "active": sum(not u.complete for u in uploads),
+            "finalized": sum(u.complete for u in uploads),
+            "spooled_bytes": sum(u.offset for u in uploads),
+            "expired": self.expired,
+        }
+
+
+upload_store = UploadStore()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML body pipeline: per-message cost cold vs. cached.
+
+Run from the repository root:
+    python -m benchmarks.html_pipeline
+"""
+
+import asyncio
+import time
+
+from app.services.html_pipeline import HtmlPipeline, process_html
+
+SECTION = """
+  <tr>
+    <td class="card">
+      <h2 class="title">Quarterly update #{n}</h2>
+      <p>Hello team,</p>
+      <p>Here is a summary of what   happened this quarter. Revenue grew, churn fell and
+      we shipped <a href="https://example.com/changelog/{n}" class="link">twelve features</a>.</p>
+      <ul><li>Item one</li><li>Item two</li><li>Item <b>three</b></li></ul>
+      <!-- tracking comment -->
+      <img src="https://example.com/pixel/{n}.png" alt="">
+    </td>
+  </tr>
+"""
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<style>
+  body {{ font-family: Arial, sans-serif; color: #333 }}
+  .card {{ padding: 16px; border: 1px solid #eee }}
+  .title, h1 {{ font-size: 20px; margin: 0 0 8px }}
+  a.link {{ color: #0066cc; text-decoration: none }}
+  p {{ line-height: 1.5 }}
+  @media (max-width: 600px) {{ .card {{ padding: 8px }} }}
+</style>
+</head>
+<body>
+<table>{sections}</table>
+</body>
+</html>
+"""
+
+
+def build_body(sections: int) -> str:
+    return TEMPLATE.format(sections="".join(SECTION.format(n=n) for n in range(sections)))
+
+
+def time_per_call(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+async def time_cached(pipeline: HtmlPipeline, body: str, iterations: int) -> float:
+    await pipeline.process(body)  # warm the cache
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await pipeline.process(body)
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    """Print cold and cached per-message cost for a few body sizes."""
+    pipeline = HtmlPipeline()
+    pipeline.enabled = True
+
+    print("HTML pipeline benchmark")
+    print("=" * 64)
+    print(f"{'body size':>12} {'out size':>10} {'cold ms/msg':>14} {'cached ms/msg':>15}")
+    for sections in (1, 10, 100):
+        body = build_body(sections)
+        processed, _ = process_html(body)
+        cold = time_per_call(lambda: process_html(body), iterations=max(5, 500 // sections))
+        cached = asyncio.run(time_cached(pipeline, body, iterations=10000))
+        print(f"{len(body):>12} {len(processed):>10} {cold:>14.3f} {cached:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compare the legacy inline prompt with the compact default template:
+estimated input tokens and prompt build time, and optionally real token
+counts and generation latency from Gemini.
+
+Run from the repository root:
+    python -m benchmarks.prompt_templates
+    python -m benchmarks.prompt_templates --live   # needs GEMINI_API_KEY
+"""
+
+import sys
+import time
+
+from app.services.prompt_templates import LEGACY_PROMPT, prompt_registry
+
+SUBJECTS = [
+    "Trip Tomorrow",
+    "Meeting follow up",
+    "Invoice #4821 is overdue",
+    "Quarterly business review agenda for Acme Corp and next steps on the renewal",
+]
+
+
+def legacy_prompt(subject: str) -> str:
+    """The prompt as it was built inline before the registry."""
+    return LEGACY_PROMPT.format(subject=subject)
+
+
+def time_per_call(fn, iterations: int = 20000) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def live_comparison():
+    """Count tokens with the Gemini API and time one generation per prompt."""
+    import google.generativeai as genai
+
+    from app.core.config import settings
+
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    model = genai.GenerativeModel("gemini-2.5-flash")
+    print()
+    print(f"{'subject':<32} {'prompt':>8} {'in tok':>8} {'out tok':>8} {'latency s':>10}")
+    for subject in SUBJECTS:
+        for label, text in (("legacy", legacy_prompt(subject)), ("compact", prompt_registry.render(subject).text)):
+            input_tokens = model.count_tokens(text).total_tokens
+            started = time.perf_counter()
+            response = model.generate_content(text)
+            elapsed = time.perf_counter() - started
+            output_tokens = response.usage_metadata.candidates_token_count
+            print(f"{subject[:32]:<32} {label:>8} {input_tokens:>8} {output_tokens:>8} {elapsed:>10.2f}")
+
+
+def main():
+    """Print estimated token counts and build time for both prompts."""
+    print("Prompt template benchmark (estimated tokens)")
+    print("=" * 72)
+    print(f"{'subject':<32} {'legacy tok':>10} {'compact tok':>12} {'saved':>7}")
+    for subject in SUBJECTS:
+        legacy = prompt_registry.render(subject, version="v1").input_tokens
+        compact = prompt_registry.render(subject).input_tokens
+        print(f"{subject[:32]:<32} {legacy:>10} {compact:>12} {1 - compact / legacy:>7.0%}")
+
+    subject = SUBJECTS[1]
+    print()
+    print(f"legacy f-string build:      {time_per_call(lambda: legacy_prompt(subject)):.2f} us")
+    print(f"registry render + budgets:  {time_per_call(lambda: prompt_registry.render(subject)):.2f} us")
+
+    if "--live" in sys.argv:
+        live_comparison()
+
+
+if __name__ == "__main__":
+    main()
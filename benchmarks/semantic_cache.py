@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the near-duplicate AI body cache: hit rate and lookup latency
+with a large number of cached subjects.
+
+Run from the repository root (requires numpy):
+    python -m benchmarks.semantic_cache
+"""
+
+import random
+import time
+
+from app.services.semantic_cache import SemanticCache
+
+TOPICS = [
+    "meeting", "invoice", "trip", "project", "contract", "interview", "launch",
+    "budget", "report", "workshop", "delivery", "order", "webinar", "review",
+    "renewal", "onboarding", "survey", "payment", "proposal", "deadline",
+]
+ACTIONS = [
+    "follow up", "reminder", "update", "cancelled", "rescheduled", "confirmation",
+    "request", "summary", "agenda", "feedback", "approval", "kickoff",
+]
+QUALIFIERS = [
+    "", "tomorrow", "next week", "for Q3", "with the client", "for the team",
+    "this friday", "in berlin", "for acme corp", "v2",
+]
+
+
+def make_subject(rng: random.Random, n: int) -> str:
+    words = [rng.choice(TOPICS), rng.choice(ACTIONS), rng.choice(QUALIFIERS)]
+    return " ".join(w for w in words if w) + f" #{n}"
+
+
+def paraphrase(rng: random.Random, subject: str) -> str:
+    """Punctuation, casing and word-order variations of a cached subject."""
+    variant = rng.randrange(3)
+    if variant == 0:
+        return subject.upper() + "!"
+    if variant == 1:
+        return subject.replace(" ", "-", 1)
+    words = subject.split()
+    return " ".join(words[1:2] + words[:1] + words[2:])
+
+
+def main(size: int = 100_000, queries: int = 2_000):
+    """Fill the cache with ``size`` subjects and time ``queries`` lookups of each kind."""
+    rng = random.Random(42)
+    cache = SemanticCache(capacity=size, threshold=0.9)
+
+    subjects = [make_subject(rng, n) for n in range(size)]
+    started = time.perf_counter()
+    for subject in subjects:
+        cache.put(subject, "body")
+    fill = time.perf_counter() - started
+
+    print("Semantic cache benchmark")
+    print("=" * 64)
+    print(f"cached subjects: {len(cache)}  (fill {fill:.1f}s, "
+          f"{cache._vectors.nbytes / 1024 / 1024:.0f} MB of vectors)")
+    print(f"{'lookup kind':>16} {'hit rate':>10} {'avg us':>10} {'p99 us':>10}")
+
+    kinds = {
+        "exact": lambda: rng.choice(subjects),
+        "paraphrase": lambda: paraphrase(rng, rng.choice(subjects)),
+        "unrelated": lambda: f"quarterly tax filing question {rng.randrange(10**6)}",
+    }
+    for kind, make_query in kinds.items():
+        latencies = []
+        hits = 0
+        for _ in range(queries):
+            query = make_query()
+            started = time.perf_counter()
+            hits += cache.get(query) is not None
+            latencies.append((time.perf_counter() - started) * 1e6)
+        latencies.sort()
+        print(f"{kind:>16} {hits / queries:>10.1%} {sum(latencies) / queries:>10.1f} "
+              f"{latencies[int(queries * 0.99)]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,37 +4,64 @@ A secure and efficient email sending service with AI-powered content generation.
 """
 
 import os
+import math
 import logging
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
 from app.core.config import settings
 from app.core.logging_config import setup_logging
-from app.api.routes import email, health
+from app.core.security import limiter, require_api_key, require_admin
+from app.core.http import http_pool
+from app.core.lifecycle import inflight
+from app.core.reload import settings_reloader, SettingsSnapshotMiddleware, ReloadableCORSMiddleware
+from app.core.tracing import TracingMiddleware, trace_exporter
+from app.api.errors import validation_exception_handler
+from app.api.routes import email, health, webhooks, suppressions, stats, admin, uploads
 from app.core.exceptions import EmailServiceError, AIServiceError
+from app.services.event_store import event_store
+from app.services.suppression import suppression_list
+from app.services.quota import quota_store
+from app.services.uploads import upload_store
+from app.services.attachment_optimizer import attachment_optimizer
+from app.services.attachment_scanner import attachment_scanner
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     logger.info("Starting Quick Mail Sender API...")
+    await suppression_list.load()
+    await event_store.start()
+    await quota_store.start()
+    await upload_store.start()
+    await trace_exporter.start()
+    inflight.install_signal_handler()
+    await settings_reloader.start()
     yield
     logger.info("Shutting down Quick Mail Sender API...")
+    # Let in-flight sends finish before tearing down what they use
+    await inflight.drain()
+    await settings_reloader.stop()
+    await quota_store.stop()
+    await upload_store.stop()
+    await event_store.stop()
+    attachment_optimizer.pool.shutdown()
+    attachment_scanner.pool.shutdown()
+    await trace_exporter.stop()
+    await http_pool.aclose()
+    logger.info(f"Shutdown complete: {inflight.stats()}")
+    for handler in logging.getLogger().handlers:
+        handler.flush()
 
 # Create FastAPI app
 app = FastAPI(
@@ -47,33 +74,35 @@ app = FastAPI(
 # Add rate limiting middleware
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_middleware(SlowAPIMiddleware)
 
-# Add CORS middleware
+# Add CORS middleware (origins follow ALLOWED_ORIGINS across settings reloads)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.ALLOWED_ORIGINS,
+    ReloadableCORSMiddleware,
     allow_credentials=True,
-    allow_methods=["GET", "POST"],
+    allow_methods=["GET", "POST", "PATCH", "HEAD", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Location", "Upload-Offset", "Upload-Length", "Tus-Resumable"],
 )
 
+# Pin each request to the settings snapshot current when it arrived
+app.add_middleware(SettingsSnapshotMiddleware)
+
+# Trace every request; added last so it is the outermost middleware
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(health.router, tags=["health"])
 app.include_router(email.router, tags=["email"])
+app.include_router(uploads.router, tags=["uploads"])
+app.include_router(webhooks.router, tags=["events"])
+app.include_router(suppressions.router, tags=["suppressions"], dependencies=[Depends(require_api_key)])
+app.include_router(stats.router, tags=["stats"], dependencies=[Depends(require_api_key)])
+app.include_router(admin.router, tags=["admin"], dependencies=[Depends(require_admin)], include_in_schema=settings.PROFILING_ENABLED)
 
 # Global exception handlers
-@app.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    """Handle request validation errors with detailed logging."""
-    body = await request.body()
-    logger.error(f"Validation error for {request.url}: {exc.errors()}")
-    logger.error(f"Request body: {body.decode('utf-8')}")
-    return JSONResponse(
-        status_code=422,
-        content={"detail": exc.errors(), "body": body.decode('utf-8')}
-    )
-
 @app.exception_handler(EmailServiceError)
 async def email_service_error_handler(request: Request, exc: EmailServiceError):
     """Handle email service errors."""
@@ -96,8 +125,10 @@ if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "main:app",
-        host="127.0.0.1",
-        port=8000,
+        host=settings.HOST,
+        port=settings.PORT,
         reload=settings.DEBUG,
-        log_level="info"
+        log_level="info",
+        # Stop waiting for open requests when the drain window ends
+        timeout_graceful_shutdown=math.ceil(settings.DRAIN_TIMEOUT)
     )
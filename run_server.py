@@ -3,14 +3,18 @@
 Startup script for Quick Mail Sender API.
 """
 
+import math
+
 import uvicorn
 from app.core.config import settings
 
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
-        host="127.0.0.1",
-        port=8000,
+        host=settings.HOST,
+        port=settings.PORT,
         reload=settings.DEBUG,
-        log_level="info"
+        log_level="info",
+        # Stop waiting for open requests when the drain window ends
+        timeout_graceful_shutdown=math.ceil(settings.DRAIN_TIMEOUT)
     )
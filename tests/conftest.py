@@ -0,0 +1,9 @@
+"""
+Shared test setup.
+"""
+
+import os
+
+# The settings module validates the environment on import; outside DEBUG
+# it requires explicit CORS origins.
+os.environ.setdefault("ALLOWED_ORIGINS", "http://testserver")
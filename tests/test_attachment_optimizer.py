@@ -0,0 +1,39 @@
+"""
+Tests for attachment optimization.
+"""
+
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from app.services.attachment_optimizer import _shrink_image
+
+OPTIONS = {"max_image_dimension": 100, "jpeg_quality": 80}
+ICC = b"\x00fake-icc-profile"
+
+
+def jpeg(size, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG", **kwargs)
+    return buffer.getvalue()
+
+
+def test_small_image_is_returned_untouched():
+    content = jpeg((50, 40))
+    assert _shrink_image("a.jpg", "image/jpeg", content, OPTIONS)[2] is content
+
+
+def test_resized_image_keeps_colour_profile_and_exif():
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Maker"
+    exif[0x0112] = 6  # rotated 90 degrees
+    content = jpeg((400, 200), icc_profile=ICC, exif=exif.tobytes())
+
+    _, _, shrunk = _shrink_image("a.jpg", "image/jpeg", content, OPTIONS)
+    with Image.open(io.BytesIO(shrunk)) as image:
+        assert image.size == (50, 100)
+        assert image.info["icc_profile"] == ICC
+        assert image.getexif()[0x010F] == "Camera Maker"
+        assert 0x0112 not in image.getexif()
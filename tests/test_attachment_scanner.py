@@ -0,0 +1,57 @@
+"""
+Tests for attachment content scanning.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.attachment_scanner import AttachmentScanner, sniff_type, scan_attachment
+
+
+@pytest.mark.parametrize("encoding", ["utf-16-le", "utf-16-be", "utf-32-le", "utf-32-be"])
+def test_utf16_and_utf32_text_with_bom_is_text(encoding):
+    content = "\ufeffname,amount\nAlice,10\n".encode(encoding)
+    assert sniff_type(content) == "text/plain"
+
+
+def test_binary_with_nul_bytes_is_unknown():
+    assert sniff_type(b"\x01\x00\x02\x00binary") is None
+
+
+def test_scanner_error_is_not_cacheable():
+    options = {"clamd_address": "127.0.0.1:1", "timeout": 1}
+    verdict = scan_attachment("a.txt", "text/plain", b"hello", ["clamd"], options)
+    assert not verdict.clean
+    assert not verdict.cacheable
+
+
+class FlakyPool:
+    """Fails the first scan, then runs scans in-process."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def run(self, fn, *args, timeout):
+        self.calls += 1
+        if self.calls == 1:
+            return fn(args[0], args[1], args[2], ["clamd"], {"clamd_address": "127.0.0.1:1", "timeout": 1})
+        return fn(*args)
+
+
+def test_failed_scan_is_retried_not_cached():
+    scanner = AttachmentScanner()
+    scanner.enabled = True
+    scanner.scanner_names = ["magic"]
+    scanner.pool = FlakyPool()
+
+    async def scan_twice():
+        first = await scanner.scan("a.txt", "text/plain", b"hello")
+        second = await scanner.scan("a.txt", "text/plain", b"hello")
+        return first, second
+
+    first, second = asyncio.run(scan_twice())
+    assert not first.clean
+    assert second.clean
+    assert scanner.pool.calls == 2
+    assert scanner.stats()["failures"] == 1
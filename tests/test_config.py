@@ -0,0 +1,46 @@
+"""
+Tests for settings parsing and validation.
+"""
+
+import pytest
+
+from app.core.config import Settings
+from app.core.exceptions import ConfigurationError
+
+ORIGINS = {"ALLOWED_ORIGINS": "https://app.example.com"}
+
+
+def test_defaults_are_valid():
+    assert Settings(ORIGINS).DOMAIN_LIMITS == ""
+
+
+def test_every_problem_is_reported_at_once():
+    with pytest.raises(ConfigurationError) as raised:
+        Settings({
+            "DEBUG": "maybe",
+            "HTTP_TIMEOUT": "soon",
+            "ATTACHMENT_WORKERS": "two",
+            "DRAIN_TIMEOUT": "-1",
+            "DOMAIN_LIMITS": "gmail.com=0:5:1",
+        })
+    message = raised.value.message
+    for name in ("DEBUG", "HTTP_TIMEOUT", "ATTACHMENT_WORKERS", "DRAIN_TIMEOUT", "DOMAIN_LIMITS"):
+        assert name in message
+
+
+def test_domain_limits_are_validated():
+    with pytest.raises(ConfigurationError, match="gmail.com=5:x"):
+        Settings({**ORIGINS, "DOMAIN_LIMITS": "gmail.com=5:x"})
+    assert Settings({**ORIGINS, "DOMAIN_LIMITS": "gmail.com=5:10:2"}).DOMAIN_LIMITS == "gmail.com=5:10:2"
+
+
+def test_origins_are_explicit_outside_debug():
+    with pytest.raises(ConfigurationError, match="ALLOWED_ORIGINS must be set"):
+        Settings({})
+    with pytest.raises(ConfigurationError, match="not '\\*'"):
+        Settings({"ALLOWED_ORIGINS": "https://app.example.com,*"})
+    assert Settings({"ALLOWED_ORIGINS": " https://a.example.com, https://b.example.com ,"}).ALLOWED_ORIGINS == [
+        "https://a.example.com",
+        "https://b.example.com",
+    ]
+    assert Settings({"DEBUG": "true"}).ALLOWED_ORIGINS == ["http://localhost:3000", "http://127.0.0.1:3000"]
@@ -0,0 +1,104 @@
+"""
+Tests for per-recipient-domain throttling.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import parse_domain_limits
+from app.core.exceptions import ConfigurationError, DomainThrottledError
+from app.services.domain_scheduler import DomainScheduler, DomainThrottle
+
+
+def test_parse_domain_limits():
+    assert parse_domain_limits("Gmail.com=5:10:2, yahoo.com=2", 4) == {
+        "gmail.com": (5.0, 10, 2),
+        "yahoo.com": (2.0, 2, 4),
+    }
+
+
+@pytest.mark.parametrize("spec", [
+    "gmail.com=0",
+    "gmail.com=-1:5:1",
+    "gmail.com=5:0:1",
+    "gmail.com=5:5:0",
+    "gmail.com=fast",
+    "=5:5:1",
+])
+def test_parse_domain_limits_rejects_bad_entries(spec):
+    with pytest.raises(ConfigurationError, match="DOMAIN_LIMITS entry"):
+        parse_domain_limits(spec, 4)
+
+
+def test_large_message_is_charged_in_full():
+    throttle = DomainThrottle(rate=10, burst=5, concurrency=1)
+    assert throttle.reserve(25, max_wait=10) == pytest.approx(2.0, abs=0.01)
+    assert throttle.tokens == pytest.approx(-20, abs=0.1)
+    # The next caller queues behind the debt
+    assert throttle.reserve(1, max_wait=10) == pytest.approx(2.1, abs=0.01)
+
+
+def test_rejected_reservation_reports_its_delay():
+    scheduler = DomainScheduler()
+    scheduler.max_wait = 1
+    scheduler.overrides = {"a.com": (10, 5, 1), "b.com": (1, 1, 1)}
+
+    async def send():
+        async with scheduler.slot(["x@a.com", "y@b.com", "z@b.com", "w@b.com", "v@b.com"]):
+            pass
+
+    with pytest.raises(DomainThrottledError) as raised:
+        asyncio.run(send())
+    assert raised.value.retry_after == 3
+    # The tokens taken from a.com were refunded
+    assert scheduler._throttles["a.com"].tokens == pytest.approx(5, abs=0.1)
+
+
+def test_waiting_message_holds_no_slots():
+    scheduler = DomainScheduler()
+    scheduler.overrides = {"a.com": (100, 100, 1), "b.com": (100, 100, 1)}
+
+    async def run():
+        order = []
+        release_b = asyncio.Event()
+
+        async def send(recipients, name, until=None):
+            async with scheduler.slot(recipients):
+                order.append(name)
+                if until:
+                    await until.wait()
+
+        busy_b = asyncio.create_task(send(["x@b.com"], "b", release_b))
+        await asyncio.sleep(0)
+        both = asyncio.create_task(send(["x@a.com", "y@b.com"], "a+b"))
+        await asyncio.sleep(0.05)
+        # a.com is free even though the two-domain message is waiting on b.com
+        await asyncio.wait_for(send(["z@a.com"], "a"), 1)
+        release_b.set()
+        await asyncio.gather(busy_b, both)
+        return order
+
+    assert asyncio.run(run()) == ["b", "a", "a+b"]
+    assert all(t.in_flight == 0 and t.waiting == 0 for t in scheduler._throttles.values())
+
+
+def test_cancelled_wait_refunds_tokens():
+    scheduler = DomainScheduler()
+    scheduler.max_wait = 10
+    scheduler.overrides = {"a.com": (1, 1, 1)}
+
+    async def run():
+        async with scheduler.slot(["x@a.com"]):
+            pass
+        # The bucket is empty, so this one sleeps for its token
+        task = asyncio.create_task(scheduler.slot(["y@a.com"]).__aenter__())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    throttle = scheduler._throttles["a.com"]
+    assert throttle.tokens == pytest.approx(0, abs=0.2)
+    assert throttle.waiting == 0 and throttle.in_flight == 0
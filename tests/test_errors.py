@@ -0,0 +1,50 @@
+"""
+Tests for the shared exception handlers.
+"""
+
+from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.api.errors import MAX_LOGGED_BODY_CHARS, validation_exception_handler
+from app.api.routes import uploads
+
+
+class Payload(BaseModel):
+    subject: str
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.include_router(uploads.router)
+
+    @app.post("/json")
+    async def json_endpoint(payload: Payload):
+        return payload
+
+    return TestClient(app)
+
+
+def test_malformed_upload_chunk_is_a_422_without_reading_the_body():
+    client = make_client()
+    for headers in ({}, {"Upload-Offset": "abc"}):
+        response = client.patch(
+            "/uploads/some-id",
+            content=b"\xff\xfe\x00binary" * 1000,
+            headers={"Content-Type": "application/offset+octet-stream", **headers},
+        )
+        assert response.status_code == 422
+        assert "body" not in response.json()
+
+
+def test_text_body_is_echoed_bounded_and_decoded_leniently():
+    client = make_client()
+    body = b"\xff" * 10 + b"x" * 10000
+    response = client.post("/json", content=body, headers={"Content-Type": "text/plain"})
+    assert response.status_code == 422
+    echoed = response.json()["body"]
+    assert echoed.startswith("\ufffd")
+    assert echoed.endswith(f"({len(body)} bytes)")
+    assert len(echoed) < MAX_LOGGED_BODY_CHARS + 50
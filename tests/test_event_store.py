@@ -0,0 +1,32 @@
+"""
+Tests for the delivery event store.
+"""
+
+import asyncio
+
+from app.services.event_store import DeliveryEventStore
+
+
+def test_history_is_scoped_to_the_sending_tenant(tmp_path):
+    async def run():
+        store = DeliveryEventStore(str(tmp_path / "events.db"))
+        await store.start()
+        try:
+            store.record_sent("<a@relay>", ["bob@example.com"], tenant="acme")
+            store.record_sent("<b@relay>", ["bob@example.com"], tenant="globex")
+            store.append([{"event": "delivered", "message-id": "<a@relay>", "email": "bob@example.com"}])
+            await store.flush()
+            return (
+                await store.get_message_events("a@relay", tenant="acme"),
+                await store.get_message_events("a@relay", tenant="globex"),
+                await store.get_recipient_events("bob@example.com", tenant="globex"),
+                await store.get_recipient_events("bob@example.com"),
+            )
+        finally:
+            await store.stop()
+
+    own, other, recipient, unscoped = asyncio.run(run())
+    assert [e["event"] for e in own] == ["sent", "delivered"]
+    assert other == []
+    assert [e["message_id"] for e in recipient] == ["b@relay"]
+    assert len(unscoped) == 3
@@ -0,0 +1,48 @@
+"""
+Regression tests for the HTML sanitizer.
+"""
+
+import pytest
+
+from app.services.html_pipeline import process_html
+
+
+def sanitize(source: str) -> str:
+    return process_html(source, inline_css=False, minify=True)[0]
+
+
+@pytest.mark.parametrize("source", [
+    '<a href="java&#9;script:alert(1)">x</a>',
+    '<a href="java&#x0A;script:alert(1)">x</a>',
+    '<a href=" &#x6A;avascript:alert(1)">x</a>',
+])
+def test_script_url_with_entities_or_control_characters_is_removed(source):
+    assert "script:" not in sanitize(source).lower()
+
+
+def test_xlink_href_script_url_is_removed():
+    result = sanitize('<svg><a xlink:href="javascript:alert(1)"><text>x</text></a></svg>')
+    assert "javascript" not in result
+    assert "<text>x</text>" in result
+
+
+@pytest.mark.parametrize("style", [
+    "background:url(javascript:alert(1))",
+    "background:url('jav\\61script:alert(1)')",
+    "width:expression(alert(1))",
+])
+def test_unsafe_css_in_style_attribute_is_removed(style):
+    result = sanitize(f'<div style="color:red;{style}">x</div>')
+    assert "alert" not in result
+    assert "color:red" in result
+
+
+def test_unsafe_css_in_style_block_is_removed():
+    result = sanitize('<style>p{background:url("javascript:alert(1)")} .a:hover{color:red}</style><p>hi</p>')
+    assert "javascript" not in result
+    assert ".a:hover{color:red}" in result
+
+
+def test_safe_urls_and_css_are_kept():
+    source = '<a href="https://example.com/a" style="background:url(https://example.com/b.png)">ok</a>'
+    assert sanitize(source) == source
@@ -0,0 +1,53 @@
+"""
+Tests for the shared outbound HTTP client.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http import HttpClientPool
+
+
+async def serve(reader, writer):
+    while await reader.readline() not in (b"\r\n", b""):
+        pass
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+def test_requests_go_through_the_pooled_transport():
+    async def run():
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        pool = HttpClientPool()
+        try:
+            response = await pool.request("GET", f"http://127.0.0.1:{port}/")
+            return response.text, pool.stats()
+        finally:
+            await pool.aclose()
+            server.close()
+
+    text, stats = asyncio.run(run())
+    assert text == "ok"
+    assert stats["open_connections"] == 1
+    assert stats["hosts"]["127.0.0.1"]["connections"]["idle"] == 1
+
+
+def test_transport_errors_are_httpx_errors():
+    async def run():
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        pool = HttpClientPool()
+        try:
+            await pool.request("GET", f"http://127.0.0.1:{port}/")
+        finally:
+            await pool.aclose()
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(run())
@@ -0,0 +1,76 @@
+"""
+Tests for per-tenant quota counting.
+"""
+
+import asyncio
+
+from fastapi import Depends, FastAPI, Form, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.security import TenantRegistry, require_quota
+from app.services.quota import QuotaStore
+
+
+def test_refund_gives_back_counted_usage():
+    store = QuotaStore(path=":memory:")
+    assert store.consume("acme", "send", 1, 0) is None
+    store.refund("acme", "send", store.periods)
+    assert store.consume("acme", "send", 1, 0) is None
+    assert store.consume("acme", "send", 1, 0) is not None
+
+
+def test_flush_picks_up_other_workers_usage(tmp_path):
+    path = str(tmp_path / "quota.db")
+
+    async def run():
+        first, second = QuotaStore(path), QuotaStore(path)
+        await first.start()
+        await second.start()
+        try:
+            for _ in range(3):
+                assert first.consume("acme", "ai", 5, 0) is None
+            await first.flush()
+            await second.flush()
+            assert second.consume("acme", "ai", 5, 0) is None
+            assert second.consume("acme", "ai", 5, 0) is None
+            return second.consume("acme", "ai", 5, 0)
+        finally:
+            await first.stop()
+            await second.stop()
+
+    assert asyncio.run(run()) is not None
+
+
+def make_client(monkeypatch, store):
+    registry = TenantRegistry([{"tenant": "acme", "key": "key", "daily_send": 1}])
+    monkeypatch.setattr(security, "tenant_registry", registry)
+    monkeypatch.setattr(security, "quota_store", store)
+
+    app = FastAPI()
+
+    @app.post("/send")
+    async def send(status: int = Form(...), tenant=Depends(require_quota("send"))):
+        if status != 200:
+            raise HTTPException(status_code=status, detail="failed")
+        return {"ok": True}
+
+    return TestClient(app, headers={"X-API-Key": "key"})
+
+
+def test_failed_requests_are_refunded(monkeypatch):
+    store = QuotaStore(path=":memory:")
+    client = make_client(monkeypatch, store)
+    for status in (400, 422, 429, 502):
+        assert client.post("/send", data={"status": status}).status_code == status
+    # Missing form field: request validation fails after the quota check
+    assert client.post("/send").status_code == 422
+    assert client.post("/send", data={"status": 200}).status_code == 200
+    assert client.post("/send", data={"status": 200}).status_code == 429
+
+
+def test_internal_error_stays_counted(monkeypatch):
+    store = QuotaStore(path=":memory:")
+    client = make_client(monkeypatch, store)
+    assert client.post("/send", data={"status": 500}).status_code == 500
+    assert client.post("/send", data={"status": 200}).status_code == 429
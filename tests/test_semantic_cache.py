@@ -0,0 +1,45 @@
+"""
+Regression tests for the near-duplicate AI body cache.
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.services.semantic_cache import SemanticCache
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(capacity=16, threshold=0.9)
+
+
+@pytest.mark.parametrize("cached, query", [
+    ("Your order has shipped", "Your order has not shipped"),
+    ("Invoice #4821", "Invoice #4822"),
+    ("Welcome to the team, Alice", "Welcome to the team, Bob"),
+    ("Meeting tomorrow", "Cancel meeting tomorrow"),
+])
+def test_different_meaning_is_a_miss(cache, cached, query):
+    cache.put(cached, "body")
+    assert cache.get(query) is None
+
+
+def test_paraphrase_is_a_hit(cache):
+    cache.put("Meeting follow up", "body")
+    assert cache.get("meeting follow-up!")[0] == "body"
+    assert cache.get("Follow up meeting")[0] == "body"
+
+
+def test_variants_are_not_shared(cache):
+    cache.put("Meeting follow up", "body", variant="tenant-a|v1")
+    assert cache.get("Meeting follow up", variant="tenant-b|v1") is None
+
+
+def test_evicted_partitions_are_dropped():
+    cache = SemanticCache(capacity=2, threshold=0.9)
+    for n in range(10):
+        cache.put(f"Invoice #{n}", f"body {n}")
+    assert cache.get("Invoice #9")[0] == "body 9"
+    assert cache.get("Invoice #1") is None
+    assert len(cache._partitions) == 2
@@ -0,0 +1,103 @@
+"""
+Tests for resumable upload spooling.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+
+from app.core.exceptions import UploadError
+from app.services.uploads import UploadStore, WRITE_BUFFER_BYTES
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = UploadStore()
+    store.spool_root = str(tmp_path)
+    store.spool_dir = str(tmp_path / "spool")
+    store.max_bytes = 10 * WRITE_BUFFER_BYTES
+    return store
+
+
+def assert_consistent(upload):
+    with open(upload.path, "rb") as fh:
+        content = fh.read()
+    assert len(content) == upload.offset
+    assert hashlib.sha256(content).hexdigest() == upload.hasher.hexdigest()
+
+
+def test_cancelled_append_keeps_file_offset_and_hash_in_step(store):
+    async def run():
+        upload = await store.create("a.bin", "application/pdf", 4 * WRITE_BUFFER_BYTES, None)
+        arrived = asyncio.Event()
+
+        async def chunks():
+            yield b"x" * WRITE_BUFFER_BYTES
+            yield b"y" * 1000
+            arrived.set()
+            await asyncio.Event().wait()
+
+        task = asyncio.create_task(store.append(upload.id, None, 0, chunks()))
+        await arrived.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return upload
+
+    upload = asyncio.run(run())
+    assert upload.offset == WRITE_BUFFER_BYTES + 1000
+    assert_consistent(upload)
+
+
+def test_checksum_mismatch_rolls_back(store):
+    async def run():
+        upload = await store.create("a.bin", "application/pdf", 100, None)
+
+        async def chunks():
+            yield b"a" * 10
+
+        await store.append(upload.id, None, 0, chunks())
+        with pytest.raises(UploadError) as raised:
+            await store.append(upload.id, None, 10, chunks(), checksum=b"wrong")
+        assert raised.value.status_code == 460
+        return upload
+
+    upload = asyncio.run(run())
+    assert upload.offset == 10
+    assert_consistent(upload)
+
+
+def test_per_client_and_spool_caps(store):
+    store.max_active = 2
+    store.max_spool_bytes = 250
+
+    async def run():
+        await store.create("a", "application/pdf", 100, None, client="ip:1")
+        await store.create("b", "application/pdf", 100, None, client="ip:1")
+        with pytest.raises(UploadError) as too_many:
+            await store.create("c", "application/pdf", 10, None, client="ip:1")
+        with pytest.raises(UploadError) as full:
+            await store.create("d", "application/pdf", 100, None, client="ip:2")
+        await store.create("e", "application/pdf", 50, None, client="ip:2")
+        return too_many.value.status_code, full.value.status_code
+
+    assert asyncio.run(run()) == (429, 507)
+    assert len(os.listdir(store.spool_dir)) == 3
+
+
+def test_spool_cleanup_judges_other_workers_by_their_newest_file(store):
+    store.expiry = 60
+    old = time.time() - 3600
+    active, idle = store.spool_root + "/111", store.spool_root + "/222"
+    for path in (active, idle, store.spool_dir):
+        os.makedirs(path)
+        with open(os.path.join(path, "upload"), "wb") as fh:
+            fh.write(b"x")
+        os.utime(path, (old, old))
+    os.utime(os.path.join(idle, "upload"), (old, old))
+
+    store._clean_spool_root()
+    assert sorted(os.listdir(store.spool_root)) == ["111"]